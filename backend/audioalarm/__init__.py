@@ -0,0 +1 @@
+"""Backend services for the Audio Alarm monitor."""
@@ -0,0 +1,325 @@
+"""Offline RMS/alarm re-analysis of recorded audio files.
+
+Files are spread across a process pool. Each worker streams its file from
+disk in blocks through :class:`~audioalarm.features.StreamingRms` (WAV via
+:class:`~audioalarm.wavfile.WavReader`, raw ``.f32`` session audio via a
+memory map, other formats via soundfile), so
+memory stays flat however long the recording is, then reduces the frames to one
+row per ``--interval`` (max and mean RMS, as the live page stores them) and
+finds alarm events with the browser's hysteresis and cooldown rules. The
+parent process writes the rows and alarm events to the SQLite store in bulk,
+several files per transaction, replacing whatever was stored for those files
+before. A file that fails to analyse or to store is logged and skipped.
+
+Each file becomes one session whose id is the file's absolute path and
+whose start time is its modification time minus its duration.
+
+``.f32`` files are the raw float32 mono PCM that the ingest server stores
+for browsers without WebCodecs (``<audio-dir>/<session>.f32``). They carry
+no header, so their sample rate is taken from the live session of the same
+name in the store; a file without one is logged and counted as failed.
+
+With ``--cache DIR`` the frame-level RMS of every file is kept in a
+:class:`~audioalarm.cache.FeatureCache`, so re-running with only a new
+threshold or interval skips decoding entirely.
+
+Run with ``python -m audioalarm.batch --db rms.sqlite3 --threshold 0.05 recordings/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+import soundfile as sf
+
+from .cache import FeatureCache
+from .features import StreamingRms, alarm_frames
+from .ingest import audio_file_stem
+from .store import RmsBatch, RmsStore
+from .wavfile import WavReader
+
+logger = logging.getLogger(__name__)
+
+RAW_PCM_EXTENSION = ".f32"
+AUDIO_EXTENSIONS = frozenset({".wav", ".flac", ".ogg", ".opus", RAW_PCM_EXTENSION})
+
+
+@dataclass(frozen=True)
+class AnalysisConfig:
+    threshold: float = 0.05
+    frame_length: int = 2048
+    hop_length: int = 512
+    interval_seconds: float = 1.0
+    release_ratio: float = 0.8
+    cooldown_seconds: float = 2.0
+    block_frames: int = 1 << 16
+    cache_dir: str | None = None
+    cache_bytes: int = 1 << 30
+
+
+@dataclass(frozen=True)
+class FileResult:
+    path: str
+    sample_rate: int
+    duration: float
+    alarms: list[float]  # seconds from the start of the file
+    batch: RmsBatch
+
+
+def find_audio_files(paths: Iterable[str | Path]) -> Iterator[Path]:
+    """Expand directories recursively into the audio files they contain."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)
+        else:
+            yield path
+
+
+# One cache handle per worker process, opened on first use
+_caches: dict[tuple[str, int], FeatureCache] = {}
+
+
+def _cache(config: AnalysisConfig) -> FeatureCache | None:
+    if config.cache_dir is None:
+        return None
+    key = (config.cache_dir, config.cache_bytes)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = FeatureCache(config.cache_dir, config.cache_bytes)
+    return cache
+
+
+def raw_sample_rates(store: RmsStore) -> dict[str, int]:
+    """Sample rate of every stored session, keyed by its uploaded audio file stem."""
+    return {
+        audio_file_stem(str(session["session_id"])): int(session["sample_rate"])
+        for session in store.sessions()
+        if session["sample_rate"]
+    }
+
+
+def _blocks(path: Path, config: AnalysisConfig) -> Iterator[np.ndarray]:
+    """Mono float32 blocks; uncompressed WAV and raw PCM are memory-mapped, anything else decoded."""
+    if path.suffix.lower() == RAW_PCM_EXTENSION:
+        if path.stat().st_size < 4:
+            return
+        samples = np.memmap(path, dtype="<f4", mode="r")
+        for start in range(0, samples.size, config.block_frames):
+            yield np.array(samples[start : start + config.block_frames], dtype=np.float32)
+        return
+    if path.suffix.lower() == ".wav":
+        try:
+            reader = WavReader(path)
+        except ValueError:
+            pass  # compressed or unusual WAV; let libsndfile decode it
+        else:
+            with reader:
+                yield from reader.blocks(config.block_frames)
+            return
+    with sf.SoundFile(path) as audio:
+        for block in audio.blocks(blocksize=config.block_frames, dtype="float32", always_2d=True):
+            yield block[:, 0] if block.shape[1] == 1 else block.mean(axis=1)
+
+
+def file_rms(path: Path, config: AnalysisConfig) -> np.ndarray:
+    """Frame RMS of the mono mixdown of ``path``, read block by block."""
+    stream = StreamingRms(config.frame_length, config.hop_length)
+    parts = [stream.process(block) for block in _blocks(path, config)]
+    parts.append(stream.finish())
+    return np.concatenate(parts)
+
+
+def analyse_file(path: str | Path, config: AnalysisConfig, sample_rate: int | None = None) -> FileResult:
+    """Stream one file through RMS and alarm analysis.
+
+    ``sample_rate`` is required for headerless ``.f32`` PCM and ignored otherwise.
+    """
+    path = Path(path).resolve()
+    if path.suffix.lower() == RAW_PCM_EXTENSION:
+        if not sample_rate:
+            raise ValueError("raw PCM needs the session's sample rate")
+        total_frames = path.stat().st_size // 4
+    else:
+        info = sf.info(str(path))
+        sample_rate = info.samplerate
+        total_frames = info.frames
+    cache = _cache(config)
+    if cache is None:
+        rms = file_rms(path, config)
+    else:
+        params = {
+            "frame_length": config.frame_length,
+            "hop_length": config.hop_length,
+            "sample_rate": sample_rate,
+            "center": True,
+            "mixdown": "mean",
+        }
+        rms = cache.get_or_compute(path, "rms", params, lambda: file_rms(path, config))
+    duration = total_frames / sample_rate
+    start = path.stat().st_mtime - duration
+
+    # Frame i is centred on sample i * hop_length; group frames per interval.
+    # A frame centred at or past the end of the file (the last one when the
+    # length is a multiple of the hop) belongs to the final interval.
+    interval = config.interval_seconds * sample_rate
+    last_slot = max(0, int(np.ceil(total_frames / interval)) - 1)
+    slots = np.minimum(np.arange(rms.size) * config.hop_length // interval, last_slot).astype(np.int64)
+    bounds = np.flatnonzero(np.diff(slots, prepend=-1))
+    counts = np.diff(np.append(bounds, rms.size))
+    maxes = np.maximum.reduceat(rms, bounds) if rms.size else rms
+    means = np.add.reduceat(rms.astype(np.float64), bounds) / counts if rms.size else rms
+    # Stamped at the end of each interval, like the live summaries; only the
+    # final, possibly partial, interval ends at the end of the file
+    ts = start + np.minimum((slots[bounds] + 1) * config.interval_seconds, duration)
+
+    cooldown = max(1, round(config.cooldown_seconds * sample_rate / config.hop_length))
+    events = alarm_frames(rms, config.threshold, config.release_ratio, cooldown)
+    alarms = (events * config.hop_length / sample_rate).tolist()
+    return FileResult(
+        path=str(path),
+        sample_rate=sample_rate,
+        duration=duration,
+        alarms=alarms,
+        batch=RmsBatch(
+            session_id=str(path),
+            ts=ts.tolist(),
+            rms=maxes.astype(np.float64).tolist(),
+            mean=np.asarray(means, dtype=np.float64).tolist(),
+            sample_rate=sample_rate,
+            threshold=config.threshold,
+            created_at=start,
+            alarms=[start + offset for offset in alarms],
+        ),
+    )
+
+
+def _write(store: RmsStore, batches: list[RmsBatch]) -> int:
+    """Store ``batches`` in one transaction, or file by file if that fails.
+
+    Returns how many files could not be stored.
+    """
+    try:
+        store.write_batches(batches, replace=True)
+        return 0
+    except Exception:  # noqa: BLE001 - isolate the file that broke the group
+        if len(batches) == 1:
+            logger.exception("Could not store %s", batches[0].session_id)
+            return 1
+    return sum(_write(store, [batch]) for batch in batches)
+
+
+def run(
+    paths: Iterable[str | Path],
+    store: RmsStore,
+    config: AnalysisConfig,
+    workers: int | None = None,
+    write_every: int = 32,
+) -> dict[str, float]:
+    """Analyse ``paths`` in a process pool and store the results.
+
+    Returns throughput statistics for the whole run.
+    """
+    files = list(find_audio_files(paths))
+    started = time.perf_counter()
+    done = failed = alarms = 0
+    audio_seconds = 0.0
+    pending: list[RmsBatch] = []
+
+    raw_rates = raw_sample_rates(store) if any(p.suffix.lower() == RAW_PCM_EXTENSION for p in files) else {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for path in files:
+            rate = None
+            if path.suffix.lower() == RAW_PCM_EXTENSION:
+                rate = raw_rates.get(path.stem)
+                if rate is None:
+                    failed += 1
+                    logger.warning("Skipping %s: no stored session gives its sample rate", path)
+                    continue
+            futures[pool.submit(analyse_file, path, config, rate)] = path
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exc:  # noqa: BLE001 - one bad file must not stop the run
+                failed += 1
+                logger.warning("Skipping %s: %s", futures[future], exc)
+                continue
+            done += 1
+            audio_seconds += result.duration
+            alarms += len(result.alarms)
+            logger.debug("%s: %.1f s, %d alarms", result.path, result.duration, len(result.alarms))
+            pending.append(result.batch)
+            if len(pending) >= write_every:
+                stored_failed = _write(store, pending)
+                done -= stored_failed
+                failed += stored_failed
+                pending.clear()
+    if pending:
+        stored_failed = _write(store, pending)
+        done -= stored_failed
+        failed += stored_failed
+
+    elapsed = time.perf_counter() - started
+    return {
+        "files": done,
+        "failed": failed,
+        "alarms": alarms,
+        "audio_hours": audio_seconds / 3600,
+        "seconds": elapsed,
+        "files_per_second": done / elapsed if elapsed else 0.0,
+        "audio_hours_per_second": audio_seconds / 3600 / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = AnalysisConfig()
+    parser = argparse.ArgumentParser(description="Re-run RMS/alarm analysis over recorded audio files")
+    parser.add_argument("paths", nargs="+", help="audio files or directories to scan recursively")
+    parser.add_argument("--db", default="rms.sqlite3", help="SQLite database path")
+    parser.add_argument("--threshold", type=float, default=defaults.threshold)
+    parser.add_argument("--frame-length", type=int, default=defaults.frame_length)
+    parser.add_argument("--hop-length", type=int, default=defaults.hop_length)
+    parser.add_argument("--interval", type=float, default=defaults.interval_seconds, help="seconds per stored row")
+    parser.add_argument("--cache", help="feature cache directory (reused across runs)")
+    parser.add_argument("--cache-bytes", type=int, default=defaults.cache_bytes, help="feature cache budget")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    config = AnalysisConfig(
+        threshold=args.threshold,
+        frame_length=args.frame_length,
+        hop_length=args.hop_length,
+        interval_seconds=args.interval,
+        cache_dir=args.cache,
+        cache_bytes=args.cache_bytes,
+    )
+    store = RmsStore(args.db)
+    try:
+        stats = run(args.paths, store, config, workers=args.workers)
+    finally:
+        store.close()
+    logger.info(
+        "%d files (%d failed), %.2f audio hours, %d alarms in %.1f s: %.1f files/s, %.2f audio-hours/s",
+        stats["files"],
+        stats["failed"],
+        stats["audio_hours"],
+        stats["alarms"],
+        stats["seconds"],
+        stats["files_per_second"],
+        stats["audio_hours_per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main()
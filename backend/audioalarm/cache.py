@@ -0,0 +1,161 @@
+"""Content-addressed on-disk cache for feature arrays.
+
+Entries are keyed by a hash of the audio file's bytes plus the feature name
+and its parameters, so renaming or copying a recording still hits the cache
+while any parameter change (or a bump of :data:`CACHE_VERSION`) misses it
+and the stale entry simply ages out. Arrays are stored as ``.npy`` files and
+loaded memory-mapped, so a hit costs a page-cache read rather than a decode.
+
+A small SQLite index next to the arrays records entry sizes and last use
+for LRU eviction under ``max_bytes``, and memoises file hashes by path, size
+and mtime so unchanged files are not re-read. The index runs in WAL mode,
+so batch workers in separate processes can share one cache directory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+import numpy as np
+
+from .store import connect
+
+# Bump when the way cached features are computed changes
+CACHE_VERSION = 1
+
+HASH_BLOCK_BYTES = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def hash_file(path: str | Path) -> str:
+    """BLAKE2b digest of a file's contents."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def entry_key(content_digest: str, feature: str, params: Mapping[str, Any]) -> str:
+    """Cache key for ``feature`` computed with ``params`` on the given content."""
+    spec = json.dumps(
+        {"version": CACHE_VERSION, "feature": feature, "params": dict(params)}, sort_keys=True, default=str
+    )
+    return f"{content_digest}-{hashlib.blake2b(spec.encode(), digest_size=10).hexdigest()}"
+
+
+class FeatureCache:
+    """LRU cache of ``.npy`` feature arrays under a byte budget."""
+
+    def __init__(self, root: str | Path, max_bytes: int = 1 << 30) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._conn = connect(self.root / "index.sqlite3")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def content_hash(self, path: str | Path) -> str:
+        """Hash of ``path``'s contents, reused while its size and mtime are unchanged."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return row[0]
+        digest = hash_file(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, digest),
+            )
+        return digest
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Memory-mapped array for ``key``, or None on a miss."""
+        try:
+            array = np.load(self._path(key), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        with self._lock:
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """Store ``array`` under ``key`` and evict least recently used entries over budget."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write then rename so readers in other processes never see a partial file
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, bytes, last_used) VALUES (?, ?, ?)",
+                (key, path.stat().st_size, time.time()),
+            )
+        self.evict()
+
+    def get_or_compute(
+        self, path: str | Path, feature: str, params: Mapping[str, Any], compute: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        """Cached ``feature`` of the file at ``path``, computing and storing it on a miss."""
+        key = entry_key(self.content_hash(path), feature, params)
+        array = self.get(key)
+        if array is None:
+            array = compute()
+            self.put(key, array)
+        return array
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()
+        return int(total)
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        removed = 0
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            for key, size in self._conn.execute("SELECT key, bytes FROM entries ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._path(key).unlink(missing_ok=True)
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+        return removed
+
+    def _path(self, key: str) -> Path:
+        # Two-character fan-out keeps directories small on large archives
+        return self.root / key[:2] / f"{key}.npy"
@@ -0,0 +1,18 @@
+"""Audio feature extraction for streamed and recorded PCM."""
+
+from .alarm import alarm_frames
+from .kernels import frame_count, sliding_rms
+from .service import FeatureService, RmsFrames
+from .spectral import FEATURES, FeatureExtractor
+from .streaming import StreamingRms
+
+__all__ = [
+    "FEATURES",
+    "FeatureExtractor",
+    "FeatureService",
+    "RmsFrames",
+    "StreamingRms",
+    "alarm_frames",
+    "frame_count",
+    "sliding_rms",
+]
@@ -0,0 +1,42 @@
+"""Threshold alarm over a whole RMS series.
+
+Same rules as ``RmsProcessor.checkAlarm`` in the browser's AudioWorklet
+(``nextjs/public/worklets/rms-processor.js``): the alarm becomes active when a
+frame exceeds ``threshold``, stays active until a frame drops below
+``threshold * release_ratio``, and fires at most once per ``cooldown``
+frames while active. The hysteresis state is resolved with a vectorised
+forward fill, so only the alarm events themselves are visited in Python.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def alarm_frames(
+    rms: np.ndarray,
+    threshold: float,
+    release_ratio: float = 0.8,
+    cooldown: int = 1,
+) -> np.ndarray:
+    """Indices of the frames at which the alarm fires."""
+    rms = np.asarray(rms)
+    if rms.size == 0:
+        return np.empty(0, dtype=np.intp)
+    above = rms > threshold
+    below = rms < threshold * release_ratio
+    # Each frame either sets (above), clears (below) or keeps the state;
+    # carry the last deciding frame forward
+    decided = above | below
+    last = np.where(decided, np.arange(rms.size), -1)
+    np.maximum.accumulate(last, out=last)
+    active = np.where(last >= 0, above[np.maximum(last, 0)], False)
+
+    candidates = np.flatnonzero(active)
+    events: list[int] = []
+    i = 0
+    while i < candidates.size:
+        frame = int(candidates[i])
+        events.append(frame)
+        i = int(np.searchsorted(candidates, frame + max(cooldown, 1), side="left"))
+    return np.asarray(events, dtype=np.intp)
@@ -0,0 +1,87 @@
+"""O(n) frame RMS from a cumulative sum of squares.
+
+``librosa.feature.rms`` frames the signal and averages every window, which
+costs ``O(n * frame_length / hop_length)`` and materialises a padded copy of
+the signal. Here each frame's sum of squares is the difference of two prefix
+sums, so the cost is linear in the number of samples whatever the hop.
+
+Prefix sums lose precision as they grow (a quiet frame late in a loud
+recording would be the small difference of two huge numbers), so the signal
+is processed in chunks of about ``chunk_size`` samples and every chunk
+restarts its prefix sum from zero in float64. Scratch buffers are allocated
+once per call and reused across chunks; the only allocation that scales
+with the input is the output array.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def frame_count(n_samples: int, frame_length: int, hop_length: int, center: bool = True) -> int:
+    """Number of frames ``librosa.feature.rms`` returns for ``n_samples``."""
+    padded = n_samples + (2 * (frame_length // 2) if center else 0)
+    if padded < frame_length:
+        return 0
+    return 1 + (padded - frame_length) // hop_length
+
+
+def sliding_rms(
+    y: np.ndarray,
+    frame_length: int = 2048,
+    hop_length: int = 512,
+    center: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dtype: type[np.floating] = np.float32,
+) -> np.ndarray:
+    """Frame RMS of mono ``y`` matching ``librosa.feature.rms(...)[0]``.
+
+    ``center=True`` zero-pads ``frame_length // 2`` samples on each side
+    (librosa's ``pad_mode="constant"``). With the default ``chunk_size`` the
+    result agrees with librosa to about 1e-5 relative, even for frames 80 dB
+    quieter than the rest of the chunk; smaller chunks are more precise.
+    """
+    if frame_length <= 0 or hop_length <= 0:
+        raise ValueError("frame_length and hop_length must be positive")
+    y = np.asarray(y).ravel()
+    pad = frame_length // 2 if center else 0
+    count = frame_count(y.size, frame_length, hop_length, center)
+    out = np.empty(count, dtype=dtype)
+    if count == 0:
+        return out
+
+    # Whole frames per chunk, at least one
+    per_chunk = max(1, (chunk_size - frame_length) // hop_length + 1)
+    span = (per_chunk - 1) * hop_length + frame_length
+    squares = np.empty(span, dtype=np.float64)
+    csum = np.zeros(span + 1, dtype=np.float64)
+    sums = np.empty(per_chunk, dtype=np.float64)
+
+    for first in range(0, count, per_chunk):
+        frames = min(per_chunk, count - first)
+        length = (frames - 1) * hop_length + frame_length
+        # Chunk bounds in signal coordinates; may reach into the padding
+        start = first * hop_length - pad
+        lo = max(start, 0)
+        hi = min(start + length, y.size)
+
+        sq = squares[:length]
+        sq[: lo - start] = 0.0
+        np.square(y[lo:hi], out=sq[lo - start : hi - start], dtype=np.float64)
+        sq[hi - start :] = 0.0
+        np.cumsum(sq, out=csum[1 : length + 1])
+
+        chunk_sums = sums[:frames]
+        np.subtract(
+            csum[frame_length : length + 1 : hop_length],
+            csum[0 : length - frame_length + 1 : hop_length],
+            out=chunk_sums,
+        )
+        # Cancellation can leave tiny negatives for silent frames
+        np.maximum(chunk_sums, 0.0, out=chunk_sums)
+        chunk_sums /= frame_length
+        np.sqrt(chunk_sums, out=chunk_sums)
+        out[first : first + frames] = chunk_sums
+    return out
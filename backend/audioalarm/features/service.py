@@ -0,0 +1,88 @@
+"""Per-session streaming feature state for PCM pushed by clients.
+
+Each session owns one :class:`StreamingRms`; blocks for the same session are
+processed in arrival order under that session's lock, while different
+sessions run in parallel. Sessions idle for longer than ``idle_timeout``
+seconds are dropped on the next request.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .streaming import StreamingRms
+
+
+@dataclass(frozen=True)
+class RmsFrames:
+    """RMS frames produced by one block.
+
+    ``frame`` is the index of the first returned frame in the session;
+    frame ``i`` starts at sample ``i * hop_length`` (before centring).
+    """
+
+    session_id: str
+    frame: int
+    hop_length: int
+    rms: list[float]
+
+
+@dataclass
+class _Session:
+    stream: StreamingRms
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+class FeatureService:
+    """Registry of streaming RMS state keyed by session id."""
+
+    def __init__(
+        self,
+        frame_length: int = 2048,
+        hop_length: int = 512,
+        center: bool = True,
+        idle_timeout: float = 300.0,
+    ) -> None:
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.center = center
+        self.idle_timeout = idle_timeout
+        self._sessions: dict[str, _Session] = {}
+        self._lock = threading.Lock()
+
+    def process(self, session_id: str, samples: np.ndarray, final: bool = False) -> RmsFrames:
+        """Feed one block for ``session_id``; ``final`` flushes and closes the session."""
+        if not session_id:
+            raise ValueError("session_id is required")
+        session = self._session(session_id)
+        with session.lock:
+            first = session.stream.frames_emitted
+            rms = session.stream.process(samples)
+            if final:
+                rms = np.concatenate((rms, session.stream.finish()))
+            session.last_seen = time.monotonic()
+        if final:
+            with self._lock:
+                if self._sessions.get(session_id) is session:
+                    del self._sessions[session_id]
+        return RmsFrames(session_id, first, self.hop_length, rms.tolist())
+
+    def active_sessions(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _session(self, session_id: str) -> _Session:
+        now = time.monotonic()
+        with self._lock:
+            for sid in [sid for sid, s in self._sessions.items() if now - s.last_seen > self.idle_timeout]:
+                del self._sessions[sid]
+            session = self._sessions.get(session_id)
+            if session is None:
+                stream = StreamingRms(self.frame_length, self.hop_length, center=self.center)
+                session = self._sessions[session_id] = _Session(stream)
+            return session
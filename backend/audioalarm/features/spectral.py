@@ -0,0 +1,120 @@
+"""Several frame features from one pass over the signal.
+
+Calling ``librosa.feature.spectral_centroid``, ``spectral_bandwidth`` and
+``spectral_rolloff`` separately computes the same STFT three times.
+:class:`FeatureExtractor` takes a declarative list of features, computes the
+magnitude spectrogram once per block of frames and derives every spectral
+feature from it with a few matrix products; time-domain features (RMS, zero
+crossing rate) come from prefix sums and never touch the STFT at all.
+
+Frames line up with librosa's defaults (``center=True``, constant padding,
+periodic Hann window), and each feature matches the corresponding librosa
+function called with the same ``n_fft``/``hop_length``. The spectrum is
+computed in float64 where librosa uses float32, so a roll-off frame whose
+cumulative energy sits right at ``roll_percent`` can land one bin apart.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .kernels import frame_count, sliding_rms
+
+SPECTRAL_FEATURES = frozenset({"spectral_centroid", "spectral_bandwidth", "spectral_rolloff", "band_energy"})
+TEMPORAL_FEATURES = frozenset({"rms", "zero_crossing_rate"})
+FEATURES = SPECTRAL_FEATURES | TEMPORAL_FEATURES
+
+# librosa.zero_crossings treats |y| <= threshold as zero (and zero as positive)
+ZERO_CROSSING_THRESHOLD = 1e-10
+
+
+@dataclass(frozen=True)
+class FeatureExtractor:
+    """Declarative multi-feature extraction.
+
+    ``bands`` are ``(low_hz, high_hz)`` ranges for ``band_energy``, which is
+    the summed power spectrum of the bins in ``[low, high)``, one row per
+    band. ``block_frames`` bounds how many STFT frames are held at once.
+    """
+
+    sample_rate: int
+    features: Sequence[str] = ("rms",)
+    n_fft: int = 2048
+    hop_length: int = 512
+    roll_percent: float = 0.85
+    bands: Sequence[tuple[float, float]] = ((0.0, 300.0), (300.0, 2000.0), (2000.0, 8000.0))
+    block_frames: int = 1024
+    dtype: type[np.floating] = np.float32
+    _window: np.ndarray = field(init=False, repr=False, compare=False)
+    _freqs: np.ndarray = field(init=False, repr=False, compare=False)
+    _band_matrix: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        unknown = set(self.features) - FEATURES
+        if unknown:
+            raise ValueError(f"unknown features: {', '.join(sorted(unknown))}")
+        n = np.arange(self.n_fft)
+        object.__setattr__(self, "_window", 0.5 - 0.5 * np.cos(2 * np.pi * n / self.n_fft))
+        freqs = np.fft.rfftfreq(self.n_fft, 1.0 / self.sample_rate)
+        object.__setattr__(self, "_freqs", freqs)
+        matrix = np.array([(freqs >= low) & (freqs < high) for low, high in self.bands], dtype=np.float64)
+        object.__setattr__(self, "_band_matrix", matrix.reshape(len(self.bands), freqs.size))
+
+    def extract(self, y: np.ndarray) -> dict[str, np.ndarray]:
+        """Requested features of mono ``y``; 1-D per feature, ``(n_bands, n_frames)`` for band energy."""
+        y = np.asarray(y, dtype=np.float32).ravel()
+        wanted = set(self.features)
+        out: dict[str, np.ndarray] = {}
+        if "rms" in wanted:
+            out["rms"] = sliding_rms(y, self.n_fft, self.hop_length, dtype=self.dtype)
+        if "zero_crossing_rate" in wanted:
+            out["zero_crossing_rate"] = self._zero_crossing_rate(y)
+        if wanted & SPECTRAL_FEATURES:
+            out.update(self._spectral(y, wanted & SPECTRAL_FEATURES))
+        return {name: out[name] for name in self.features}
+
+    def _zero_crossing_rate(self, y: np.ndarray) -> np.ndarray:
+        # librosa edge-pads for zcr; count crossings per sample once and sum
+        # each frame's interior crossings from a prefix sum
+        pad = self.n_fft // 2
+        padded = np.pad(y, pad, mode="edge") if y.size else np.zeros(2 * pad, dtype=y.dtype)
+        negative = np.signbit(np.where(np.abs(padded) <= ZERO_CROSSING_THRESHOLD, 0, padded))
+        csum = np.zeros(padded.size, dtype=np.int64)
+        np.cumsum(negative[1:] != negative[:-1], out=csum[1:])
+        count = frame_count(y.size, self.n_fft, self.hop_length)
+        starts = np.arange(count) * self.hop_length
+        return ((csum[starts + self.n_fft - 1] - csum[starts]) / self.n_fft).astype(self.dtype)
+
+    def _spectral(self, y: np.ndarray, wanted: set[str]) -> dict[str, np.ndarray]:
+        pad = self.n_fft // 2
+        padded = np.pad(y, pad)
+        count = frame_count(y.size, self.n_fft, self.hop_length)
+        frames = sliding_window_view(padded, self.n_fft)[:: self.hop_length][:count]
+
+        results = {name: np.empty(count, dtype=self.dtype) for name in wanted - {"band_energy"}}
+        if "band_energy" in wanted:
+            results["band_energy"] = np.empty((len(self.bands), count), dtype=self.dtype)
+        freqs = self._freqs
+        for first in range(0, count, self.block_frames):
+            block = slice(first, min(count, first + self.block_frames))
+            # (frames, bins) magnitude spectrogram, computed once per block
+            mag = np.abs(np.fft.rfft(frames[block] * self._window, axis=-1))
+            total = mag.sum(axis=-1)
+            safe_total = np.where(total > np.finfo(np.float64).tiny, total, 1.0)
+            centroid = (mag @ freqs) / safe_total
+            if "spectral_centroid" in wanted:
+                results["spectral_centroid"][block] = centroid
+            if "spectral_bandwidth" in wanted:
+                spread = (mag @ (freqs**2)) / safe_total - centroid**2
+                results["spectral_bandwidth"][block] = np.sqrt(np.maximum(spread, 0.0))
+            if "spectral_rolloff" in wanted:
+                cumulative = np.cumsum(mag, axis=-1)
+                reached = cumulative >= self.roll_percent * cumulative[:, -1:]
+                results["spectral_rolloff"][block] = freqs[np.argmax(reached, axis=-1)]
+            if "band_energy" in wanted:
+                results["band_energy"][:, block] = self._band_matrix @ np.square(mag).T
+        return results
@@ -0,0 +1,94 @@
+"""Block-streaming RMS with ``librosa.feature.rms`` semantics.
+
+Clients send PCM in arbitrary block sizes. :class:`StreamingRms` keeps only
+the samples that still belong to an incomplete frame, so every frame is
+computed exactly once, and each block's frames come from one prefix sum of
+its squares, so the cost per block is linear whatever the hop length.
+
+Concatenating the output of every :meth:`StreamingRms.process` call plus
+:meth:`StreamingRms.finish` gives the same frames as
+``librosa.feature.rms(y=all_samples, frame_length=..., hop_length=...,
+center=..., pad_mode="constant")[0]``.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class StreamingRms:
+    """Incremental frame RMS over a mono PCM stream.
+
+    Parameters mirror ``librosa.feature.rms``. With ``center=True`` the
+    stream is treated as zero-padded by ``frame_length // 2`` samples on both
+    sides (librosa's default ``pad_mode="constant"``); the trailing padding
+    is applied by :meth:`finish`.
+    """
+
+    def __init__(
+        self,
+        frame_length: int = 2048,
+        hop_length: int = 512,
+        center: bool = True,
+        dtype: type[np.floating] = np.float32,
+    ) -> None:
+        if frame_length <= 0 or hop_length <= 0:
+            raise ValueError("frame_length and hop_length must be positive")
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.center = center
+        self.dtype = dtype
+        self.frames_emitted = 0
+        self._finished = False
+        # Samples still to drop before the next frame starts (hop > frame)
+        self._skip = 0
+        # Squared samples not yet consumed by a complete frame
+        pad = frame_length // 2 if center else 0
+        self._pending = np.zeros(pad, dtype=np.float64)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Feed one block of samples and return the RMS of every frame it completes."""
+        if self._finished:
+            raise RuntimeError("stream already finished")
+        squares = np.square(np.asarray(block).ravel(), dtype=np.float64)
+        if self._skip:
+            dropped = min(self._skip, squares.size)
+            squares = squares[dropped:]
+            self._skip -= dropped
+        return self._emit(np.concatenate((self._pending, squares)) if self._pending.size else squares)
+
+    def finish(self) -> np.ndarray:
+        """Flush trailing frames (including end padding when ``center=True``)."""
+        if self._finished:
+            return np.empty(0, dtype=self.dtype)
+        self._finished = True
+        if not self.center:
+            return np.empty(0, dtype=self.dtype)
+        tail = np.zeros(self.frame_length // 2, dtype=np.float64)
+        return self._emit(np.concatenate((self._pending, tail)))
+
+    def _emit(self, squares: np.ndarray) -> np.ndarray:
+        if squares.size < self.frame_length:
+            count = 0
+        else:
+            count = 1 + (squares.size - self.frame_length) // self.hop_length
+        if count == 0:
+            self._pending = squares
+            return np.empty(0, dtype=self.dtype)
+        last_start = (count - 1) * self.hop_length
+        csum = np.empty(squares.size + 1, dtype=np.float64)
+        csum[0] = 0.0
+        np.cumsum(squares, out=csum[1:])
+        sums = np.subtract(
+            csum[self.frame_length : last_start + self.frame_length + 1 : self.hop_length],
+            csum[: last_start + 1 : self.hop_length],
+        )
+        # Cancellation can leave tiny negatives for silent frames
+        np.maximum(sums, 0.0, out=sums)
+        rms = np.sqrt(sums / self.frame_length).astype(self.dtype, copy=False)
+        # Keep everything from the next frame's start onwards
+        next_start = count * self.hop_length
+        self._pending = squares[next_start:].copy()
+        self._skip = max(0, next_start - squares.size)
+        self.frames_emitted += count
+        return rms
@@ -0,0 +1,258 @@
+"""Local HTTP ingest endpoint for RMS batches.
+
+The browser POSTs JSON batches to ``/ingest`` (proxied by Next.js from
+``/api/ingest``)::
+
+    {"session_id": "...", "sample_rate": 48000, "threshold": 0.05,
+     "ts": [...], "rms": [...], "mean": [...]}
+
+Arrays are columnar so a batch parses into three flat lists. A body sent
+as ``application/x-audioalarm-rms`` is instead one or more binary frames
+(:mod:`audioalarm.wire`), which is what the page uses. Each request is
+written to SQLite in one transaction.
+
+Stored data is read back with ``GET /sessions`` and
+``GET /range?session_id=...&start=...&end=...&width=...``, which returns
+the coarsest rollup that still fills ``width`` points.
+
+Clients that cannot afford the analysis themselves POST raw little-endian
+float32 mono PCM to ``/pcm?session_id=...`` (add ``&final=1`` on the last
+block) and get back the RMS frames that block completed, computed with
+``librosa.feature.rms`` semantics (see :mod:`audioalarm.features`).
+
+Recorded session audio is uploaded with
+``POST /audio?session_id=...&format=...&offset=...``: the body is written
+at byte ``offset`` of ``<audio-dir>/<session_id>.<ext>``, so a retried
+upload overwrites the same bytes instead of appending them twice.
+
+Run with ``python -m audioalarm.ingest --db rms.sqlite3``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+from dataclasses import asdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .features import FeatureService
+from .store import RmsBatch, RmsStore
+from .wire import CONTENT_TYPE, decode_batches
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Recorder formats (nextjs/src/workers/recorder.worker.ts) and their file extensions
+AUDIO_EXTENSIONS = {"ogg-opus": ".opus", "f32le": ".f32"}
+UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def audio_file_stem(session_id: str) -> str:
+    """File name (without extension) that session audio is uploaded under."""
+    return UNSAFE_FILENAME.sub("_", session_id).lstrip(".")
+
+
+def parse_batch(payload: dict[str, Any]) -> RmsBatch:
+    """Validate a decoded JSON payload and turn it into an RmsBatch."""
+    try:
+        ts = [float(t) for t in payload["ts"]]
+        rms = [float(r) for r in payload["rms"]]
+        mean_values = payload.get("mean")
+        if mean_values is None:
+            mean: list[float | None] = [None] * len(ts)
+        else:
+            mean = [None if m is None else float(m) for m in mean_values]
+        return RmsBatch(
+            session_id=str(payload["session_id"]),
+            ts=ts,
+            rms=rms,
+            mean=mean,
+            sample_rate=int(payload["sample_rate"]) if payload.get("sample_rate") is not None else None,
+            threshold=float(payload["threshold"]) if payload.get("threshold") is not None else None,
+        )
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f"malformed batch: {exc}") from exc
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    server: "IngestServer"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        url = urlsplit(self.path)
+        if url.path not in ("/ingest", "/pcm", "/audio"):
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        length = self._content_length(allow_empty=url.path == "/pcm")
+        if length is None:
+            return
+        body = self.rfile.read(length)
+        if url.path == "/pcm":
+            self._handle_pcm(parse_qs(url.query), body)
+            return
+        if url.path == "/audio":
+            self._handle_audio(parse_qs(url.query), body)
+            return
+        try:
+            if self.headers.get_content_type() == CONTENT_TYPE:
+                batches = decode_batches(body)
+            else:
+                batches = [parse_batch(json.loads(body))]
+        except ValueError as exc:  # JSONDecodeError and UnicodeDecodeError are ValueErrors
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        try:
+            written = self.server.store.write_batches(batches)
+        except sqlite3.IntegrityError as exc:  # e.g. repeated timestamps within one batch
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        self._reply(HTTPStatus.OK, {"written": written})
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._reply(HTTPStatus.OK, {"status": "ok"})
+        elif url.path == "/sessions":
+            self._reply(HTTPStatus.OK, {"sessions": self.server.store.sessions()})
+        elif url.path == "/range":
+            query = parse_qs(url.query)
+            try:
+                session_id = query["session_id"][0]
+                start = float(query["start"][0])
+                end = float(query["end"][0])
+                width = int(query.get("width", ["1000"])[0])
+            except (KeyError, ValueError) as exc:
+                self._reply(HTTPStatus.BAD_REQUEST, {"error": f"bad range query: {exc}"})
+                return
+            try:
+                result = self.server.store.query_range(session_id, start, end, width)
+            except ValueError as exc:  # non-finite bounds
+                self._reply(HTTPStatus.BAD_REQUEST, {"error": f"bad range query: {exc}"})
+                return
+            self._reply(HTTPStatus.OK, asdict(result))
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def _content_length(self, allow_empty: bool) -> int | None:
+        """Validated Content-Length, or None after replying with the error.
+
+        The body is never read before this check, so an oversized or
+        unframed request is refused without buffering it.
+        """
+        header = self.headers.get("Content-Length")
+        if header is None:
+            self._reply(HTTPStatus.LENGTH_REQUIRED, {"error": "Content-Length is required"})
+            return None
+        header = header.strip()
+        length = int(header) if header.isascii() and header.isdigit() else -1
+        if length < 0 or (length == 0 and not allow_empty):
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": f"bad Content-Length: {header!r}"})
+            return None
+        if length > MAX_BODY_BYTES:
+            self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"body over {MAX_BODY_BYTES} bytes"})
+            return None
+        return length
+
+    def _handle_pcm(self, query: dict[str, list[str]], body: bytes) -> None:
+        session_id = query.get("session_id", [""])[0]
+        final = query.get("final", ["0"])[0] in ("1", "true")
+        if not session_id or len(body) % 4:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": "expected session_id and float32 PCM"})
+            return
+        samples = np.frombuffer(body, dtype="<f4")
+        try:
+            frames = self.server.features.process(session_id, samples, final=final)
+        except RuntimeError as exc:
+            self._reply(HTTPStatus.CONFLICT, {"error": str(exc)})
+            return
+        self._reply(HTTPStatus.OK, asdict(frames))
+
+    def _handle_audio(self, query: dict[str, list[str]], body: bytes) -> None:
+        if self.server.audio_dir is None:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "audio uploads are disabled"})
+            return
+        try:
+            session_id = query["session_id"][0]
+            extension = AUDIO_EXTENSIONS[query["format"][0]]
+            offset = int(query["offset"][0])
+        except (KeyError, ValueError) as exc:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": f"bad audio query: {exc}"})
+            return
+        name = audio_file_stem(session_id)
+        if not name or offset < 0:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": "bad session_id or offset"})
+            return
+        path = self.server.audio_dir / f"{name}{extension}"
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, body, offset)
+        finally:
+            os.close(fd)
+        self._reply(HTTPStatus.OK, {"written": len(body)})
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _reply(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        store: RmsStore,
+        features: FeatureService | None = None,
+        audio_dir: str | Path | None = None,
+    ) -> None:
+        super().__init__(address, IngestHandler)
+        self.store = store
+        self.features = features or FeatureService()
+        self.audio_dir = Path(audio_dir) if audio_dir is not None else None
+        if self.audio_dir is not None:
+            self.audio_dir.mkdir(parents=True, exist_ok=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="RMS ingest server")
+    parser.add_argument("--db", default="rms.sqlite3", help="SQLite database path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--frame-length", type=int, default=2048, help="RMS frame length for /pcm")
+    parser.add_argument("--hop-length", type=int, default=512, help="RMS hop length for /pcm")
+    parser.add_argument("--audio-dir", default="audio", help="directory for uploaded session audio")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    store = RmsStore(args.db)
+    features = FeatureService(frame_length=args.frame_length, hop_length=args.hop_length)
+    server = IngestServer((args.host, args.port), store, features, audio_dir=args.audio_dir)
+    logger.info("Ingesting into %s on http://%s:%d", args.db, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""SQLite persistence for RMS time series.
+
+Samples are keyed by ``(session_id, ts)`` in a WITHOUT ROWID table, so rows
+are stored clustered by session and time and range scans read contiguous
+pages. Writes arrive in batches and each batch is one ``executemany`` call
+inside one transaction; the sqlite3 statement cache keeps the INSERTs
+prepared across batches. WAL mode lets readers run alongside the writer.
+
+Every batch also updates rollup tables at 1 s, 1 min and 1 h resolution
+(min/max of ``rms``, sum of ``mean`` falling back to ``rms`` as raw ranges
+average it, count, and how many samples were above the session threshold),
+so long ranges are answered from a few thousand pre-aggregated rows instead
+of millions of raw samples. Alarm events found by offline analysis are kept
+alongside, keyed the same way.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Sequence
+
+# Rollup resolutions in seconds, finest first
+ROLLUP_RESOLUTIONS = (1, 60, 3600)
+
+# PRAGMA user_version; 1: rollup sums are of COALESCE(mean, rms), not rms
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    sample_rate INTEGER,
+    threshold REAL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rms_samples (
+    session_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    rms REAL NOT NULL,
+    mean REAL,
+    PRIMARY KEY (session_id, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS alarm_events (
+    session_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    PRIMARY KEY (session_id, ts)
+) WITHOUT ROWID;
+""" + "".join(
+    f"""
+CREATE TABLE IF NOT EXISTS rms_rollup_{resolution}s (
+    session_id TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    sum REAL NOT NULL,
+    count INTEGER NOT NULL,
+    above INTEGER NOT NULL,
+    PRIMARY KEY (session_id, bucket)
+) WITHOUT ROWID;
+"""
+    for resolution in ROLLUP_RESOLUTIONS
+)
+
+INSERT_SAMPLE = "INSERT INTO rms_samples (session_id, ts, rms, mean) VALUES (?, ?, ?, ?)"
+INSERT_ALARM = "INSERT OR IGNORE INTO alarm_events (session_id, ts) VALUES (?, ?)"
+SELECT_ALARMS = "SELECT ts FROM alarm_events WHERE session_id = ? AND ts >= ? AND ts < ? ORDER BY ts"
+EXISTING_SAMPLES = "SELECT ts FROM rms_samples WHERE session_id = ? AND ts BETWEEN ? AND ?"
+UPSERT_SESSION = (
+    "INSERT INTO sessions (session_id, created_at, sample_rate, threshold) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(session_id) DO UPDATE SET "
+    "sample_rate = COALESCE(excluded.sample_rate, sample_rate), "
+    "threshold = COALESCE(excluded.threshold, threshold) "
+    "RETURNING threshold"
+)
+UPSERT_ROLLUP = {
+    resolution: (
+        f"INSERT INTO rms_rollup_{resolution}s (session_id, bucket, min, max, sum, count, above) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(session_id, bucket) DO UPDATE SET "
+        "min = MIN(min, excluded.min), max = MAX(max, excluded.max), "
+        "sum = sum + excluded.sum, count = count + excluded.count, above = above + excluded.above"
+    )
+    for resolution in ROLLUP_RESOLUTIONS
+}
+DELETE_SESSION = ["DELETE FROM rms_samples WHERE session_id = ?", "DELETE FROM alarm_events WHERE session_id = ?"] + [
+    f"DELETE FROM rms_rollup_{resolution}s WHERE session_id = ?" for resolution in ROLLUP_RESOLUTIONS
+]
+SELECT_RAW = (
+    "SELECT ts, rms, rms, COALESCE(mean, rms), 1, 0 FROM rms_samples "
+    "WHERE session_id = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?"
+)
+# Raw samples merged into `width` equal slots when there are too many to
+# return one by one
+SELECT_RAW_BUCKETED = (
+    "SELECT :start + CAST((ts - :start) / :step AS INTEGER) * :step AS slot, MIN(rms), MAX(rms), "
+    "AVG(COALESCE(mean, rms)), COUNT(*), "
+    "COALESCE(SUM(rms > (SELECT threshold FROM sessions WHERE session_id = :session_id)), 0) "
+    "FROM rms_samples WHERE session_id = :session_id AND ts >= :start AND ts < :end "
+    "GROUP BY CAST((ts - :start) / :step AS INTEGER) ORDER BY slot"
+)
+# Rebuilds one rollup table from the raw samples (schema upgrades)
+REBUILD_ROLLUP = {
+    resolution: (
+        f"DELETE FROM rms_rollup_{resolution}s",
+        f"INSERT INTO rms_rollup_{resolution}s (session_id, bucket, min, max, sum, count, above) "
+        f"SELECT s.session_id, CAST(s.ts / {resolution} AS INTEGER) * {resolution} AS bucket, "
+        "MIN(s.rms), MAX(s.rms), SUM(COALESCE(s.mean, s.rms)), COUNT(*), "
+        "COALESCE(SUM(s.rms > t.threshold), 0) "
+        "FROM rms_samples s LEFT JOIN sessions t ON t.session_id = s.session_id "
+        "GROUP BY s.session_id, bucket",
+    )
+    for resolution in ROLLUP_RESOLUTIONS
+}
+# Rollup buckets regrouped into wider steps (a multiple of the resolution)
+# so the result stays close to the requested width
+SELECT_ROLLUP = {
+    resolution: (
+        "SELECT (bucket / :step) * :step AS slot, MIN(min), MAX(max), SUM(sum) / SUM(count), "
+        f"SUM(count), SUM(above) FROM rms_rollup_{resolution}s "
+        "WHERE session_id = :session_id AND bucket >= :start AND bucket < :end "
+        "GROUP BY slot ORDER BY slot"
+    )
+    for resolution in ROLLUP_RESOLUTIONS
+}
+
+
+@dataclass(frozen=True)
+class RmsBatch:
+    """Columnar batch of RMS samples for one session.
+
+    ``ts`` is wall-clock time in seconds since the Unix epoch.
+    ``created_at`` defaults to the time the session is first written.
+    ``alarms`` are epoch times of alarm events to store with the samples.
+    """
+
+    session_id: str
+    ts: Sequence[float]
+    rms: Sequence[float]
+    mean: Sequence[float | None]
+    sample_rate: int | None = None
+    threshold: float | None = None
+    created_at: float | None = None
+    alarms: Sequence[float] = ()
+
+    def __post_init__(self) -> None:
+        if not self.session_id:
+            raise ValueError("session_id is required")
+        if not (len(self.ts) == len(self.rms) == len(self.mean)):
+            raise ValueError("ts, rms and mean must have the same length")
+
+    def rows(self) -> Iterable[tuple[str, float, float, float | None]]:
+        session_id = self.session_id
+        return ((session_id, t, r, m) for t, r, m in zip(self.ts, self.rms, self.mean))
+
+
+@dataclass(frozen=True)
+class RangeResult:
+    """Downsampled series for a time range.
+
+    ``resolution`` is the returned bucket width in seconds (a multiple of the
+    rollup table it was read from, or a fraction of a second when raw
+    samples were bucketed), or 0 for raw samples.
+    ``ts`` is the bucket start (or sample time) in epoch seconds.
+    """
+
+    resolution: float
+    ts: list[float]
+    min: list[float]
+    max: list[float]
+    mean: list[float]
+    count: list[int]
+    above: list[int]
+
+
+def connect(path: str | Path) -> sqlite3.Connection:
+    """Open a connection tuned for batched writes with concurrent readers."""
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only fsyncs at checkpoints; a crash can lose the last
+    # batches but never corrupts the database
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def choose_resolution(start: float, end: float, width: int) -> int:
+    """Coarsest rollup resolution that still yields at least ``width`` buckets.
+
+    Returns 0 (raw samples) when even 1 s buckets cannot fill the width.
+    """
+    span = end - start
+    for resolution in reversed(ROLLUP_RESOLUTIONS):
+        if span / resolution >= width:
+            return resolution
+    return 0
+
+
+def rollup_rows(
+    session_id: str, rows: Sequence[tuple[float, float, float | None]], threshold: float | None, resolution: int
+) -> list[tuple[str, int, float, float, float, int, int]]:
+    """Aggregate ``(ts, rms, mean)`` rows into one tuple per bucket.
+
+    Min and max are of ``rms``; the sum is of ``mean`` (``rms`` where it is
+    missing), matching what raw range queries average.
+    """
+    buckets: dict[int, list[float]] = {}
+    for ts, rms, mean in rows:
+        bucket = int(ts // resolution) * resolution
+        above = 1 if threshold is not None and rms > threshold else 0
+        value = rms if mean is None else mean
+        agg = buckets.get(bucket)
+        if agg is None:
+            buckets[bucket] = [rms, rms, value, 1, above]
+        else:
+            if rms < agg[0]:
+                agg[0] = rms
+            if rms > agg[1]:
+                agg[1] = rms
+            agg[2] += value
+            agg[3] += 1
+            agg[4] += above
+    return [
+        (session_id, bucket, lo, hi, total, int(count), int(above))
+        for bucket, (lo, hi, total, count, above) in buckets.items()
+    ]
+
+
+class RmsStore:
+    """Thread-safe RMS store.
+
+    Writes share one connection serialised with a lock, which is what SQLite
+    does internally anyway, so batching is what buys throughput. Reads use a
+    per-thread connection and run concurrently under WAL; :meth:`close`
+    closes all of them.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._conn = connect(self.path)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._conn.executescript(SCHEMA)
+        self._upgrade()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+
+    def write_batch(self, batch: RmsBatch) -> int:
+        """Insert one batch in a single transaction and return the new row count."""
+        return self.write_batches([batch])
+
+    def write_batches(self, batches: Sequence[RmsBatch], replace: bool = False) -> int:
+        """Insert several batches in a single transaction.
+
+        Samples already stored (e.g. a retried upload) are skipped so rollups
+        never count a sample twice. With ``replace`` the previous samples and
+        rollups of every session in ``batches`` are deleted first, which is
+        how an offline re-analysis overwrites earlier results.
+        """
+        written = 0
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace:
+                    for session_id in {batch.session_id for batch in batches}:
+                        for statement in DELETE_SESSION:
+                            conn.execute(statement, (session_id,))
+                for batch in batches:
+                    if batch.alarms:
+                        conn.executemany(INSERT_ALARM, ((batch.session_id, ts) for ts in batch.alarms))
+                    if not batch.ts:
+                        continue
+                    created_at = batch.created_at if batch.created_at is not None else time.time()
+                    (threshold,) = conn.execute(
+                        UPSERT_SESSION, (batch.session_id, created_at, batch.sample_rate, batch.threshold)
+                    ).fetchone()
+                    existing = {
+                        row[0]
+                        for row in conn.execute(EXISTING_SAMPLES, (batch.session_id, min(batch.ts), max(batch.ts)))
+                    }
+                    rows = [row for row in batch.rows() if row[1] not in existing]
+                    if not rows:
+                        continue
+                    conn.executemany(INSERT_SAMPLE, rows)
+                    samples = [(ts, rms, mean) for _, ts, rms, mean in rows]
+                    for resolution in ROLLUP_RESOLUTIONS:
+                        conn.executemany(
+                            UPSERT_ROLLUP[resolution],
+                            rollup_rows(batch.session_id, samples, threshold, resolution),
+                        )
+                    written += len(rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return written
+
+    def count(self, session_id: str) -> int:
+        row = self._reader().execute(
+            "SELECT COUNT(*) FROM rms_samples WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return int(row[0])
+
+    def sessions(self) -> list[dict[str, object]]:
+        rows = self._reader().execute(
+            "SELECT session_id, created_at, sample_rate, threshold FROM sessions ORDER BY created_at DESC"
+        )
+        return [
+            {"session_id": sid, "created_at": created, "sample_rate": rate, "threshold": threshold}
+            for sid, created, rate, threshold in rows
+        ]
+
+    def alarms(self, session_id: str, start: float, end: float) -> list[float]:
+        """Stored alarm event times in ``[start, end)``."""
+        rows = self._reader().execute(SELECT_ALARMS, (session_id, start, end))
+        return [ts for (ts,) in rows]
+
+    def query_range(self, session_id: str, start: float, end: float, width: int) -> RangeResult:
+        """Series for ``[start, end)`` at the coarsest resolution that fills ``width`` points.
+
+        Rollup buckets are merged in SQL into steps of at least
+        ``span / width`` seconds; raw samples are returned as they are when
+        they fit and merged into ``width`` slots otherwise. Either way at
+        most about ``width`` rows come back (one more when the rollup steps
+        straddle ``start``). Raises ValueError for non-finite bounds.
+        """
+        if not (math.isfinite(start) and math.isfinite(end)):
+            raise ValueError("start and end must be finite")
+        width = max(1, width)
+        resolution = choose_resolution(start, end, width)
+        reader = self._reader()
+        step: float
+        if resolution == 0:
+            step = 0
+            rows = reader.execute(SELECT_RAW, (session_id, start, end, width + 1)).fetchall()
+            if len(rows) > width:
+                step = (end - start) / width
+                rows = reader.execute(
+                    SELECT_RAW_BUCKETED, {"session_id": session_id, "step": step, "start": start, "end": end}
+                ).fetchall()
+        else:
+            step = max(resolution, math.ceil((end - start) / width / resolution) * resolution)
+            first = int(start // step) * step
+            rows = reader.execute(
+                SELECT_ROLLUP[resolution],
+                {"session_id": session_id, "step": step, "start": first, "end": end},
+            ).fetchall()
+        columns = list(zip(*rows)) if rows else [(), (), (), (), (), ()]
+        return RangeResult(
+            resolution=step,
+            ts=[float(v) for v in columns[0]],
+            min=list(columns[1]),
+            max=list(columns[2]),
+            mean=list(columns[3]),
+            count=list(columns[4]),
+            above=list(columns[5]),
+        )
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def _upgrade(self) -> None:
+        """Bring an existing database up to :data:`SCHEMA_VERSION`."""
+        with self._lock:
+            conn = self._conn
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version >= SCHEMA_VERSION:
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if version < 1:
+                    for resolution in ROLLUP_RESOLUTIONS:
+                        for statement in REBUILD_ROLLUP[resolution]:
+                            conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
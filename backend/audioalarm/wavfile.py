@@ -0,0 +1,168 @@
+"""Memory-mapped reader for uncompressed WAV files.
+
+The file is mapped rather than read, so opening a multi-gigabyte recording
+costs nothing and samples are paged in by the kernel as they are touched.
+:attr:`WavReader.samples` is a zero-copy ``(frames, channels)`` view in the
+file's own sample type and :meth:`WavReader.frame_view` frames one channel
+with strides only. :meth:`WavReader.blocks` converts to float one block at a
+time and tells the kernel to drop the pages it has passed, so resident
+memory stays at about one block however long the file is.
+
+Supports PCM (8/16/24/32-bit) and IEEE float (32/64-bit), plain and
+``WAVE_FORMAT_EXTENSIBLE`` headers, and RF64 for files over 4 GiB.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _read_chunks(f: BinaryIO) -> tuple[dict[bytes, tuple[int, int]], bool]:
+    """Offsets and sizes of the top-level chunks, and whether the file is RF64."""
+    riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+    if riff not in (b"RIFF", b"RF64") or wave != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    file_size = f.seek(0, 2)
+    f.seek(12)
+    chunks: dict[bytes, tuple[int, int]] = {}
+    rf64_data_size: int | None = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, size = struct.unpack("<4sI", header)
+        offset = f.tell()
+        if chunk_id == b"ds64":
+            # RF64 stores the real 64-bit data size here
+            _, rf64_data_size = struct.unpack("<QQ", f.read(16))
+        if chunk_id == b"data" and size == 0xFFFFFFFF and rf64_data_size is not None:
+            size = rf64_data_size
+        # Streaming writers may leave the data size unset; it runs to EOF
+        size = min(size, file_size - offset)
+        chunks[chunk_id] = (offset, size)
+        f.seek(offset + size + (size & 1))
+    return chunks, riff == b"RF64"
+
+
+class WavReader:
+    """Zero-copy access to the samples of an uncompressed WAV file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            chunks, self.rf64 = _read_chunks(f)
+            if b"fmt " not in chunks or b"data" not in chunks:
+                raise ValueError("missing fmt or data chunk")
+            fmt_offset, fmt_size = chunks[b"fmt "]
+            f.seek(fmt_offset)
+            fmt = f.read(fmt_size)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        tag, self.channels, self.sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            (tag,) = struct.unpack("<H", fmt[24:26])  # first two bytes of the subformat GUID
+        if tag == WAVE_FORMAT_PCM and bits in (8, 16, 24, 32):
+            self.dtype = np.dtype({8: "u1", 16: "<i2", 24: "u1", 32: "<i4"}[bits])
+        elif tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+            self.dtype = np.dtype({32: "<f4", 64: "<f8"}[bits])
+        else:
+            raise ValueError(f"unsupported WAV encoding (format {tag:#x}, {bits} bits)")
+        self.bits = bits
+        self.block_align = block_align
+        self._float = tag == WAVE_FORMAT_IEEE_FLOAT
+
+        data_offset, data_size = chunks[b"data"]
+        self.frames = data_size // block_align
+        self._data_offset = data_offset
+        self._bytes = np.frombuffer(self._mmap, dtype=np.uint8, count=self.frames * block_align, offset=data_offset)
+        self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+    def __enter__(self) -> WavReader:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file; deferred to garbage collection while views are alive."""
+        self._bytes = np.empty(0, dtype=np.uint8)
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    @property
+    def samples(self) -> np.ndarray:
+        """``(frames, channels)`` view of the raw samples in the file's own dtype.
+
+        24-bit PCM has no NumPy dtype; use :meth:`blocks` for it.
+        """
+        if self.bits == 24:
+            raise ValueError("24-bit PCM has no zero-copy view; use blocks()")
+        return self._bytes.view(self.dtype).reshape(self.frames, self.channels)
+
+    def frame_view(self, frame_length: int, hop_length: int, channel: int = 0) -> np.ndarray:
+        """Zero-copy ``(n_frames, frame_length)`` frames of one channel (no centring)."""
+        column = self.samples[:, channel]
+        if column.size < frame_length:
+            return column[:0].reshape(0, frame_length)
+        n_frames = 1 + (column.size - frame_length) // hop_length
+        stride = column.strides[0]
+        return as_strided(
+            column, shape=(n_frames, frame_length), strides=(hop_length * stride, stride), writeable=False
+        )
+
+    def read(self, start: int, stop: int, dtype: type[np.floating] = np.float32, mono: bool = True) -> np.ndarray:
+        """Frames ``[start, stop)`` converted to float in ``[-1, 1)``."""
+        start = max(0, start)
+        stop = min(self.frames, stop)
+        raw = self._bytes[start * self.block_align : stop * self.block_align]
+        count = max(0, stop - start)
+        if self.bits == 24:
+            # Sign-extend little-endian 3-byte samples into int32
+            triplets = raw.reshape(-1, 3)
+            wide = np.empty((triplets.shape[0], 4), dtype=np.uint8)
+            wide[:, 0] = 0
+            wide[:, 1:] = triplets
+            values = wide.view("<i4").reshape(count, self.channels)
+            out = values.astype(dtype)
+            out *= 1.0 / 2**31
+        else:
+            values = raw.view(self.dtype).reshape(count, self.channels)
+            out = values.astype(dtype)
+            if self.bits == 8:
+                out -= 128
+                out *= 1.0 / 128
+            elif not self._float:
+                out *= 1.0 / 2 ** (self.bits - 1)
+        if mono:
+            return out[:, 0] if self.channels == 1 else out.mean(axis=1, dtype=dtype)
+        return out
+
+    def blocks(
+        self, block_frames: int = 1 << 16, dtype: type[np.floating] = np.float32, mono: bool = True
+    ) -> Iterator[np.ndarray]:
+        """Consecutive float blocks; pages already converted are released as it goes."""
+        page = mmap.PAGESIZE
+        released = 0
+        for start in range(0, self.frames, block_frames):
+            yield self.read(start, start + block_frames, dtype, mono)
+            # Drop the mapped pages behind us so RSS tracks one block
+            end = (self._data_offset + min(self.frames, start + block_frames) * self.block_align) // page * page
+            if end > released:
+                self._mmap.madvise(mmap.MADV_DONTNEED, released, end - released)
+                released = end
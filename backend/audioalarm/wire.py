@@ -0,0 +1,183 @@
+"""Binary wire format for RMS streams (version 1).
+
+A frame carries a run of evenly spaced RMS values from one session. All
+fields are little-endian::
+
+    offset  size  field
+    0       2     magic b"RA"
+    2       1     version (1)
+    3       1     flags: bit 0 = values quantised to uint16, bit 1 = mean column present
+    4       4     u32 sequence number, per sender
+    8       8     f64 clock origin: wall-clock epoch seconds of sample frame 0
+    16      8     u64 base frame: sample-clock index of the first value
+    24      4     u32 sample rate
+    28      4     u32 hop: sample frames between consecutive values
+    32      2     u16 count
+    34      1     u8 session id length in bytes
+    35      1     reserved (0)
+    36      4     f32 alarm threshold, NaN when unset
+    40      n     UTF-8 session id, zero-padded to a multiple of 4 bytes
+    ...           count RMS values, then count means if flagged:
+                  f32 each, or u16 each when quantised
+
+Quantised values are on a decibel scale: 0 is silence (below -120 dBFS) and
+1..65535 map linearly onto -120..0 dBFS, a step of about 0.002 dB (at most
+0.011 % relative error), far finer than the alarm threshold needs.
+
+Frames are self-delimiting, so a request or WebSocket message may carry
+several back to back. ``nextjs/src/lib/persistence/wireFormat.ts`` is the
+browser side of this codec and must be kept in step with it.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from .store import RmsBatch
+
+MAGIC = b"RA"
+VERSION = 1
+FLAG_QUANTISED = 0x01
+FLAG_MEAN = 0x02
+HEADER = struct.Struct("<2sBBIdQIIHBxf")
+CONTENT_TYPE = "application/x-audioalarm-rms"
+
+QUANT_FLOOR_DB = -120.0
+QUANT_MAX = 65535
+
+
+def quantise(values: np.ndarray) -> np.ndarray:
+    """RMS values in [0, 1] to uint16 codes on a dB scale."""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        db = 20 * np.log10(np.clip(values, 0.0, 1.0))
+    codes = np.rint((db - QUANT_FLOOR_DB) * (QUANT_MAX / -QUANT_FLOOR_DB))
+    return np.where(db > QUANT_FLOOR_DB, np.clip(codes, 1, QUANT_MAX), 0).astype("<u2")
+
+
+def _dequantise_table() -> np.ndarray:
+    codes = np.arange(QUANT_MAX + 1, dtype=np.float64)
+    table = 10 ** ((codes * (-QUANT_FLOOR_DB / QUANT_MAX) + QUANT_FLOOR_DB) / 20)
+    table[0] = 0.0
+    return table.astype(np.float32)
+
+
+# Decoding is a table lookup (256 KiB, built once)
+_DEQUANTISE = _dequantise_table()
+
+
+def dequantise(codes: np.ndarray) -> np.ndarray:
+    return _DEQUANTISE[np.asarray(codes, dtype=np.uint16)]
+
+
+@dataclass(frozen=True)
+class RmsFrame:
+    session_id: str
+    sequence: int
+    clock_origin: float
+    base_frame: int
+    sample_rate: int
+    hop: int
+    rms: np.ndarray
+    mean: np.ndarray | None = None
+    threshold: float | None = None
+
+    def timestamps(self) -> np.ndarray:
+        """Wall-clock epoch seconds of each value."""
+        frames = self.base_frame + self.hop * np.arange(len(self.rms), dtype=np.float64)
+        return self.clock_origin + frames / self.sample_rate
+
+    def to_batch(self) -> RmsBatch:
+        return RmsBatch(
+            session_id=self.session_id,
+            ts=self.timestamps().tolist(),
+            rms=np.asarray(self.rms, dtype=np.float64).tolist(),
+            mean=[None] * len(self.rms) if self.mean is None else np.asarray(self.mean, dtype=np.float64).tolist(),
+            sample_rate=self.sample_rate,
+            threshold=self.threshold,
+        )
+
+
+def encode_frame(frame: RmsFrame, quantised: bool = False) -> bytes:
+    session = frame.session_id.encode()
+    count = len(frame.rms)
+    if len(session) > 255 or count > 0xFFFF:
+        raise ValueError("session id or value run too long for one frame")
+    if frame.mean is not None and len(frame.mean) != count:
+        raise ValueError("rms and mean must have the same length")
+    flags = (FLAG_QUANTISED if quantised else 0) | (FLAG_MEAN if frame.mean is not None else 0)
+    threshold = math.nan if frame.threshold is None else frame.threshold
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        flags,
+        frame.sequence,
+        frame.clock_origin,
+        frame.base_frame,
+        frame.sample_rate,
+        frame.hop,
+        count,
+        len(session),
+        threshold,
+    )
+    padding = b"\0" * (-len(session) % 4)
+    columns = [frame.rms] if frame.mean is None else [frame.rms, frame.mean]
+    body = b"".join((quantise(c) if quantised else np.asarray(c, dtype="<f4")).tobytes() for c in columns)
+    return header + session + padding + body
+
+
+def decode_frame(buffer: bytes | memoryview, offset: int = 0) -> tuple[RmsFrame, int]:
+    """Decode the frame at ``offset``; returns it and the offset just past it."""
+    if len(buffer) - offset < HEADER.size:
+        raise ValueError("truncated frame header")
+    (magic, version, flags, sequence, origin, base, rate, hop, count, id_length, threshold) = HEADER.unpack_from(
+        buffer, offset
+    )
+    if magic != MAGIC:
+        raise ValueError("not an RMS frame")
+    if version != VERSION:
+        raise ValueError(f"unsupported frame version {version}")
+    if rate == 0 or hop == 0:
+        # Every value would get the same timestamp
+        raise ValueError("sample rate and hop must be positive")
+    position = offset + HEADER.size
+    session_id = bytes(buffer[position : position + id_length]).decode()
+    position += id_length + (-id_length % 4)
+    dtype = np.dtype("<u2") if flags & FLAG_QUANTISED else np.dtype("<f4")
+    columns = 2 if flags & FLAG_MEAN else 1
+    end = position + columns * count * dtype.itemsize
+    if end > len(buffer):
+        raise ValueError("truncated frame body")
+    values = np.frombuffer(buffer, dtype=dtype, count=columns * count, offset=position)
+    if flags & FLAG_QUANTISED:
+        values = dequantise(values)
+    frame = RmsFrame(
+        session_id=session_id,
+        sequence=sequence,
+        clock_origin=origin,
+        base_frame=base,
+        sample_rate=rate,
+        hop=hop,
+        rms=values[:count],
+        mean=values[count:] if columns == 2 else None,
+        # Undo the float32 round trip (0.05 comes back as 0.05000000074...)
+        threshold=None if math.isnan(threshold) else float(f"{threshold:.7g}"),
+    )
+    return frame, end
+
+
+def decode_frames(buffer: bytes | memoryview) -> Iterator[RmsFrame]:
+    """Decode back-to-back frames until the buffer is exhausted."""
+    offset = 0
+    while offset < len(buffer):
+        frame, offset = decode_frame(buffer, offset)
+        yield frame
+
+
+def decode_batches(buffer: bytes | memoryview) -> list[RmsBatch]:
+    return [frame.to_batch() for frame in decode_frames(buffer)]
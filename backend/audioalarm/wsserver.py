@@ -0,0 +1,227 @@
+"""asyncio WebSocket ingest for many concurrent monitors.
+
+Each client opens one connection, sends a JSON text hello and then binary
+messages::
+
+    {"session_id": "...", "sample_rate": 48000, "threshold": 0.05}
+
+    RMS:  one or more :mod:`audioalarm.wire` frames (start with b"RA")
+    PCM:  <u8 kind=2> <pad x3> <f32le samples...>
+
+Every RMS frame must belong to the hello's session; a message carrying
+another session's frames is dropped. The hello's threshold fills in for
+frames that leave it unset. PCM is run through the session's
+:class:`~audioalarm.features.StreamingRms` and the completed frames are sent
+back as a JSON text message, as ``POST /pcm`` answers them.
+
+Every connection has a bounded queue of undecoded RMS frames. A single
+writer wakes every ``flush_interval``, drains all queues and hands the raw
+frames to a worker thread, which decodes them and commits the lot to SQLite
+in one transaction, so the event loop only moves bytes and the thread-pool
+hop is paid once per flush rather than once per message. If that
+transaction fails, each connection's frames are retried on their own, so a
+client sending unstorable data loses only its own frames. When the writer
+falls behind, a full queue stops its connection's reader, the WebSocket
+receive buffer fills and TCP pushes back on that client, so one flooding
+client cannot grow server memory. PCM frames are processed on the pool
+inline with the connection's reader, which throttles them the same way.
+
+Run with ``python -m audioalarm.wsserver --db rms.sqlite3 --port 8766``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+
+import numpy as np
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+from .features import FeatureService
+from .store import RmsBatch, RmsStore
+from .wire import MAGIC, decode_batches
+
+logger = logging.getLogger(__name__)
+
+KIND_PCM = 2
+PCM_HEADER_BYTES = 4
+
+
+@dataclass(frozen=True)
+class Hello:
+    session_id: str
+    sample_rate: int | None = None
+    threshold: float | None = None
+
+    @classmethod
+    def parse(cls, message: str | bytes) -> Hello:
+        try:
+            payload = json.loads(message)
+            return cls(
+                session_id=str(payload["session_id"]),
+                sample_rate=int(payload["sample_rate"]) if payload.get("sample_rate") is not None else None,
+                threshold=float(payload["threshold"]) if payload.get("threshold") is not None else None,
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"malformed hello: {exc}") from exc
+
+
+def decode_rms_frames(hello: Hello, messages: list[bytes]) -> list[RmsBatch]:
+    """Decode a run of wire-format messages from one connection.
+
+    Raises ValueError for malformed frames and for frames of any session
+    other than the hello's, so a client can only write its own session.
+    """
+    batches = []
+    for message in messages:
+        for batch in decode_batches(message):
+            if batch.session_id != hello.session_id:
+                raise ValueError(f"frame for session {batch.session_id!r} on a {hello.session_id!r} connection")
+            if batch.threshold is None:
+                batch = replace(batch, threshold=hello.threshold)
+            batches.append(batch)
+    return batches
+
+
+@dataclass
+class _Connection:
+    hello: Hello
+    queue: asyncio.Queue[bytes]
+    closed: bool = False
+
+
+class WsIngestServer:
+    """Bounded-queue WebSocket front end for :class:`RmsStore`."""
+
+    def __init__(
+        self,
+        store: RmsStore,
+        features: FeatureService | None = None,
+        workers: int = 4,
+        queue_size: int = 64,
+        flush_interval: float = 0.1,
+    ) -> None:
+        self.store = store
+        self.features = features or FeatureService()
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ws-ingest")
+        self._connections: list[_Connection] = []
+        self.rows_written = 0
+
+    @property
+    def connections(self) -> int:
+        return sum(not conn.closed for conn in self._connections)
+
+    async def serve(self, host: str, port: int) -> None:
+        writer = asyncio.create_task(self._writer())
+        try:
+            # Compression costs more CPU than it saves on small binary frames
+            async with serve(self._handle, host, port, compression=None, max_queue=self.queue_size) as server:
+                await server.serve_forever()
+        finally:
+            writer.cancel()
+            self._pool.shutdown(wait=True)
+
+    async def _handle(self, ws: ServerConnection) -> None:
+        try:
+            hello = Hello.parse(await ws.recv())
+        except ValueError as exc:
+            await ws.close(1003, str(exc))
+            return
+        except ConnectionClosed:
+            return
+
+        conn = _Connection(hello, asyncio.Queue(maxsize=self.queue_size))
+        self._connections.append(conn)
+        loop = asyncio.get_running_loop()
+        try:
+            async for message in ws:
+                if isinstance(message, str) or not message:
+                    continue  # only the hello is text
+                if message[:2] == MAGIC:
+                    # Blocks while the writer is behind, which stops reading the socket
+                    await conn.queue.put(message)
+                elif message[0] == KIND_PCM:
+                    samples = np.frombuffer(message, dtype="<f4", offset=PCM_HEADER_BYTES)
+                    result = await loop.run_in_executor(self._pool, self.features.process, hello.session_id, samples)
+                    if result.rms:
+                        await ws.send(json.dumps(asdict(result)))
+        except (ConnectionClosed, ValueError):
+            pass
+        finally:
+            # The writer drains what is left and then forgets the connection
+            conn.closed = True
+
+    async def _writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            work: list[tuple[Hello, list[bytes]]] = []
+            for conn in self._connections:
+                frames = []
+                while not conn.queue.empty():
+                    frames.append(conn.queue.get_nowait())
+                if frames:
+                    work.append((conn.hello, frames))
+            self._connections = [conn for conn in self._connections if not (conn.closed and conn.queue.empty())]
+            if not work:
+                continue
+            try:
+                self.rows_written += await loop.run_in_executor(self._pool, self._write, work)
+            except Exception:  # noqa: BLE001 - keep serving; this flush is lost
+                logger.exception("Failed to write %d connections' frames", len(work))
+
+    def _write(self, work: list[tuple[Hello, list[bytes]]]) -> int:
+        decoded: list[tuple[Hello, list[RmsBatch]]] = []
+        for hello, messages in work:
+            batches: list[RmsBatch] = []
+            for message in messages:
+                try:
+                    batches.extend(decode_rms_frames(hello, [message]))
+                except ValueError as exc:
+                    logger.warning("Dropping malformed message from %s: %s", hello.session_id, exc)
+            if batches:
+                decoded.append((hello, batches))
+        try:
+            return self.store.write_batches([batch for _, batches in decoded for batch in batches])
+        except Exception:  # noqa: BLE001 - find the connection that broke the transaction
+            if len(decoded) <= 1:
+                raise
+        written = 0
+        for hello, batches in decoded:
+            try:
+                written += self.store.write_batches(batches)
+            except Exception:  # noqa: BLE001 - only this connection's frames are lost
+                logger.exception("Dropping %d frames from %s", len(batches), hello.session_id)
+        return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="WebSocket RMS ingest server")
+    parser.add_argument("--db", default="rms.sqlite3", help="SQLite database path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=4, help="parse/write threads")
+    parser.add_argument("--queue-size", type=int, default=64, help="frames buffered per connection")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    store = RmsStore(args.db)
+    server = WsIngestServer(store, workers=args.workers, queue_size=args.queue_size)
+    logger.info("Ingesting into %s on ws://%s:%d", args.db, args.host, args.port)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
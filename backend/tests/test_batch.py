@@ -0,0 +1,97 @@
+import wave
+
+import numpy as np
+
+from audioalarm.batch import AnalysisConfig, analyse_file, run
+from audioalarm.store import RmsBatch, RmsStore
+
+
+def write_wav(path, samples, sample_rate=48000):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def tone(seconds, amplitude, sample_rate=48000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return amplitude * np.sin(2 * np.pi * 440 * t)
+
+
+def test_interval_timestamps_are_unique_when_last_frame_ends_the_file(tmp_path):
+    # 8 s at 48 kHz is a multiple of the hop: the last centred frame sits
+    # exactly on the end of the file
+    path = tmp_path / "exact.wav"
+    write_wav(path, tone(8, 0.01))
+    result = analyse_file(path, AnalysisConfig())
+    ts = np.asarray(result.batch.ts)
+    assert len(ts) == 8
+    assert np.all(np.diff(ts) > 0)
+    assert ts[-1] - ts[0] == 7
+
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    try:
+        store.write_batches([result.batch], replace=True)
+        store.write_batches([result.batch], replace=True)
+        assert store.count(str(path.resolve())) == 8
+    finally:
+        store.close()
+
+
+def test_partial_last_interval_ends_at_end_of_file(tmp_path):
+    path = tmp_path / "partial.wav"
+    write_wav(path, tone(2.5, 0.01))
+    result = analyse_file(path, AnalysisConfig())
+    start = result.batch.created_at
+    assert np.allclose(np.asarray(result.batch.ts) - start, [1, 2, 2.5])
+
+
+def test_run_skips_bad_files_and_stores_alarms(tmp_path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    loud = np.concatenate([tone(2, 0.01), tone(1, 0.5), tone(2, 0.01)])
+    write_wav(audio / "loud.wav", loud)
+    (audio / "broken.wav").write_bytes(b"RIFF\0\0\0\0WAVEjunk")
+
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    try:
+        stats = run([audio], store, AnalysisConfig(), workers=1)
+        assert stats["files"] == 1
+        assert stats["failed"] == 1
+        assert stats["alarms"] == 1
+
+        session = str((audio / "loud.wav").resolve())
+        assert store.count(session) == 5
+        (alarm,) = store.alarms(session, 0, float("inf"))
+        start = store.sessions()[0]["created_at"]
+        assert abs(alarm - start - 2) < 0.1
+    finally:
+        store.close()
+
+
+def test_raw_pcm_uses_the_stored_session_sample_rate(tmp_path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    samples = np.concatenate([tone(2, 0.01, 16000), tone(1, 0.5, 16000)])
+    samples.astype("<f4").tofile(audio / "live_1.f32")
+    samples.astype("<f4").tofile(audio / "unknown.f32")
+
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    try:
+        # The live session the page recorded; its id maps to live_1.f32
+        store.write_batch(RmsBatch("live:1", [1.0], [0.01], [None], sample_rate=16000))
+        stats = run([audio], store, AnalysisConfig(), workers=1)
+        assert stats["files"] == 1
+        assert stats["failed"] == 1
+        assert stats["alarms"] == 1
+        assert abs(stats["audio_hours"] * 3600 - 3) < 1e-9
+
+        session = str((audio / "live_1.f32").resolve())
+        assert store.count(session) == 3
+        (alarm,) = store.alarms(session, 0, float("inf"))
+        start = next(s["created_at"] for s in store.sessions() if s["session_id"] == session)
+        assert abs(alarm - start - 2) < 0.1
+    finally:
+        store.close()
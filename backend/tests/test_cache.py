@@ -0,0 +1,111 @@
+import itertools
+import os
+import types
+
+import numpy as np
+import pytest
+
+from audioalarm import cache as cache_module
+from audioalarm.cache import FeatureCache
+
+PARAMS = {"frame_length": 2048, "hop_length": 512, "sample_rate": 48000}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = FeatureCache(tmp_path / "cache")
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / "recording.wav"
+    path.write_bytes(b"RIFF" + bytes(range(256)) * 16)
+    return path
+
+
+class Compute:
+    def __init__(self, value=1.0):
+        self.calls = 0
+        self.value = value
+
+    def __call__(self):
+        self.calls += 1
+        return np.full(100, self.value, dtype=np.float32)
+
+
+def test_identical_key_hits(cache, recording):
+    compute = Compute()
+    first = cache.get_or_compute(recording, "rms", PARAMS, compute)
+    second = cache.get_or_compute(recording, "rms", dict(PARAMS), compute)
+    assert compute.calls == 1
+    np.testing.assert_array_equal(first, second)
+
+
+def test_copied_file_hits(cache, recording, tmp_path):
+    compute = Compute()
+    cache.get_or_compute(recording, "rms", PARAMS, compute)
+    copy = tmp_path / "copy.wav"
+    copy.write_bytes(recording.read_bytes())
+    cache.get_or_compute(copy, "rms", PARAMS, compute)
+    assert compute.calls == 1
+
+
+@pytest.mark.parametrize(
+    ("feature", "params"),
+    [("rms", {**PARAMS, "hop_length": 1024}), ("rms", {**PARAMS, "sample_rate": 44100}), ("centroid", PARAMS)],
+)
+def test_parameter_change_misses(cache, recording, feature, params):
+    compute = Compute()
+    cache.get_or_compute(recording, "rms", PARAMS, compute)
+    cache.get_or_compute(recording, feature, params, compute)
+    assert compute.calls == 2
+
+
+def test_source_change_misses(cache, recording):
+    cache.get_or_compute(recording, "rms", PARAMS, Compute(1.0))
+    # Same size, different bytes, newer mtime
+    data = bytearray(recording.read_bytes())
+    data[10] ^= 0xFF
+    recording.write_bytes(bytes(data))
+    stat = recording.stat()
+    os.utime(recording, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    compute = Compute(2.0)
+    array = cache.get_or_compute(recording, "rms", PARAMS, compute)
+    assert compute.calls == 1
+    assert array[0] == 2.0
+
+
+def test_hits_are_memory_mapped(cache, recording):
+    cache.get_or_compute(recording, "rms", PARAMS, Compute())
+    array = cache.get_or_compute(recording, "rms", PARAMS, Compute())
+    assert isinstance(array, np.memmap)
+    assert not array.flags.writeable
+
+
+def test_lru_eviction_stays_within_budget(tmp_path, monkeypatch):
+    # Deterministic last-use times
+    clock = itertools.count(1.0)
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(time=lambda: next(clock)))
+
+    # Each entry is 8000 bytes of data plus a 128-byte .npy header
+    cache = FeatureCache(tmp_path / "cache", max_bytes=3 * 8200)
+    try:
+        for key in "abc":
+            cache.put(f"{key}0", np.zeros(1000))
+        assert cache.total_bytes() <= cache.max_bytes
+        assert cache.get("a0") is not None  # a0 is now the most recently used
+
+        cache.put("d0", np.zeros(1000))
+        assert cache.total_bytes() <= cache.max_bytes
+        assert cache.get("b0") is None
+        assert not (tmp_path / "cache" / "b0" / "b0.npy").exists()
+        for key in ("a0", "c0", "d0"):
+            assert cache.get(key) is not None
+
+        cache.put("e0", np.zeros(5000))
+        assert cache.total_bytes() <= cache.max_bytes
+    finally:
+        cache.close()
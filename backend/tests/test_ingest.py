@@ -0,0 +1,63 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from audioalarm.ingest import MAX_BODY_BYTES, IngestServer
+from audioalarm.store import RmsStore
+
+
+@pytest.fixture
+def server(tmp_path):
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    server = IngestServer(("127.0.0.1", 0), store)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    store.close()
+
+
+def post(server, path, headers, body=b""):
+    """Raw request, so the Content-Length header is exactly what the test sends."""
+    lines = [f"POST {path} HTTP/1.1", "Host: localhost", *headers, "Connection: close", "", ""]
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall("\r\n".join(lines).encode() + body)
+        response = b""
+        while chunk := sock.recv(65536):
+            response += chunk
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_missing_content_length_is_411(server):
+    status, reply = post(server, "/ingest", ["Content-Type: application/json"])
+    assert status == 411
+    assert "Content-Length" in reply["error"]
+
+
+@pytest.mark.parametrize("value", ["abc", "-5", "1_0", "", "0"])
+def test_bad_content_length_is_400(server, value):
+    status, _ = post(server, "/ingest", [f"Content-Length: {value}"])
+    assert status == 400
+
+
+def test_oversized_body_is_refused_before_reading(server):
+    # Only the headers are sent: the reply must not wait for the body
+    status, _ = post(server, "/ingest", [f"Content-Length: {MAX_BODY_BYTES + 1}"])
+    assert status == 413
+
+
+def test_empty_final_pcm_post_is_allowed(server):
+    status, reply = post(server, "/pcm?session_id=s&final=1", ["Content-Length: 0"])
+    assert status == 200
+    assert reply["frame"] == 0
+
+
+def test_valid_batch_is_written(server):
+    body = json.dumps({"session_id": "s", "ts": [1.0, 2.0], "rms": [0.1, 0.2]}).encode()
+    status, reply = post(server, "/ingest", [f"Content-Length: {len(body)}"], body)
+    assert status == 200
+    assert reply == {"written": 2}
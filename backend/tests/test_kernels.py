@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from audioalarm.features import sliding_rms
+
+librosa = pytest.importorskip("librosa")
+
+FRAME_LENGTH = 2048
+
+
+def signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Loud and 80 dB quieter stretches, so precision loss would show
+    y = rng.standard_normal(n) * 0.1
+    y[n // 2 :] *= 1e-4
+    return y.astype(np.float32)
+
+
+@pytest.mark.parametrize("center", [True, False], ids=["center", "no-center"])
+@pytest.mark.parametrize("hop_length", [512, FRAME_LENGTH, 3000], ids=["hop<frame", "hop=frame", "hop>frame"])
+def test_matches_librosa(center, hop_length):
+    y = signal(48000 * 3 + 123)
+    expected = librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=hop_length, center=center)[0]
+    actual = sliding_rms(y, FRAME_LENGTH, hop_length, center=center)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=2e-5, atol=1e-12)
+
+
+@pytest.mark.parametrize("hop_length", [512, FRAME_LENGTH, 3000])
+def test_input_shorter_than_one_frame(hop_length):
+    y = signal(FRAME_LENGTH // 3)
+    expected = librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=hop_length, center=True)[0]
+    np.testing.assert_allclose(sliding_rms(y, FRAME_LENGTH, hop_length, center=True), expected, rtol=2e-5)
+    # librosa refuses to frame it without centring; there is no whole frame
+    with pytest.raises(librosa.ParameterError):
+        librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=hop_length, center=False)
+    assert sliding_rms(y, FRAME_LENGTH, hop_length, center=False).size == 0
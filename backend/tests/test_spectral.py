@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from audioalarm.features import FEATURES, FeatureExtractor
+
+librosa = pytest.importorskip("librosa")
+
+SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+
+
+@pytest.fixture(scope="module")
+def y():
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * 3) / SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.1 * np.sin(2 * np.pi * 3100 * t)
+    y = tone + 0.02 * rng.standard_normal(t.size)
+    y[SAMPLE_RATE : SAMPLE_RATE + 4000] = 0.0  # silence: zero-energy frames
+    return y.astype(np.float32)
+
+
+def reference(y, feature):
+    kwargs = {"n_fft": N_FFT, "hop_length": HOP_LENGTH}
+    if feature == "rms":
+        return librosa.feature.rms(y=y, frame_length=N_FFT, hop_length=HOP_LENGTH, pad_mode="constant")[0]
+    if feature == "zero_crossing_rate":
+        return librosa.feature.zero_crossing_rate(y, frame_length=N_FFT, hop_length=HOP_LENGTH)[0]
+    if feature == "spectral_centroid":
+        return librosa.feature.spectral_centroid(y=y, sr=SAMPLE_RATE, pad_mode="constant", **kwargs)[0]
+    if feature == "spectral_bandwidth":
+        return librosa.feature.spectral_bandwidth(y=y, sr=SAMPLE_RATE, pad_mode="constant", **kwargs)[0]
+    if feature == "spectral_rolloff":
+        return librosa.feature.spectral_rolloff(y=y, sr=SAMPLE_RATE, pad_mode="constant", **kwargs)[0]
+    raise AssertionError(feature)
+
+
+def assert_matches(feature, actual, expected):
+    assert actual.shape == expected.shape
+    if feature == "spectral_rolloff":
+        # float64 vs float32 spectra: a frame right at roll_percent may move one bin
+        bin_hz = SAMPLE_RATE / N_FFT
+        assert np.all(np.abs(actual - expected) <= bin_hz + 1e-3)
+        assert np.mean(actual == expected) > 0.99
+    elif feature == "zero_crossing_rate":
+        np.testing.assert_allclose(actual, expected, atol=1e-7)
+    else:
+        np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+
+
+LIBROSA_FEATURES = sorted(FEATURES - {"band_energy"})
+
+
+@pytest.mark.parametrize("feature", LIBROSA_FEATURES)
+def test_single_feature_matches_librosa(y, feature):
+    extractor = FeatureExtractor(SAMPLE_RATE, [feature], n_fft=N_FFT, hop_length=HOP_LENGTH)
+    result = extractor.extract(y)
+    assert list(result) == [feature]
+    assert_matches(feature, result[feature], reference(y, feature))
+
+
+def test_full_feature_set_matches_librosa(y):
+    features = [
+        "spectral_rolloff",
+        "rms",
+        "band_energy",
+        "spectral_centroid",
+        "zero_crossing_rate",
+        "spectral_bandwidth",
+    ]
+    # A small block size makes the shared STFT run over several blocks
+    extractor = FeatureExtractor(SAMPLE_RATE, features, n_fft=N_FFT, hop_length=HOP_LENGTH, block_frames=17)
+    result = extractor.extract(y)
+    assert list(result) == features
+    for feature in LIBROSA_FEATURES:
+        assert_matches(feature, result[feature], reference(y, feature))
+
+    power = np.abs(librosa.stft(y.astype(np.float64), n_fft=N_FFT, hop_length=HOP_LENGTH, pad_mode="constant")) ** 2
+    freqs = librosa.fft_frequencies(sr=SAMPLE_RATE, n_fft=N_FFT)
+    expected = np.stack([power[(freqs >= low) & (freqs < high)].sum(axis=0) for low, high in extractor.bands])
+    np.testing.assert_allclose(result["band_energy"], expected, rtol=1e-4, atol=1e-6)
+
+
+def test_unknown_feature_is_rejected():
+    with pytest.raises(ValueError, match="mfcc"):
+        FeatureExtractor(SAMPLE_RATE, ["rms", "mfcc"])
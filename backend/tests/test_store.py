@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from audioalarm.ingest import IngestServer
+from audioalarm.store import RmsBatch, RmsStore
+
+START = 1760000000.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    yield store
+    store.close()
+
+
+def write_series(store, seconds, rate):
+    ts = START + np.arange(int(seconds * rate)) / rate
+    rms = np.linspace(0.0, 0.1, ts.size)
+    store.write_batch(RmsBatch("s", ts.tolist(), rms.tolist(), [None] * ts.size, threshold=0.05))
+
+
+def test_short_span_with_many_samples_is_bucketed_to_width(store):
+    write_series(store, 600, 20)
+    result = store.query_range("s", START, START + 600, 1000)
+    assert len(result.ts) <= 1000
+    assert result.resolution == pytest.approx(0.6)
+    assert sum(result.count) == 12000
+    assert sum(result.above) == sum(1 for v in np.linspace(0.0, 0.1, 12000) if v > 0.05)
+
+
+def test_short_span_with_few_samples_stays_raw(store):
+    write_series(store, 600, 1)
+    result = store.query_range("s", START, START + 600, 1000)
+    assert result.resolution == 0
+    assert len(result.ts) == 600
+
+
+@pytest.mark.parametrize("width", [100, 700, 1000])
+def test_rollup_steps_stay_within_width(store, width):
+    write_series(store, 3 * 3600, 1)
+    result = store.query_range("s", START + 17, START + 3 * 3600, width)
+    assert result.resolution > 0
+    assert len(result.ts) <= width + 1
+
+
+def test_non_finite_bounds_are_rejected(store, tmp_path):
+    with pytest.raises(ValueError):
+        store.query_range("s", START, float("inf"), 100)
+
+    server = IngestServer(("127.0.0.1", 0), store)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/range?session_id=s&start=-inf&end=1"
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url, timeout=5)
+        assert error.value.code == 400
+        assert "finite" in json.loads(error.value.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_mean_is_the_same_whichever_path_answers(store):
+    # rms is the interval max, mean a separate column: the mean series must
+    # come from mean on both the raw and the rollup path
+    ts = START + np.arange(7200) / 2
+    rms = np.full(ts.size, 0.08)
+    mean = np.linspace(0.01, 0.03, ts.size)
+    store.write_batch(RmsBatch("s", ts.tolist(), rms.tolist(), mean.tolist()))
+
+    raw = store.query_range("s", START, START + 3600, 5000)
+    rollup = store.query_range("s", START, START + 3600, 60)
+    assert raw.resolution < 1 <= rollup.resolution
+    for result in (raw, rollup):
+        weighted = np.dot(result.mean, result.count) / sum(result.count)
+        assert weighted == pytest.approx(mean.mean())
+        assert max(result.max) == pytest.approx(0.08)
+
+
+def test_old_rollups_are_rebuilt_from_mean(tmp_path):
+    path = tmp_path / "old.sqlite3"
+    store = RmsStore(path)
+    store.write_batch(RmsBatch("s", [START, START + 0.5], [0.08, 0.08], [0.02, None], threshold=0.05))
+    store.close()
+    # Simulate a pre-upgrade database whose rollup sums are of rms
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE rms_rollup_1s SET sum = 99")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    store = RmsStore(path)
+    try:
+        result = store.query_range("s", START, START + 3600, 60)
+        assert result.mean == [pytest.approx((0.02 + 0.08) / 2)]
+        assert result.above == [2]
+    finally:
+        store.close()
+
+
+def test_close_closes_reader_connections(tmp_path):
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    readers = []
+
+    def read():
+        store.count("s")
+        readers.append(store._reader())
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+    assert len(readers) == 3
+    for conn in readers:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
@@ -0,0 +1,107 @@
+import json
+import threading
+import urllib.request
+
+import numpy as np
+import pytest
+
+from audioalarm.features import FeatureService, StreamingRms
+from audioalarm.ingest import IngestServer
+from audioalarm.store import RmsStore
+
+librosa = pytest.importorskip("librosa")
+
+FRAME_LENGTH = 2048
+
+
+def signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(n) * 0.1).astype(np.float32)
+
+
+def random_blocks(y, seed, max_block=5000):
+    # Block sizes from 0 (empty posts) up to a few frames
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.integers(0, y.size, size=y.size // (max_block // 2)))
+    return np.split(y, cuts)
+
+
+@pytest.mark.parametrize("center", [True, False], ids=["center", "no-center"])
+@pytest.mark.parametrize("hop_length", [512, FRAME_LENGTH, 3000], ids=["hop<frame", "hop=frame", "hop>frame"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_random_block_splits_match_librosa(center, hop_length, seed):
+    y = signal(48000 * 2 + 777, seed)
+    expected = librosa.feature.rms(
+        y=y, frame_length=FRAME_LENGTH, hop_length=hop_length, center=center, pad_mode="constant"
+    )[0]
+
+    stream = StreamingRms(FRAME_LENGTH, hop_length, center=center)
+    parts = [stream.process(block) for block in random_blocks(y, seed)]
+    parts.append(stream.finish())
+    actual = np.concatenate(parts)
+
+    assert actual.shape == expected.shape
+    assert stream.frames_emitted == expected.size
+    np.testing.assert_allclose(actual, expected, rtol=2e-5, atol=1e-7)
+
+
+def test_single_samples_match_librosa():
+    y = signal(3 * FRAME_LENGTH + 5)
+    expected = librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=700, center=True, pad_mode="constant")[0]
+    stream = StreamingRms(FRAME_LENGTH, 700)
+    actual = np.concatenate([stream.process(y[i : i + 1]) for i in range(y.size)] + [stream.finish()])
+    np.testing.assert_allclose(actual, expected, rtol=2e-5, atol=1e-7)
+
+
+def test_finished_stream_rejects_more_samples():
+    stream = StreamingRms()
+    stream.finish()
+    with pytest.raises(RuntimeError):
+        stream.process(np.zeros(10, dtype=np.float32))
+
+
+def test_service_frame_indices_are_continuous():
+    service = FeatureService(frame_length=FRAME_LENGTH, hop_length=512)
+    y = signal(20000)
+    first = 0
+    rms = []
+    blocks = random_blocks(y, 4)
+    for i, block in enumerate(blocks):
+        frames = service.process("s", block, final=i == len(blocks) - 1)
+        assert frames.frame == first
+        first += len(frames.rms)
+        rms.extend(frames.rms)
+    assert service.active_sessions() == 0
+    expected = librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=512, pad_mode="constant")[0]
+    np.testing.assert_allclose(rms, expected, rtol=2e-5, atol=1e-7)
+
+
+def test_pcm_round_trip_keeps_frame_indices_continuous(tmp_path):
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    server = IngestServer(("127.0.0.1", 0), store, FeatureService(frame_length=FRAME_LENGTH, hop_length=1024))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}/pcm?session_id=client"
+        y = signal(30000, 5)
+        blocks = np.array_split(y, 7)
+        frame = 0
+        rms = []
+        for i, block in enumerate(blocks):
+            url = base + ("&final=1" if i == len(blocks) - 1 else "")
+            request = urllib.request.Request(url, data=block.astype("<f4").tobytes(), method="POST")
+            with urllib.request.urlopen(request, timeout=5) as response:
+                reply = json.loads(response.read())
+            assert reply["session_id"] == "client"
+            assert reply["hop_length"] == 1024
+            assert reply["frame"] == frame
+            frame += len(reply["rms"])
+            rms.extend(reply["rms"])
+
+        expected = librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=1024, pad_mode="constant")[0]
+        assert frame == expected.size
+        np.testing.assert_allclose(rms, expected, rtol=2e-5, atol=1e-7)
+    finally:
+        server.shutdown()
+        server.server_close()
+        store.close()
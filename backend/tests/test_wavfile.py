@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audioalarm.wavfile import WavReader
+
+SAMPLE_RATE = 16000
+
+
+def noise(frames, channels, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-0.9, 0.9, size=(frames, channels))
+
+
+@pytest.mark.parametrize(
+    ("subtype", "fmt"),
+    [
+        ("PCM_16", "WAV"),
+        ("PCM_24", "WAV"),
+        ("PCM_32", "WAV"),
+        ("FLOAT", "WAV"),
+        ("DOUBLE", "WAV"),
+        ("PCM_16", "RF64"),
+        ("FLOAT", "RF64"),
+    ],
+)
+def test_read_matches_soundfile(tmp_path, subtype, fmt):
+    path = tmp_path / f"{subtype}.wav"
+    sf.write(path, noise(5000, 2), SAMPLE_RATE, subtype=subtype, format=fmt)
+    expected, _ = sf.read(path, dtype="float64", always_2d=True)
+
+    with WavReader(path) as reader:
+        assert reader.rf64 == (fmt == "RF64")
+        assert (reader.frames, reader.channels, reader.sample_rate) == (5000, 2, SAMPLE_RATE)
+        np.testing.assert_allclose(reader.read(0, reader.frames, np.float64, mono=False), expected, atol=1e-12)
+        np.testing.assert_allclose(reader.read(0, reader.frames, np.float64), expected.mean(axis=1), atol=1e-12)
+        blocks = np.concatenate(list(reader.blocks(1024, np.float64, mono=False)))
+        np.testing.assert_allclose(blocks, expected, atol=1e-12)
+
+
+def test_extensible_header(tmp_path):
+    # soundfile writes WAVE_FORMAT_EXTENSIBLE for more than two channels
+    path = tmp_path / "quad.wav"
+    sf.write(path, noise(1000, 4), SAMPLE_RATE, subtype="PCM_16")
+    expected, _ = sf.read(path, dtype="float64", always_2d=True)
+    with WavReader(path) as reader:
+        np.testing.assert_allclose(reader.read(0, reader.frames, np.float64, mono=False), expected, atol=1e-12)
+
+
+def test_frame_view_is_a_read_only_view_of_the_mapping(tmp_path):
+    path = tmp_path / "frames.wav"
+    sf.write(path, noise(10000, 2), SAMPLE_RATE, subtype="PCM_16")
+    expected, _ = sf.read(path, dtype="int16", always_2d=True)
+
+    with WavReader(path) as reader:
+        frames = reader.frame_view(2048, 512, channel=1)
+        assert frames.shape == (1 + (10000 - 2048) // 512, 2048)
+        assert np.shares_memory(frames, np.frombuffer(reader._mmap, dtype=np.uint8))
+        assert not frames.flags.writeable
+        for i in (0, 7, frames.shape[0] - 1):
+            np.testing.assert_array_equal(frames[i], expected[i * 512 : i * 512 + 2048, 1])
+        del frames
+
+        assert reader.frame_view(20000, 512).shape == (0, 20000)
+
+
+def test_24_bit_has_no_zero_copy_view(tmp_path):
+    path = tmp_path / "pcm24.wav"
+    sf.write(path, noise(100, 1), SAMPLE_RATE, subtype="PCM_24")
+    with WavReader(path) as reader, pytest.raises(ValueError):
+        reader.frame_view(32, 16)
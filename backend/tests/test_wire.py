@@ -0,0 +1,75 @@
+"""Golden frames shared with nextjs/src/lib/persistence/wireFormat.test.ts."""
+
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audioalarm.wire import RmsFrame, decode_frame, decode_frames, encode_frame
+from audioalarm.wsserver import Hello, decode_rms_frames
+
+GOLDEN = Path(__file__).parent / "golden"
+CASES = json.loads((GOLDEN / "wire_frames.json").read_text())["cases"]
+
+
+def manifest_frame(case):
+    return RmsFrame(
+        session_id=case["session_id"],
+        sequence=case["sequence"],
+        clock_origin=case["clock_origin"],
+        base_frame=case["base_frame"],
+        sample_rate=case["sample_rate"],
+        hop=case["hop"],
+        rms=np.asarray(case["rms"]),
+        mean=None if case["mean"] is None else np.asarray(case["mean"]),
+        threshold=case["threshold"],
+    )
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["file"] for case in CASES])
+def test_golden_frame_round_trips(case):
+    golden = (GOLDEN / case["file"]).read_bytes()
+    assert encode_frame(manifest_frame(case), quantised=case["quantised"]) == golden
+
+    frame, end = decode_frame(golden)
+    assert end == len(golden)
+    assert frame.session_id == case["session_id"]
+    assert (frame.sequence, frame.base_frame, frame.sample_rate, frame.hop) == (
+        case["sequence"],
+        case["base_frame"],
+        case["sample_rate"],
+        case["hop"],
+    )
+    assert frame.clock_origin == case["clock_origin"]
+    assert frame.threshold == case["threshold"]
+    rtol = 2.5e-4 if case["quantised"] else 0
+    np.testing.assert_allclose(frame.rms, case["rms"], rtol=rtol)
+    if case["mean"] is None:
+        assert frame.mean is None
+    else:
+        np.testing.assert_allclose(frame.mean, case["mean"], rtol=rtol)
+    assert encode_frame(frame, quantised=case["quantised"]) == golden
+
+
+def test_back_to_back_frames_decode():
+    goldens = [(GOLDEN / case["file"]).read_bytes() for case in CASES]
+    frames = list(decode_frames(b"".join(goldens)))
+    assert [frame.session_id for frame in frames] == [case["session_id"] for case in CASES]
+
+
+@pytest.mark.parametrize("offset", [24, 28], ids=["sample_rate", "hop"])
+def test_zero_rate_or_hop_is_rejected(offset):
+    frame = bytearray((GOLDEN / CASES[0]["file"]).read_bytes())
+    struct.pack_into("<I", frame, offset, 0)
+    with pytest.raises(ValueError):
+        decode_frame(bytes(frame))
+
+
+def test_websocket_frames_must_match_the_hello_session():
+    golden = (GOLDEN / "wire_u16.bin").read_bytes()
+    (batch,) = decode_rms_frames(Hello(session_id="abc", threshold=0.1), [golden])
+    assert batch.session_id == "abc"
+    with pytest.raises(ValueError):
+        decode_rms_frames(Hello(session_id="other"), [golden])
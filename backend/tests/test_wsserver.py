@@ -0,0 +1,37 @@
+import numpy as np
+
+from audioalarm.store import RmsStore
+from audioalarm.wire import RmsFrame, encode_frame
+from audioalarm.wsserver import Hello, WsIngestServer
+
+
+def message(session_id, rms):
+    frame = RmsFrame(
+        session_id=session_id,
+        sequence=0,
+        clock_origin=1760000000.0,
+        base_frame=0,
+        sample_rate=48000,
+        hop=48000,
+        rms=np.asarray(rms, dtype=np.float32),
+    )
+    return encode_frame(frame)
+
+
+def test_one_bad_connection_loses_only_its_own_frames(tmp_path):
+    store = RmsStore(tmp_path / "rms.sqlite3")
+    server = WsIngestServer(store, workers=1)
+    try:
+        # NaN is stored as NULL and violates NOT NULL, failing the shared transaction
+        work = [
+            (Hello("good-1"), [message("good-1", [0.1, 0.2])]),
+            (Hello("bad"), [message("bad", [0.1, np.nan])]),
+            (Hello("good-2"), [message("good-2", [0.3])]),
+        ]
+        assert server._write(work) == 3
+        assert store.count("good-1") == 2
+        assert store.count("good-2") == 1
+        assert store.count("bad") == 0
+    finally:
+        server._pool.shutdown()
+        store.close()
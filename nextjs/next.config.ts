@@ -1,7 +1,46 @@
 import type { NextConfig } from "next";
 
+// Python ingest service (backend/audioalarm/ingest.py)
+const INGEST_URL = process.env.INGEST_URL ?? "http://127.0.0.1:8765";
+
 const nextConfig: NextConfig = {
-  /* config options here */
+  // Cross-origin isolation enables SharedArrayBuffer, which the worklet uses
+  // to share raw PCM with the recorder worker (src/lib/audio/SharedPcmRing.ts)
+  async headers() {
+    return [
+      {
+        source: "/(.*)",
+        headers: [
+          { key: "Cross-Origin-Opener-Policy", value: "same-origin" },
+          { key: "Cross-Origin-Embedder-Policy", value: "require-corp" },
+        ],
+      },
+    ];
+  },
+  async rewrites() {
+    return [
+      {
+        source: "/api/ingest",
+        destination: `${INGEST_URL}/ingest`,
+      },
+      {
+        source: "/api/sessions",
+        destination: `${INGEST_URL}/sessions`,
+      },
+      {
+        source: "/api/range",
+        destination: `${INGEST_URL}/range`,
+      },
+      {
+        source: "/api/pcm",
+        destination: `${INGEST_URL}/pcm`,
+      },
+      {
+        source: "/api/audio",
+        destination: `${INGEST_URL}/audio`,
+      },
+    ];
+  },
 };
 
 export default nextConfig;
@@ -0,0 +1,261 @@
+// AudioWorklet processor that computes windowed RMS on the audio thread.
+//
+// Every input sample is measured: a running sum of squares over the last
+// `windowSize` samples is updated in O(1) per sample and a frame is emitted
+// every `hopSize` samples. Each `intervalSeconds` of audio the processor also
+// emits the min, max and mean of the frames that ended inside that interval, so a
+// slow display tick still summarises all of the audio it covers.
+//
+// With `pcmChunkSize` > 0 the raw input is also forwarded in chunks of that
+// many samples, transferred (not copied) to the main thread. With `pcmRing`
+// (a SharedArrayBuffer, see src/lib/audio/SharedPcmRing.ts for the layout)
+// the input is instead written into that ring, which readers on any thread
+// consume without a message or a copy per chunk.
+//
+// With `alarm` set, the threshold alarm is evaluated here on every frame and
+// its tone is synthesised on the node's output, so detection and sound never
+// wait for the main thread, whose timers and message handling browsers
+// throttle in background tabs. The alarm activates when a frame exceeds
+// `threshold` and releases when one drops below `threshold * releaseRatio`;
+// while active it sounds at most once per `cooldownSeconds`.
+//
+// Every `anchorSeconds` of audio the processor pairs the current capture
+// frame with the wall clock (`Date.now()`, which the worklet scope keeps),
+// so frames keep mapping to dates on the audio clock's cadence instead of a
+// main-thread timer's.
+//
+// Messages:
+//   { type: 'frame', rms, frame }
+//   { type: 'interval', min, max, mean, count, frame }
+//   { type: 'pcm', samples, frame }
+//   { type: 'alarm', rms, frame }
+//   { type: 'anchor', frame, epochSeconds }
+// where `frame` is the capture-clock sample index just past the last sample
+// for 'frame', 'interval' and 'alarm', of the first sample for 'pcm', and of
+// the first sample of the render quantum for 'anchor'.
+
+// Square-wave tone whose gain decays exponentially from 1 to 0.01
+class AlarmTone {
+  constructor(frequency, seconds) {
+    this.step = frequency / sampleRate;
+    this.length = Math.max(1, Math.round(seconds * sampleRate));
+    this.decay = Math.pow(0.01, 1 / this.length);
+    this.remaining = 0;
+    this.phase = 0;
+    this.gain = 0;
+  }
+
+  start() {
+    this.remaining = this.length;
+    this.phase = 0;
+    this.gain = 1;
+  }
+
+  // Next output sample, 0 once the tone has ended
+  next() {
+    if (this.remaining === 0) return 0;
+    this.remaining--;
+    const value = this.phase < 0.5 ? this.gain : -this.gain;
+    this.phase += this.step;
+    if (this.phase >= 1) this.phase -= 1;
+    this.gain *= this.decay;
+    return value;
+  }
+}
+
+class RmsProcessor extends AudioWorkletProcessor {
+  constructor(options) {
+    super();
+    const {
+      windowSize = 2048,
+      hopSize = 512,
+      intervalSeconds = 1,
+      pcmChunkSize = 0,
+      alarm = null,
+      pcmRing = null,
+      anchorSeconds = 10
+    } = (options && options.processorOptions) || {};
+
+    this.windowSize = windowSize;
+    this.hopSize = hopSize;
+    this.intervalSize = Math.max(1, Math.round(sampleRate * intervalSeconds));
+    this.anchorSize = Math.max(1, Math.round(sampleRate * anchorSeconds));
+    this.nextAnchorFrame = 0;
+
+    // Squares of the last `windowSize` samples and their running sum
+    this.squares = new Float64Array(windowSize);
+    this.writeIndex = 0;
+    this.filled = 0;
+    this.sum = 0;
+
+    this.sinceHop = 0;
+    this.sinceInterval = 0;
+    this.intervalMin = Infinity;
+    this.intervalMax = 0;
+    this.intervalSum = 0;
+    this.intervalCount = 0;
+
+    this.ring = pcmRing && {
+      written: new BigInt64Array(pcmRing, 0, 1),
+      origin: new Float64Array(pcmRing, 8, 1),
+      data: new Float32Array(pcmRing, 16),
+      count: 0
+    };
+
+    this.pcmChunkSize = pcmChunkSize;
+    this.pcmChunk = pcmChunkSize > 0 && !pcmRing ? new Float32Array(pcmChunkSize) : null;
+    this.pcmFill = 0;
+    this.pcmStartFrame = 0;
+
+    this.alarm = alarm && {
+      threshold: alarm.threshold,
+      releaseLevel: alarm.threshold * alarm.releaseRatio,
+      cooldownFrames: Math.round(alarm.cooldownSeconds * sampleRate),
+      active: false,
+      lastTriggerFrame: -Infinity
+    };
+    this.tone = alarm && alarm.toneSeconds > 0 ? new AlarmTone(alarm.toneFrequency, alarm.toneSeconds) : null;
+  }
+
+  process(inputs, outputs) {
+    if (currentFrame >= this.nextAnchorFrame) {
+      this.nextAnchorFrame = currentFrame + this.anchorSize;
+      this.port.postMessage({ type: 'anchor', frame: currentFrame, epochSeconds: Date.now() / 1000 });
+    }
+    const input = inputs[0];
+    const output = outputs[0] && outputs[0][0];
+    if (!input || input.length === 0) {
+      // Let a tone that is already sounding finish
+      if (output && this.tone) for (let i = 0; i < output.length; i++) output[i] = this.tone.next();
+      return true;
+    }
+
+    // Mono analysis: the microphone is captured on the first channel
+    const channel = input[0];
+    if (this.ring) this.writeRing(channel);
+    else if (this.pcmChunk) this.capturePcm(channel);
+    const squares = this.squares;
+    for (let i = 0; i < channel.length; i++) {
+      const square = channel[i] * channel[i];
+      this.sum += square - squares[this.writeIndex];
+      squares[this.writeIndex] = square;
+      this.writeIndex++;
+      if (this.writeIndex === this.windowSize) {
+        this.writeIndex = 0;
+        this.resyncSum();
+      }
+      if (this.filled < this.windowSize) this.filled++;
+
+      this.sinceHop++;
+      if (this.sinceHop === this.hopSize) {
+        this.sinceHop = 0;
+        if (this.filled === this.windowSize) {
+          this.emitFrame(currentFrame + i + 1);
+        }
+      }
+
+      this.sinceInterval++;
+      if (this.sinceInterval === this.intervalSize) {
+        this.sinceInterval = 0;
+        this.emitInterval(currentFrame + i + 1);
+      }
+
+      if (output && this.tone) output[i] = this.tone.next();
+    }
+    return true;
+  }
+
+  // Samples first, then the new total with Atomics.store, so a reader that
+  // sees the total also sees the samples
+  writeRing(channel) {
+    const ring = this.ring;
+    const capacity = ring.data.length;
+    if (ring.count === 0) ring.origin[0] = currentFrame;
+    // Quanta rendered without input leave a gap; fill it with silence so a
+    // sample's ring index keeps mapping to its capture frame
+    const gap = currentFrame - (ring.origin[0] + ring.count);
+    if (gap > 0) {
+      for (let i = 0; i < Math.min(gap, capacity); i++) ring.data[(ring.count + gap - 1 - i) % capacity] = 0;
+      ring.count += gap;
+    }
+    const start = ring.count % capacity;
+    const first = Math.min(channel.length, capacity - start);
+    ring.data.set(first === channel.length ? channel : channel.subarray(0, first), start);
+    if (first < channel.length) ring.data.set(channel.subarray(first), 0);
+    ring.count += channel.length;
+    Atomics.store(ring.written, 0, BigInt(ring.count));
+  }
+
+  capturePcm(channel) {
+    let offset = 0;
+    while (offset < channel.length) {
+      if (this.pcmFill === 0) this.pcmStartFrame = currentFrame + offset;
+      const count = Math.min(channel.length - offset, this.pcmChunkSize - this.pcmFill);
+      this.pcmChunk.set(channel.subarray(offset, offset + count), this.pcmFill);
+      this.pcmFill += count;
+      offset += count;
+      if (this.pcmFill === this.pcmChunkSize) {
+        const samples = this.pcmChunk;
+        this.port.postMessage({ type: 'pcm', samples, frame: this.pcmStartFrame }, [samples.buffer]);
+        this.pcmChunk = new Float32Array(this.pcmChunkSize);
+        this.pcmFill = 0;
+      }
+    }
+  }
+
+  // Recompute the sum once per window so float rounding from the running
+  // add/subtract never accumulates; amortised O(1) per sample
+  resyncSum() {
+    let sum = 0;
+    for (let i = 0; i < this.windowSize; i++) sum += this.squares[i];
+    this.sum = sum;
+  }
+
+  emitFrame(frame) {
+    const rms = Math.sqrt(Math.max(0, this.sum) / this.windowSize);
+    if (rms < this.intervalMin) this.intervalMin = rms;
+    if (rms > this.intervalMax) this.intervalMax = rms;
+    this.intervalSum += rms;
+    this.intervalCount++;
+    this.port.postMessage({ type: 'frame', rms, frame });
+    if (this.alarm) this.checkAlarm(rms, frame);
+  }
+
+  checkAlarm(rms, frame) {
+    const alarm = this.alarm;
+    if (alarm.active) {
+      if (rms < alarm.releaseLevel) {
+        alarm.active = false;
+        return;
+      }
+    } else if (rms > alarm.threshold) {
+      alarm.active = true;
+    } else {
+      return;
+    }
+
+    if (frame - alarm.lastTriggerFrame >= alarm.cooldownFrames) {
+      alarm.lastTriggerFrame = frame;
+      if (this.tone) this.tone.start();
+      this.port.postMessage({ type: 'alarm', rms, frame });
+    }
+  }
+
+  emitInterval(frame) {
+    if (this.intervalCount === 0) return;
+    this.port.postMessage({
+      type: 'interval',
+      min: this.intervalMin,
+      max: this.intervalMax,
+      mean: this.intervalSum / this.intervalCount,
+      count: this.intervalCount,
+      frame
+    });
+    this.intervalMin = Infinity;
+    this.intervalMax = 0;
+    this.intervalSum = 0;
+    this.intervalCount = 0;
+  }
+}
+
+registerProcessor('rms-processor', RmsProcessor);
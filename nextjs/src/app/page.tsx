@@ -1,177 +1,280 @@
 'use client';
 
 import { useEffect, useRef, useState } from 'react';
-import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend, Chart } from 'chart.js';
-import { Line } from 'react-chartjs-2';
-
-// Global variables for Chart.js plugin
-let globalLastBeepTime = 0;
-let globalPlayBeep: (() => void) | null = null;
-
-// Chart.js plugin for synchronized beeping
-const beepPlugin = {
-  id: 'beepPlugin',
-  afterDraw: (chart: Chart) => {
-    // Check if we have new red points that need beeping
-    const dataset = chart.data.datasets[0]; // RMS dataset
-    if (!dataset || !dataset.data) return;
-
-    const currentDataLength = dataset.data.length;
-    if (currentDataLength > 0) {
-      const lastPoint = dataset.data[currentDataLength - 1];
-      if (lastPoint !== null && typeof lastPoint === 'number' && lastPoint > THRESHOLD) {
-        // Beep if cooldown allows
-        if (globalPlayBeep && Date.now() - globalLastBeepTime > 2000) {
-          globalLastBeepTime = Date.now();
-          globalPlayBeep();
-        }
-      }
-    }
-  }
-};
-
-ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend, beepPlugin);
+import RmsChart from '@/components/RmsChart';
+import SessionChart from '@/components/SessionChart';
+import StoredHistoryChart from '@/components/StoredHistoryChart';
+import { EventClipRecorder, type EventClip } from '@/lib/audio/EventClipRecorder';
+import { RmsEngine, frameToEpoch, type ClockAnchor, type RmsBlock, type RmsSummary } from '@/lib/audio/RmsEngine';
+import { SharedCapture, type CaptureSession, type CaptureState } from '@/lib/audio/SharedCapture';
+import { encodeWav } from '@/lib/audio/wav';
+import { LodPyramid } from '@/lib/history/LodPyramid';
+import { RmsHistory } from '@/lib/history/RmsHistory';
+import { UploadQueue } from '@/lib/persistence/UploadQueue';
+import type { UploadStatus } from '@/lib/persistence/uploadMessages';
+import type { RmsStreamInfo } from '@/lib/persistence/wireFormat';
+import { SessionRecorder, type RecordingProgress } from '@/lib/recording/SessionRecorder';
 
 const THRESHOLD = 0.05;
 const SAMPLE_RATE = 44100;
+const RMS_WINDOW_SIZE = 2048;
+const RMS_HOP_SIZE = 512;
+const DISPLAY_INTERVAL_S = 0.5;
+const GRAPH_INTERVAL_S = 1;
+const HISTORY_CAPACITY = 50; // Points kept for the continuous session view
+const PCM_CHUNK_SIZE = 2048;
+const CLIP_BUFFER_S = 10; // Rolling PCM kept for pre-trigger audio
+const CLIP_PRE_S = 3;
+const CLIP_POST_S = 5;
+const MAX_CLIPS = 20;
+const RECORDING_CHUNK_S = 1; // Full-session recording is persisted in chunks of this length
+
+interface SavedClip {
+  id: number;
+  url: string;
+  recordedAt: string;
+  durationSeconds: number;
+  peakRms: number;
+}
 
 export default function AudioAlarm() {
-  const [rmsData, setRmsData] = useState<{ time: number; rms: number }[]>([]);
+  // Lazily created once; the ring buffer itself is mutated in place
+  const [history] = useState(() => new RmsHistory(HISTORY_CAPACITY));
+  const [pyramid] = useState(() => new LodPyramid());
   const [currentRms, setCurrentRms] = useState<number>(0);
   const [isMonitoring, setIsMonitoring] = useState(false);
-  const audioContextRef = useRef<AudioContext | null>(null);
-  const analyserRef = useRef<AnalyserNode | null>(null);
-  const microphoneRef = useRef<MediaStreamAudioSourceNode | null>(null);
-  const streamRef = useRef<MediaStream | null>(null);
-  const animationFrameRef = useRef<number | null>(null);
-  const intervalRef = useRef<NodeJS.Timeout | null>(null);
-  const rmsDisplayIntervalRef = useRef<NodeJS.Timeout | null>(null);
-  const startTimeRef = useRef<number>(0);
-  const lastBeepTimeRef = useRef<number>(0);
-  const lastGraphUpdateRef = useRef<number>(0);
-
-  const playBeep = () => {
-    if (!audioContextRef.current) return;
-    const oscillator = audioContextRef.current.createOscillator();
-    const gainNode = audioContextRef.current.createGain();
-
-    oscillator.connect(gainNode);
-    gainNode.connect(audioContextRef.current.destination);
-
-    oscillator.frequency.setValueAtTime(800, audioContextRef.current.currentTime);
-    oscillator.type = 'square';
-
-    gainNode.gain.setValueAtTime(1, audioContextRef.current.currentTime);
-    gainNode.gain.exponentialRampToValueAtTime(0.01, audioContextRef.current.currentTime + 0.5);
-
-    oscillator.start(audioContextRef.current.currentTime);
-    oscillator.stop(audioContextRef.current.currentTime + 0.5);
+  const [isStarting, setIsStarting] = useState(false);
+  const [captureRole, setCaptureRole] = useState<CaptureState['role']>('stopped');
+  const [clips, setClips] = useState<SavedClip[]>([]);
+  const [recordSession, setRecordSession] = useState(false);
+  const [persistRms, setPersistRms] = useState(false);
+  const [recording, setRecording] = useState<RecordingProgress | null>(null);
+  const [uploadStatus, setUploadStatus] = useState<UploadStatus | null>(null);
+  const captureRef = useRef<SharedCapture | null>(null);
+  const sampleRateRef = useRef<number>(SAMPLE_RATE);
+  const leaderSubscriptionsRef = useRef<(() => void)[]>([]);
+  const sessionRecorderRef = useRef<SessionRecorder | null>(null);
+  const uploadQueueRef = useRef<UploadQueue | null>(null);
+  const rmsStreamRef = useRef<RmsStreamInfo | null>(null); // set while RMS is being saved
+  const subscriptionsRef = useRef<(() => void)[]>([]);
+  const sessionRef = useRef<CaptureSession | null>(null);
+  const sessionOffsetRef = useRef<number>(0); // history time of the session's frame 0
+  const anchorRef = useRef<ClockAnchor | null>(null);
+  const lastDisplayFrameRef = useRef<number>(0);
+  const clipUrlsRef = useRef<Set<string>>(new Set());
+
+  // Per-hop frames drive the current RMS display on the capture clock;
+  // a hidden page skips the re-render
+  const handleRmsBlock = (block: RmsBlock) => {
+    const sampleRate = sampleRateRef.current;
+
+    if (!document.hidden && block.frame - lastDisplayFrameRef.current >= sampleRate * DISPLAY_INTERVAL_S) {
+      lastDisplayFrameRef.current = block.frame;
+      setCurrentRms(block.rms);
+    }
   };
 
-  const calculateRMS = (buffer: Float32Array) => {
-    let sum = 0;
-    for (let i = 0; i < buffer.length; i++) {
-      sum += buffer[i] * buffer[i];
-    }
-    return Math.sqrt(sum / buffer.length);
+  // Each graph tick plots the loudest window of the interval so short
+  // transients between ticks still show up, alongside the interval mean.
+  // Points are placed by their capture-clock frame, so they line up exactly
+  // with recorded chunks and stored samples of the same session.
+  const handleRmsSummary = (summary: RmsSummary) => {
+    const session = sessionRef.current;
+    if (!session) return; // a follower has not heard from the leader yet
+    const time = sessionOffsetRef.current + summary.frame / session.sampleRate;
+    history.append(time, summary.max, summary.mean);
+    pyramid.append(time, summary.min, summary.max, summary.mean, summary.count);
+    const stream = rmsStreamRef.current;
+    if (stream) uploadQueueRef.current?.addRms(stream, summary.frame, summary.max, summary.mean);
   };
 
-  const checkAlarm = () => {
-    if (!analyserRef.current) return;
+  // Wall-clock date of a capture frame, via the latest clock anchor
+  const clipDate = (frame: number, sampleRate: number) => {
+    const anchor = anchorRef.current;
+    return anchor ? new Date(frameToEpoch(anchor, frame, sampleRate) * 1000) : new Date();
+  };
 
-    const bufferLength = analyserRef.current.frequencyBinCount;
-    const dataArray = new Float32Array(bufferLength);
-    analyserRef.current.getFloatTimeDomainData(dataArray);
+  // A new session (another tab took over the capture) restarts the capture
+  // clock; its frame 0 is placed after the previous session by wall clock
+  const setSession = (session: CaptureSession) => {
+    const previous = sessionRef.current;
+    if (previous?.sessionId === session.sessionId) return;
+    if (previous) sessionOffsetRef.current += session.clockOrigin - previous.clockOrigin;
+    sessionRef.current = session;
+    anchorRef.current = { frame: 0, epochSeconds: session.clockOrigin };
+    lastDisplayFrameRef.current = 0;
+  };
 
-    const rms = calculateRMS(dataArray);
+  const handleEventClip = (clip: EventClip) => {
+    const url = URL.createObjectURL(encodeWav(clip.samples, clip.sampleRate));
+    clipUrlsRef.current.add(url);
+    const saved: SavedClip = {
+      id: clip.triggerFrame,
+      url,
+      recordedAt: clipDate(clip.triggerFrame, clip.sampleRate).toLocaleTimeString(),
+      durationSeconds: clip.samples.length / clip.sampleRate,
+      peakRms: clip.peakRms
+    };
+    setClips(prev => {
+      const next = [saved, ...prev];
+      next.slice(MAX_CLIPS).forEach(dropped => {
+        URL.revokeObjectURL(dropped.url);
+        clipUrlsRef.current.delete(dropped.url);
+      });
+      return next.slice(0, MAX_CLIPS);
+    });
+  };
 
-    if (rms > THRESHOLD) {
-      // Alarm logic can be added here if needed
+  // Consumers that need this tab's own capture (PCM and alarm events): event
+  // clips, session recording and uploads. Attached whenever this tab becomes
+  // the capture leader, including when it takes over from a closed tab.
+  const attachLeader = (engine: RmsEngine, session: CaptureSession) => {
+    const recorder = new EventClipRecorder({
+      sampleRate: session.sampleRate,
+      bufferSeconds: CLIP_BUFFER_S,
+      preSeconds: CLIP_PRE_S,
+      postSeconds: CLIP_POST_S
+    });
+    leaderSubscriptionsRef.current = [
+      engine.subscribePcm(chunk => recorder.write(chunk)),
+      engine.subscribeAlarm(event => recorder.trigger(event)),
+      recorder.subscribe(handleEventClip)
+    ];
+
+    if (recordSession) {
+      const sessionRecorder = new SessionRecorder({ chunkSeconds: RECORDING_CHUNK_S });
+      sessionRecorderRef.current = sessionRecorder;
+      // Connected before start so the Ogg header chunk is uploaded too
+      if (persistRms) uploadQueueRef.current?.connectRecorder(sessionRecorder);
+      leaderSubscriptionsRef.current.push(sessionRecorder.subscribe(setRecording));
+      // With a shared PCM ring the recorder worker reads the audio directly
+      const ring = engine.pcmRing;
+      if (ring) {
+        sessionRecorder.start(session.sessionId, session.sampleRate, ring);
+      } else {
+        leaderSubscriptionsRef.current.push(engine.subscribePcm(chunk => sessionRecorder.write(chunk)));
+        sessionRecorder.start(session.sessionId, session.sampleRate);
+      }
     }
 
-    animationFrameRef.current = requestAnimationFrame(checkAlarm);
+    if (persistRms) {
+      rmsStreamRef.current = {
+        sessionId: session.sessionId,
+        sampleRate: session.sampleRate,
+        threshold: THRESHOLD,
+        hopFrames: Math.max(1, Math.round(session.sampleRate * GRAPH_INTERVAL_S)),
+        clockOrigin: session.clockOrigin
+      };
+    }
   };
 
-  const updateCurrentRms = () => {
-    if (!analyserRef.current) return;
-
-    const bufferLength = analyserRef.current.frequencyBinCount;
-    const dataArray = new Float32Array(bufferLength);
-    analyserRef.current.getFloatTimeDomainData(dataArray);
-
-    const rms = calculateRMS(dataArray);
-    setCurrentRms(rms);
+  const detachLeader = () => {
+    leaderSubscriptionsRef.current.forEach(unsubscribe => unsubscribe());
+    leaderSubscriptionsRef.current = [];
+    if (rmsStreamRef.current) {
+      rmsStreamRef.current = null;
+      uploadQueueRef.current?.flush();
+    }
+    if (sessionRecorderRef.current) {
+      sessionRecorderRef.current.dispose();
+      sessionRecorderRef.current = null;
+    }
   };
 
-  const updateGraph = () => {
-    if (!analyserRef.current) return;
-
-    const bufferLength = analyserRef.current.frequencyBinCount;
-    const dataArray = new Float32Array(bufferLength);
-    analyserRef.current.getFloatTimeDomainData(dataArray);
-
-    const rms = calculateRMS(dataArray);
-    const currentTime = (Date.now() - startTimeRef.current) / 1000;
-
-    setRmsData(prev => {
-      const newData = [...prev, { time: currentTime, rms }];
-      return newData.slice(-50); // Keep last 50 points for continuous session view
-    });
+  const handleCaptureState = (state: CaptureState) => {
+    setCaptureRole(state.role);
+    if (state.role === 'stopped') {
+      // e.g. the leader tab stopped monitoring
+      stopMonitoring();
+      return;
+    }
+    if (state.session) {
+      sampleRateRef.current = state.session.sampleRate;
+      setSession(state.session);
+    }
+    if (state.role === 'leader') attachLeader(state.engine, state.session);
   };
 
+  // Captures in this tab, or follows the capture another tab already runs
   const startMonitoring = async () => {
-    try {
-      setRmsData([]); // Clear previous data
-      const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-      streamRef.current = stream;
-
-      audioContextRef.current = new (window.AudioContext || (window as Window & { webkitAudioContext?: typeof AudioContext }).webkitAudioContext)();
-      analyserRef.current = audioContextRef.current.createAnalyser();
-      analyserRef.current.fftSize = 2048;
-      analyserRef.current.smoothingTimeConstant = 0.8;
+    history.clear(); // Clear previous data
+    pyramid.clear();
+    sessionRef.current = null;
+    sessionOffsetRef.current = 0;
+    anchorRef.current = null;
+    lastDisplayFrameRef.current = 0;
+
+    const capture = new SharedCapture(
+      () =>
+        new RmsEngine({
+          windowSize: RMS_WINDOW_SIZE,
+          hopSize: RMS_HOP_SIZE,
+          intervalSeconds: GRAPH_INTERVAL_S,
+          pcmChunkSize: PCM_CHUNK_SIZE,
+          // Detected and sounded on the audio thread, unaffected by tab throttling
+          alarm: { threshold: THRESHOLD }
+        })
+    );
+    captureRef.current = capture;
+    subscriptionsRef.current = [
+      capture.subscribe(handleRmsBlock),
+      capture.subscribeSummary(handleRmsSummary),
+      capture.subscribeAnchor(anchor => {
+        anchorRef.current = anchor;
+      }),
+      capture.subscribeState(handleCaptureState)
+    ];
+    // Stop is offered only once start() has settled; until then the page
+    // may be waiting on the permission prompt
+    setIsStarting(true);
 
-      microphoneRef.current = audioContextRef.current.createMediaStreamSource(stream);
-      microphoneRef.current.connect(analyserRef.current);
-
-      startTimeRef.current = Date.now();
-      lastGraphUpdateRef.current = Date.now();
-      setIsMonitoring(true);
-      checkAlarm();
-      intervalRef.current = setInterval(updateGraph, 1000);
-      rmsDisplayIntervalRef.current = setInterval(updateCurrentRms, 500);
+    try {
+      await capture.start();
+      // Still ours unless the capture stopped (or the page went away) meanwhile
+      if (captureRef.current === capture) setIsMonitoring(true);
     } catch (error) {
-      console.error('Error accessing microphone:', error);
-      alert('Microphone access denied or not available.');
+      if (captureRef.current === capture) {
+        console.error('Error accessing microphone:', error);
+        alert('Microphone access denied or not available.');
+        stopMonitoring();
+      }
+    } finally {
+      setIsStarting(false);
     }
   };
 
   const stopMonitoring = () => {
-    if (animationFrameRef.current) {
-      cancelAnimationFrame(animationFrameRef.current);
-    }
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current);
-    }
-    if (rmsDisplayIntervalRef.current) {
-      clearInterval(rmsDisplayIntervalRef.current);
-    }
-    if (streamRef.current) {
-      streamRef.current.getTracks().forEach(track => track.stop());
-    }
-    if (audioContextRef.current) {
-      audioContextRef.current.close();
+    subscriptionsRef.current.forEach(unsubscribe => unsubscribe());
+    subscriptionsRef.current = [];
+    detachLeader();
+    if (captureRef.current) {
+      captureRef.current.stop();
+      captureRef.current = null;
     }
     setIsMonitoring(false);
+    setCaptureRole('stopped');
+    setRecording(null);
     setCurrentRms(0); // Reset current RMS when stopping
   };
 
+  // Created on load, not on start, so uploads left by an earlier visit drain
   useEffect(() => {
-    // Set global functions for Chart.js plugin
-    globalPlayBeep = playBeep;
-    globalLastBeepTime = lastBeepTimeRef.current;
+    const queue = new UploadQueue();
+    uploadQueueRef.current = queue;
+    const unsubscribe = queue.subscribe(setUploadStatus);
+    return () => {
+      unsubscribe();
+      queue.dispose();
+      uploadQueueRef.current = null;
+    };
+  }, []);
 
+  useEffect(() => {
+    const clipUrls = clipUrlsRef.current;
     return () => {
       stopMonitoring();
+      clipUrls.forEach(url => URL.revokeObjectURL(url));
+      clipUrls.clear();
     };
   }, []);
 
@@ -187,9 +290,10 @@ export default function AudioAlarm() {
             {!isMonitoring ? (
               <button
                 onClick={startMonitoring}
-                className="bg-blue-500 hover:bg-blue-600 text-white font-bold py-2 px-4 rounded"
+                disabled={isStarting}
+                className="bg-blue-500 hover:bg-blue-600 disabled:opacity-50 text-white font-bold py-2 px-4 rounded"
               >
-                Start Monitoring
+                {isStarting ? 'Starting…' : 'Start Monitoring'}
               </button>
             ) : (
               <button
@@ -209,59 +313,53 @@ export default function AudioAlarm() {
                   {currentRms.toFixed(5)}
                 </div>
               </div>
+              {captureRole === 'follower' && (
+                <div className="text-sm text-gray-600 dark:text-gray-400 mt-2">
+                  Showing the microphone captured in another tab
+                </div>
+              )}
+              {recording && (
+                <div className="text-sm text-gray-600 dark:text-gray-400 mt-2">
+                  Recording {recording.format || '…'} to {recording.backend || '…'}: {recording.chunks} chunks ({(recording.totalBytes / 1e6).toFixed(1)} MB)
+                </div>
+              )}
             </div>
           )}
 
           <div className="h-96">
-            <Line
-              data={{
-                labels: rmsData.map((_, index) => index),
-                datasets: [
-                  {
-                    label: 'RMS Value',
-                    data: rmsData.map(d => d.rms),
-                    borderColor: 'rgba(75, 192, 192, 1)',
-                    backgroundColor: 'rgba(75, 192, 192, 0.2)',
-                    fill: false,
-                    pointRadius: 5,
-                    pointBackgroundColor: function(context: { parsed?: { y: number } }) {
-                      return context.parsed && context.parsed.y > THRESHOLD ? 'red' : 'rgba(75, 192, 192, 1)';
-                    }
-                  },
-                  {
-                    label: 'Threshold',
-                    data: rmsData.map(() => THRESHOLD),
-                    borderColor: 'rgba(255, 99, 132, 1)',
-                    borderDash: [5, 5],
-                    fill: false,
-                    pointRadius: 0
-                  }
-                ]
-              }}
-              options={{
-                scales: {
-                  x: {
-                    type: 'linear',
-                    position: 'bottom',
-                    title: {
-                      display: true,
-                      text: 'Time (s)'
-                    }
-                  },
-                  y: {
-                    title: {
-                      display: true,
-                      text: 'RMS'
-                    }
-                  }
-                },
-                animation: false,
-                maintainAspectRatio: false
-              }}
-            />
+            <RmsChart history={history} threshold={THRESHOLD} />
+          </div>
+
+          <h2 className="text-xl font-semibold mt-6 mb-2 text-gray-800 dark:text-white">Session Overview</h2>
+          <p className="text-sm text-gray-500 dark:text-gray-400 mb-2">
+            Scroll to zoom, drag to pan, double-click to show the whole session
+          </p>
+          <div className="h-64">
+            <SessionChart pyramid={pyramid} threshold={THRESHOLD} />
           </div>
         </div>
 
+        <div className="bg-white dark:bg-gray-800 rounded-lg shadow-lg p-6 mb-6">
+          <h2 className="text-xl font-semibold mb-4 text-gray-800 dark:text-white">Stored History</h2>
+          <StoredHistoryChart threshold={THRESHOLD} />
+        </div>
+
+        {clips.length > 0 && (
+          <div className="bg-white dark:bg-gray-800 rounded-lg shadow-lg p-6 mb-6">
+            <h2 className="text-xl font-semibold mb-4 text-gray-800 dark:text-white">Alarm Recordings</h2>
+            <ul className="space-y-3">
+              {clips.map(clip => (
+                <li key={clip.id} className="flex flex-col md:flex-row md:items-center gap-2">
+                  <span className="text-sm font-mono text-gray-700 dark:text-gray-300">
+                    {clip.recordedAt} · {clip.durationSeconds.toFixed(1)} s · peak {clip.peakRms.toFixed(5)}
+                  </span>
+                  <audio controls src={clip.url} className="md:ml-auto" />
+                </li>
+              ))}
+            </ul>
+          </div>
+        )}
+
         <div className="bg-white dark:bg-gray-800 rounded-lg shadow-lg p-6">
           <h2 className="text-xl font-semibold mb-4 text-gray-800 dark:text-white">Settings</h2>
           <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
@@ -281,6 +379,42 @@ export default function AudioAlarm() {
                 Audio sampling rate
               </p>
             </div>
+            <div>
+              <label className="flex items-center gap-2 text-sm font-medium text-gray-700 dark:text-gray-300">
+                <input
+                  type="checkbox"
+                  checked={recordSession}
+                  disabled={isMonitoring || isStarting}
+                  onChange={event => setRecordSession(event.target.checked)}
+                />
+                Record session audio
+              </label>
+              <p className="text-sm text-gray-500 dark:text-gray-400">
+                Persist the full microphone stream as Opus (PCM fallback) in {RECORDING_CHUNK_S} s chunks to browser storage; done by the tab that owns the capture
+              </p>
+            </div>
+            <div>
+              <label className="flex items-center gap-2 text-sm font-medium text-gray-700 dark:text-gray-300">
+                <input
+                  type="checkbox"
+                  checked={persistRms}
+                  disabled={isMonitoring || isStarting}
+                  onChange={event => setPersistRms(event.target.checked)}
+                />
+                Save RMS to database
+              </label>
+              <p className="text-sm text-gray-500 dark:text-gray-400">
+                Queue RMS samples, and the session audio when recorded, for batched upload to the SQLite ingest
+                service; kept in browser storage until delivered
+              </p>
+              {uploadStatus && (uploadStatus.pending > 0 || uploadStatus.lastError) && (
+                <p className="text-sm text-gray-500 dark:text-gray-400">
+                  {uploadStatus.pending} waiting ({(uploadStatus.pendingBytes / 1e6).toFixed(1)} MB)
+                  {uploadStatus.lastError &&
+                    ` · ${uploadStatus.lastError}, retrying in ${Math.ceil(uploadStatus.retryDelayMs / 1000)} s`}
+                </p>
+              )}
+            </div>
           </div>
         </div>
       </div>
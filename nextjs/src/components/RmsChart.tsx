@@ -0,0 +1,160 @@
+'use client';
+
+import { memo, useEffect, useRef, useState } from 'react';
+import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend, type ChartData, type ChartOptions } from 'chart.js';
+import { Line } from 'react-chartjs-2';
+import type { RmsHistory } from '@/lib/history/RmsHistory';
+import { visibleRedraw } from '@/lib/visibleRedraw';
+
+ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend);
+
+const NORMAL_COLOR = 'rgba(75, 192, 192, 1)';
+const ALARM_COLOR = 'red';
+
+interface RmsChartProps {
+  history: RmsHistory;
+  threshold: number;
+}
+
+const chartOptions: ChartOptions<'line'> = {
+  scales: {
+    x: {
+      type: 'linear',
+      position: 'bottom',
+      title: {
+        display: true,
+        text: 'Time (s)'
+      }
+    },
+    y: {
+      title: {
+        display: true,
+        text: 'RMS'
+      }
+    }
+  },
+  animation: false,
+  maintainAspectRatio: false
+};
+
+// Chart layer that mirrors an RmsHistory incrementally: each append pushes
+// one point (its capture-clock time and a colour computed once, at append
+// time) into the live Chart.js arrays, shifts the oldest one out when full
+// and redraws with update('none'). The arrays are only rebuilt, from the
+// history's zero-copy segments, on mount, clear or a threshold change.
+// React never re-renders this component for new data, and nothing is drawn
+// while the page is hidden.
+function RmsChart({ history, threshold }: RmsChartProps) {
+  const chartRef = useRef<ChartJS<'line'> | null>(null);
+
+  // Initial (empty) data object; Chart.js owns and mutates its own copy
+  const [initialData] = useState<ChartData<'line', number[], number>>(() => ({
+    labels: [],
+    datasets: [
+      {
+        label: 'RMS Value (max)',
+        data: [],
+        borderColor: NORMAL_COLOR,
+        backgroundColor: 'rgba(75, 192, 192, 0.2)',
+        fill: false,
+        pointRadius: 5,
+        pointBackgroundColor: []
+      },
+      {
+        label: 'RMS Value (mean)',
+        data: [],
+        borderColor: 'rgba(54, 162, 235, 1)',
+        backgroundColor: 'rgba(54, 162, 235, 0.2)',
+        fill: false,
+        pointRadius: 0
+      },
+      {
+        label: 'Threshold',
+        data: [],
+        borderColor: 'rgba(255, 99, 132, 1)',
+        borderDash: [5, 5],
+        fill: false,
+        pointRadius: 0
+      }
+    ]
+  }));
+
+  useEffect(() => {
+    const chart = chartRef.current;
+    if (!chart) return;
+
+    const labels = chart.data.labels as number[];
+    const [maxSet, meanSet, thresholdSet] = chart.data.datasets;
+    const maxValues = maxSet.data as number[];
+    const meanValues = meanSet.data as number[];
+    const thresholdValues = thresholdSet.data as number[];
+    const colors = maxSet.pointBackgroundColor as string[];
+
+    // Full rebuild from the history's zero-copy segments: only when the
+    // effect (re)starts, i.e. on mount or a threshold change, and on clear
+    const rebuild = () => {
+      const length = history.length;
+      labels.length = length;
+      maxValues.length = length;
+      meanValues.length = length;
+      thresholdValues.length = length;
+      colors.length = length;
+      let i = 0;
+      for (const { times, values, means } of history.segments()) {
+        for (let j = 0; j < times.length; j++, i++) {
+          labels[i] = times[j];
+          maxValues[i] = values[j];
+          meanValues[i] = means[j];
+          thresholdValues[i] = threshold;
+          colors[i] = values[j] > threshold ? ALARM_COLOR : NORMAL_COLOR;
+        }
+      }
+    };
+
+    // One point per append; its colour is computed here, once
+    const push = (time: number, value: number, mean: number) => {
+      if (maxValues.length === history.capacity) {
+        // Full: slide the window; the threshold line stays as it is
+        labels.shift();
+        maxValues.shift();
+        meanValues.shift();
+        colors.shift();
+      } else {
+        thresholdValues.push(threshold);
+      }
+      labels.push(time);
+      maxValues.push(value);
+      meanValues.push(mean);
+      colors.push(value > threshold ? ALARM_COLOR : NORMAL_COLOR);
+    };
+
+    // update('none') only when the history moved since the last draw
+    let drawnVersion = -1;
+    const redraw = visibleRedraw(() => {
+      if (history.version === drawnVersion) return;
+      drawnVersion = history.version;
+      chart.update('none');
+    });
+
+    rebuild();
+    redraw.request();
+
+    const unsubscribe = history.subscribe(() => {
+      if (history.length === 0) {
+        rebuild();
+      } else {
+        const newest = history.length - 1;
+        push(history.timeAt(newest), history.valueAt(newest), history.meanAt(newest));
+      }
+      redraw.request();
+    });
+    return () => {
+      unsubscribe();
+      redraw.dispose();
+    };
+  }, [history, threshold]);
+
+  return <Line ref={chartRef} data={initialData} options={chartOptions} />;
+}
+
+export default memo(RmsChart);
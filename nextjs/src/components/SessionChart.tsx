@@ -0,0 +1,206 @@
+'use client';
+
+import { memo, useEffect, useRef, useState } from 'react';
+import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Filler, Title, Tooltip, Legend, type ChartData, type ChartOptions } from 'chart.js';
+import { Line } from 'react-chartjs-2';
+import type { LodPyramid } from '@/lib/history/LodPyramid';
+import { visibleRedraw } from '@/lib/visibleRedraw';
+
+ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Filler, Title, Tooltip, Legend);
+
+interface SessionChartProps {
+  pyramid: LodPyramid;
+  threshold: number;
+}
+
+// Narrowest visible range, and how fast the wheel zooms (per deltaY unit)
+const MIN_SPAN_S = 5;
+const ZOOM_RATE = 0.002;
+
+interface TimeRange {
+  start: number;
+  end: number;
+}
+
+const chartOptions: ChartOptions<'line'> = {
+  scales: {
+    x: {
+      type: 'linear',
+      position: 'bottom',
+      title: {
+        display: true,
+        text: 'Session time (s)'
+      }
+    },
+    y: {
+      title: {
+        display: true,
+        text: 'RMS'
+      }
+    }
+  },
+  animation: false,
+  maintainAspectRatio: false,
+  elements: {
+    point: { radius: 0 }
+  }
+};
+
+// Whole-session overview drawn from the level-of-detail pyramid. Each redraw
+// asks for at most one bucket per horizontal pixel of the visible time range,
+// so the point count stays bounded by the chart width however long the
+// session runs, and a zoom or pan costs one binary search plus the visible
+// buckets. The wheel zooms around the cursor, dragging pans and a double
+// click returns to the whole session, which then follows new data again.
+// While the page is hidden the pyramid keeps growing but nothing is queried
+// or drawn.
+function SessionChart({ pyramid, threshold }: SessionChartProps) {
+  const chartRef = useRef<ChartJS<'line'> | null>(null);
+
+  const [initialData] = useState<ChartData<'line', number[], number>>(() => ({
+    labels: [],
+    datasets: [
+      {
+        label: 'Max',
+        data: [],
+        borderColor: 'rgba(75, 192, 192, 1)',
+        backgroundColor: 'rgba(75, 192, 192, 0.2)',
+        fill: false
+      },
+      {
+        label: 'Min',
+        data: [],
+        borderColor: 'rgba(75, 192, 192, 0.4)',
+        backgroundColor: 'rgba(75, 192, 192, 0.2)',
+        fill: '-1'
+      },
+      {
+        label: 'Mean',
+        data: [],
+        borderColor: 'rgba(54, 162, 235, 1)',
+        fill: false
+      },
+      {
+        label: 'Threshold',
+        data: [],
+        borderColor: 'rgba(255, 99, 132, 1)',
+        borderDash: [5, 5],
+        fill: false
+      }
+    ]
+  }));
+
+  useEffect(() => {
+    const chart = chartRef.current;
+    if (!chart) return;
+
+    const labels = chart.data.labels as number[];
+    const [maxSet, minSet, meanSet, thresholdSet] = chart.data.datasets;
+    const maxValues = maxSet.data as number[];
+    const minValues = minSet.data as number[];
+    const meanValues = meanSet.data as number[];
+    const thresholdValues = thresholdSet.data as number[];
+    const xScale = chart.options.scales!.x!;
+    const canvas = chart.canvas;
+
+    // Zoomed range; null shows the whole session
+    let range: TimeRange | null = null;
+
+    const draw = () => {
+      const width = Math.max(1, Math.floor(chart.chartArea ? chart.chartArea.width : chart.width));
+      const view = range ? pyramid.select(range.start, range.end, width) : pyramid.select(-Infinity, Infinity, width);
+
+      // Refill the existing arrays in place
+      labels.length = view.length;
+      maxValues.length = view.length;
+      minValues.length = view.length;
+      meanValues.length = view.length;
+      thresholdValues.length = view.length;
+      for (let i = 0; i < view.length; i++) {
+        labels[i] = view.times[i];
+        maxValues[i] = view.maxs[i];
+        minValues[i] = view.mins[i];
+        meanValues[i] = view.counts[i] > 0 ? view.sums[i] / view.counts[i] : 0;
+        thresholdValues[i] = threshold;
+      }
+      // The view includes the buckets straddling the range; clip to it
+      xScale.min = range ? range.start : undefined;
+      xScale.max = range ? range.end : undefined;
+      chart.update('none');
+    };
+
+    const redraw = visibleRedraw(draw);
+
+    // Clamps to the session; a range covering all of it resets the zoom
+    const setRange = (start: number, end: number) => {
+      const bounds = pyramid.bounds();
+      if (!bounds) return;
+      const span = Math.max(MIN_SPAN_S, end - start);
+      if (span >= bounds.end - bounds.start) {
+        range = null;
+      } else {
+        const clamped = Math.min(Math.max(start, bounds.start), bounds.end - span);
+        range = { start: clamped, end: clamped + span };
+      }
+      redraw.request();
+    };
+
+    const currentRange = (): TimeRange | null => range ?? pyramid.bounds();
+
+    const handleWheel = (event: WheelEvent) => {
+      const current = currentRange();
+      if (!current) return;
+      event.preventDefault();
+      const at = chart.scales.x.getValueForPixel(event.offsetX) ?? (current.start + current.end) / 2;
+      const factor = Math.exp(event.deltaY * ZOOM_RATE); // > 1 zooms out
+      setRange(at - (at - current.start) * factor, at + (current.end - at) * factor);
+    };
+
+    let drag: { x: number; range: TimeRange } | null = null;
+    const handlePointerDown = (event: PointerEvent) => {
+      if (!range) return; // nothing to pan while the whole session is shown
+      drag = { x: event.offsetX, range };
+      canvas.setPointerCapture(event.pointerId);
+    };
+    const handlePointerMove = (event: PointerEvent) => {
+      if (!drag) return;
+      const span = drag.range.end - drag.range.start;
+      const shift = ((event.offsetX - drag.x) / chart.scales.x.width) * span;
+      setRange(drag.range.start - shift, drag.range.end - shift);
+    };
+    const handlePointerUp = () => {
+      drag = null;
+    };
+    const handleDoubleClick = () => {
+      range = null;
+      redraw.request();
+    };
+
+    canvas.addEventListener('wheel', handleWheel, { passive: false });
+    canvas.addEventListener('pointerdown', handlePointerDown);
+    canvas.addEventListener('pointermove', handlePointerMove);
+    canvas.addEventListener('pointerup', handlePointerUp);
+    canvas.addEventListener('pointercancel', handlePointerUp);
+    canvas.addEventListener('dblclick', handleDoubleClick);
+
+    redraw.request();
+    const unsubscribe = pyramid.subscribe(() => {
+      if (pyramid.length === 0) range = null; // cleared for a new session
+      redraw.request();
+    });
+    return () => {
+      unsubscribe();
+      redraw.dispose();
+      canvas.removeEventListener('wheel', handleWheel);
+      canvas.removeEventListener('pointerdown', handlePointerDown);
+      canvas.removeEventListener('pointermove', handlePointerMove);
+      canvas.removeEventListener('pointerup', handlePointerUp);
+      canvas.removeEventListener('pointercancel', handlePointerUp);
+      canvas.removeEventListener('dblclick', handleDoubleClick);
+    };
+  }, [pyramid, threshold]);
+
+  return <Line ref={chartRef} data={initialData} options={chartOptions} />;
+}
+
+export default memo(SessionChart);
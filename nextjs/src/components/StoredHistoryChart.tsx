@@ -0,0 +1,185 @@
+'use client';
+
+import { memo, useCallback, useEffect, useRef, useState } from 'react';
+import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Filler, Title, Tooltip, Legend, type ChartData, type ChartOptions } from 'chart.js';
+import { Line } from 'react-chartjs-2';
+import { fetchRange, fetchSessions, type StoredSession } from '@/lib/persistence/storedHistory';
+
+ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Filler, Title, Tooltip, Legend);
+
+interface StoredHistoryChartProps {
+  threshold: number;
+}
+
+const RANGES: { label: string; seconds: number | null }[] = [
+  { label: 'Last hour', seconds: 3600 },
+  { label: 'Last day', seconds: 86400 },
+  { label: 'Last week', seconds: 7 * 86400 },
+  { label: 'Whole session', seconds: null }
+];
+
+const chartOptions: ChartOptions<'line'> = {
+  scales: {
+    x: {
+      type: 'linear',
+      position: 'bottom',
+      title: {
+        display: true,
+        text: 'Time before now (h)'
+      }
+    },
+    y: {
+      title: {
+        display: true,
+        text: 'RMS'
+      }
+    }
+  },
+  animation: false,
+  maintainAspectRatio: false,
+  elements: {
+    point: { radius: 0 }
+  }
+};
+
+// Stored RMS history from the SQLite backend. Each load asks the server for
+// one point per horizontal pixel; the server answers from its rollup tables.
+function StoredHistoryChart({ threshold }: StoredHistoryChartProps) {
+  const chartRef = useRef<ChartJS<'line'> | null>(null);
+  const [sessions, setSessions] = useState<StoredSession[]>([]);
+  const [sessionId, setSessionId] = useState('');
+  const [rangeIndex, setRangeIndex] = useState(RANGES.length - 1);
+  const [status, setStatus] = useState('');
+
+  const [initialData] = useState<ChartData<'line', number[], number>>(() => ({
+    labels: [],
+    datasets: [
+      {
+        label: 'Max',
+        data: [],
+        borderColor: 'rgba(75, 192, 192, 1)',
+        backgroundColor: 'rgba(75, 192, 192, 0.2)',
+        fill: false
+      },
+      {
+        label: 'Min',
+        data: [],
+        borderColor: 'rgba(75, 192, 192, 0.4)',
+        backgroundColor: 'rgba(75, 192, 192, 0.2)',
+        fill: '-1'
+      },
+      {
+        label: 'Mean',
+        data: [],
+        borderColor: 'rgba(54, 162, 235, 1)',
+        fill: false
+      },
+      {
+        label: 'Threshold',
+        data: [],
+        borderColor: 'rgba(255, 99, 132, 1)',
+        borderDash: [5, 5],
+        fill: false
+      }
+    ]
+  }));
+
+  const refreshSessions = useCallback(async () => {
+    try {
+      const list = await fetchSessions();
+      setSessions(list);
+      setSessionId(current => current || (list[0]?.session_id ?? ''));
+      setStatus(list.length === 0 ? 'No stored sessions yet' : '');
+    } catch (error) {
+      setStatus(`Stored history unavailable: ${error instanceof Error ? error.message : String(error)}`);
+    }
+  }, []);
+
+  useEffect(() => {
+    refreshSessions();
+  }, [refreshSessions]);
+
+  useEffect(() => {
+    const chart = chartRef.current;
+    const session = sessions.find(s => s.session_id === sessionId);
+    if (!chart || !session) return;
+
+    let cancelled = false;
+    const end = Date.now() / 1000;
+    const seconds = RANGES[rangeIndex].seconds;
+    const start = seconds === null ? session.created_at : end - seconds;
+    const width = chart.chartArea ? chart.chartArea.width : chart.width;
+
+    fetchRange(sessionId, start, end, width)
+      .then(range => {
+        if (cancelled) return;
+        const labels = chart.data.labels as number[];
+        const [maxSet, minSet, meanSet, thresholdSet] = chart.data.datasets;
+        const n = range.ts.length;
+        labels.length = n;
+        (maxSet.data as number[]).length = 0;
+        (minSet.data as number[]).length = 0;
+        (meanSet.data as number[]).length = 0;
+        (thresholdSet.data as number[]).length = 0;
+        for (let i = 0; i < n; i++) {
+          labels[i] = (range.ts[i] - end) / 3600;
+          (maxSet.data as number[]).push(range.max[i]);
+          (minSet.data as number[]).push(range.min[i]);
+          (meanSet.data as number[]).push(range.mean[i]);
+          (thresholdSet.data as number[]).push(session.threshold ?? threshold);
+        }
+        chart.update('none');
+        const alarms = range.above.reduce((total, count) => total + count, 0);
+        const resolution = range.resolution === 0 ? 'raw samples' : `${Number(range.resolution.toPrecision(3))} s buckets`;
+        setStatus(`${n} points at ${resolution}, ${alarms} samples above threshold`);
+      })
+      .catch(error => {
+        if (!cancelled) setStatus(`Range query failed: ${error instanceof Error ? error.message : String(error)}`);
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [sessions, sessionId, rangeIndex, threshold]);
+
+  return (
+    <div>
+      <div className="flex flex-wrap gap-2 items-center mb-2">
+        <select
+          value={sessionId}
+          onChange={event => setSessionId(event.target.value)}
+          className="border rounded px-2 py-1 text-sm dark:bg-gray-700 dark:text-white"
+        >
+          {sessions.map(session => (
+            <option key={session.session_id} value={session.session_id}>
+              {new Date(session.created_at * 1000).toLocaleString()}
+            </option>
+          ))}
+        </select>
+        <select
+          value={rangeIndex}
+          onChange={event => setRangeIndex(Number(event.target.value))}
+          className="border rounded px-2 py-1 text-sm dark:bg-gray-700 dark:text-white"
+        >
+          {RANGES.map((range, index) => (
+            <option key={range.label} value={index}>
+              {range.label}
+            </option>
+          ))}
+        </select>
+        <button
+          onClick={refreshSessions}
+          className="bg-gray-200 hover:bg-gray-300 dark:bg-gray-700 dark:hover:bg-gray-600 text-sm py-1 px-3 rounded"
+        >
+          Refresh
+        </button>
+        <span className="text-sm text-gray-500 dark:text-gray-400">{status}</span>
+      </div>
+      <div className="h-64">
+        <Line ref={chartRef} data={initialData} options={chartOptions} />
+      </div>
+    </div>
+  );
+}
+
+export default memo(StoredHistoryChart);
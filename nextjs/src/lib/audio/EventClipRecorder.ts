@@ -0,0 +1,101 @@
+// Pre/post-trigger audio capture around alarm events.
+//
+// PCM from the capture path is written into a rolling ring buffer. When an
+// alarm fires, the recorder schedules a clip from `preSeconds` before to
+// `postSeconds` after the trigger; once the ring has received the post-trigger
+// audio the clip is copied out and handed to listeners. Triggers that land
+// inside a pending clip extend it instead of starting a new one, up to what
+// the ring can still hold.
+
+import { PcmRingBuffer } from './PcmRingBuffer';
+import type { AlarmEvent, PcmChunk } from './RmsEngine';
+
+export interface EventClip {
+  samples: Float32Array;
+  sampleRate: number;
+  startFrame: number; // capture-clock sample index of samples[0]
+  triggerFrame: number; // sample index of the first trigger in the clip
+  peakRms: number;
+}
+
+export type EventClipListener = (clip: EventClip) => void;
+
+export interface EventClipRecorderOptions {
+  sampleRate: number;
+  bufferSeconds?: number;
+  preSeconds?: number;
+  postSeconds?: number;
+}
+
+interface PendingClip {
+  startFrame: number;
+  endFrame: number;
+  triggerFrame: number;
+  peakRms: number;
+}
+
+export class EventClipRecorder {
+  private readonly ring: PcmRingBuffer;
+  private readonly preFrames: number;
+  private readonly postFrames: number;
+  private listeners = new Set<EventClipListener>();
+  private pending: PendingClip | null = null;
+  readonly sampleRate: number;
+
+  constructor(options: EventClipRecorderOptions) {
+    const bufferSeconds = options.bufferSeconds ?? 10;
+    const preSeconds = options.preSeconds ?? 3;
+    const postSeconds = options.postSeconds ?? 5;
+    if (preSeconds + postSeconds > bufferSeconds) {
+      throw new Error('preSeconds + postSeconds must fit in bufferSeconds');
+    }
+    this.sampleRate = options.sampleRate;
+    this.ring = new PcmRingBuffer(Math.ceil(bufferSeconds * options.sampleRate));
+    this.preFrames = Math.round(preSeconds * options.sampleRate);
+    this.postFrames = Math.round(postSeconds * options.sampleRate);
+  }
+
+  subscribe(listener: EventClipListener): () => void {
+    this.listeners.add(listener);
+    return () => {
+      this.listeners.delete(listener);
+    };
+  }
+
+  write(chunk: PcmChunk): void {
+    this.ring.write(chunk.samples, chunk.frame);
+    if (this.pending && this.ring.endFrame >= this.pending.endFrame) {
+      this.flush(this.pending);
+    }
+  }
+
+  trigger(event: AlarmEvent): void {
+    const pending = this.pending;
+    if (pending && event.frame <= pending.endFrame) {
+      // Same incident: keep recording, bounded by what the ring still holds
+      const maxEnd = pending.startFrame + this.ring.capacity;
+      pending.endFrame = Math.min(maxEnd, event.frame + this.postFrames);
+      pending.peakRms = Math.max(pending.peakRms, event.rms);
+      return;
+    }
+    this.pending = {
+      startFrame: Math.max(this.ring.startFrame, event.frame - this.preFrames),
+      endFrame: event.frame + this.postFrames,
+      triggerFrame: event.frame,
+      peakRms: event.rms
+    };
+  }
+
+  private flush(pending: PendingClip): void {
+    this.pending = null;
+    const startFrame = Math.max(pending.startFrame, this.ring.startFrame);
+    const clip: EventClip = {
+      samples: this.ring.read(startFrame, pending.endFrame),
+      sampleRate: this.sampleRate,
+      startFrame,
+      triggerFrame: pending.triggerFrame,
+      peakRms: pending.peakRms
+    };
+    this.listeners.forEach(listener => listener(clip));
+  }
+}
@@ -0,0 +1,59 @@
+// Rolling mono PCM buffer addressed by capture-clock sample index.
+// Holds the most recent `capacity` samples; older audio is overwritten.
+
+export class PcmRingBuffer {
+  readonly capacity: number;
+  private readonly samples: Float32Array;
+  private end = 0; // sample index just past the newest written sample
+
+  constructor(capacity: number) {
+    this.capacity = capacity;
+    this.samples = new Float32Array(capacity);
+  }
+
+  // Oldest sample index still held
+  get startFrame(): number {
+    return Math.max(0, this.end - this.capacity);
+  }
+
+  get endFrame(): number {
+    return this.end;
+  }
+
+  // Chunks must arrive in order; a gap is filled with silence
+  write(chunk: Float32Array, frame: number): void {
+    if (frame > this.end) this.fill(this.end, frame);
+    let offset = Math.max(0, this.end - frame); // skip already-written overlap
+    // Only the last `capacity` samples of a large chunk can survive
+    offset = Math.max(offset, chunk.length - this.capacity);
+    while (offset < chunk.length) {
+      const position = (frame + offset) % this.capacity;
+      const count = Math.min(chunk.length - offset, this.capacity - position);
+      this.samples.set(chunk.subarray(offset, offset + count), position);
+      offset += count;
+    }
+    this.end = Math.max(this.end, frame + chunk.length);
+  }
+
+  // Copy [from, to) into a new array; the range must still be buffered
+  read(from: number, to: number): Float32Array {
+    if (from < this.startFrame || to > this.end || to < from) {
+      throw new RangeError(`Samples ${from}-${to} are not buffered (${this.startFrame}-${this.end})`);
+    }
+    const out = new Float32Array(to - from);
+    let written = 0;
+    while (written < out.length) {
+      const position = (from + written) % this.capacity;
+      const count = Math.min(out.length - written, this.capacity - position);
+      out.set(this.samples.subarray(position, position + count), written);
+      written += count;
+    }
+    return out;
+  }
+
+  private fill(from: number, to: number): void {
+    for (let frame = Math.max(from, to - this.capacity); frame < to; frame++) {
+      this.samples[frame % this.capacity] = 0;
+    }
+  }
+}
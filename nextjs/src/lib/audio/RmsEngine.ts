@@ -0,0 +1,301 @@
+// Microphone capture + AudioWorklet RMS stream.
+// All sample processing happens on the audio thread; the main thread only
+// receives one small message per hop and one summary per display interval.
+// Raw PCM, when enabled, goes into a SharedArrayBuffer ring (`pcmRing`)
+// that workers read directly; without cross-origin isolation the worklet
+// transfers PCM chunks to the main thread instead. The threshold
+// alarm and its tone also run on the audio thread, so they keep the same
+// latency when the tab is hidden and main-thread work is throttled.
+
+import { SharedPcmReader, createPcmRing, isSharedPcmSupported } from './SharedPcmRing';
+
+const WORKLET_URL = '/worklets/rms-processor.js';
+const PROCESSOR_NAME = 'rms-processor';
+
+// RMS of one analysis window, emitted every hop
+export interface RmsBlock {
+  rms: number;
+  frame: number; // capture-clock sample index at the end of the window
+}
+
+// Summary of every window that ended inside one display interval
+export interface RmsSummary {
+  min: number;
+  max: number;
+  mean: number;
+  count: number;
+  frame: number; // capture-clock sample index at the end of the interval
+}
+
+// Raw mono input forwarded from the worklet. `samples` may be a reused
+// buffer: listeners copy what they keep before returning.
+export interface PcmChunk {
+  samples: Float32Array;
+  frame: number; // capture-clock sample index of samples[0]
+}
+
+// Threshold alarm evaluated in the worklet on every RMS block. It activates
+// above `threshold` and releases below `threshold * releaseRatio`
+// (hysteresis); while active it sounds at most once per `cooldownSeconds`,
+// measured on the capture clock.
+export interface AlarmOptions {
+  threshold: number;
+  releaseRatio?: number;
+  cooldownSeconds?: number;
+  toneFrequency?: number;
+  toneSeconds?: number; // 0 raises events without a tone
+}
+
+export interface AlarmEvent {
+  rms: number;
+  frame: number; // capture-clock sample index of the triggering block
+}
+
+// Pairs a capture-clock sample index with the wall-clock time it was
+// rendered, so frames map to dates without timestamping every value. The
+// worklet posts a fresh pair every `anchorIntervalSeconds` of audio, because
+// the audio clock drifts from the system clock; being counted in frames,
+// that cadence holds in background tabs where main-thread timers are
+// throttled.
+export interface ClockAnchor {
+  frame: number;
+  epochSeconds: number;
+}
+
+// Wall-clock epoch seconds of `frame`, extrapolated from the nearest anchor
+export function frameToEpoch(anchor: ClockAnchor, frame: number, sampleRate: number): number {
+  return anchor.epochSeconds + (frame - anchor.frame) / sampleRate;
+}
+
+export type RmsListener = (block: RmsBlock) => void;
+export type RmsSummaryListener = (summary: RmsSummary) => void;
+export type PcmListener = (chunk: PcmChunk) => void;
+export type AlarmListener = (event: AlarmEvent) => void;
+export type ClockAnchorListener = (anchor: ClockAnchor) => void;
+
+type WorkletMessage =
+  | ({ type: 'frame' } & RmsBlock)
+  | ({ type: 'interval' } & RmsSummary)
+  | ({ type: 'pcm' } & PcmChunk)
+  | ({ type: 'alarm' } & AlarmEvent)
+  | ({ type: 'anchor' } & ClockAnchor);
+
+export interface RmsEngineOptions {
+  windowSize?: number;
+  hopSize?: number;
+  intervalSeconds?: number;
+  pcmChunkSize?: number; // 0 disables raw PCM forwarding
+  pcmRingSeconds?: number; // shared ring capacity when cross-origin isolated
+  anchorIntervalSeconds?: number; // seconds of audio between ClockAnchors
+  alarm?: AlarmOptions;
+}
+
+export class RmsEngine {
+  private context: AudioContext | null = null;
+  private stream: MediaStream | null = null;
+  private source: MediaStreamAudioSourceNode | null = null;
+  private node: AudioWorkletNode | null = null;
+  private listeners = new Set<RmsListener>();
+  private summaryListeners = new Set<RmsSummaryListener>();
+  private pcmListeners = new Set<PcmListener>();
+  private alarmListeners = new Set<AlarmListener>();
+  private anchorListeners = new Set<ClockAnchorListener>();
+  private ring: SharedArrayBuffer | null = null;
+  private ringReader: SharedPcmReader | null = null;
+  private ringScratch: Float32Array | null = null;
+  readonly windowSize: number;
+  readonly hopSize: number;
+  readonly intervalSeconds: number;
+  readonly pcmChunkSize: number;
+  readonly pcmRingSeconds: number;
+  readonly anchorIntervalSeconds: number;
+  readonly alarm: Required<AlarmOptions> | null;
+
+  constructor(options: RmsEngineOptions = {}) {
+    this.windowSize = options.windowSize ?? 2048;
+    this.hopSize = options.hopSize ?? 512;
+    this.intervalSeconds = options.intervalSeconds ?? 1;
+    this.pcmChunkSize = options.pcmChunkSize ?? 0;
+    this.pcmRingSeconds = options.pcmRingSeconds ?? 10;
+    this.anchorIntervalSeconds = options.anchorIntervalSeconds ?? 10;
+    this.alarm = options.alarm
+      ? { releaseRatio: 0.8, cooldownSeconds: 2, toneFrequency: 800, toneSeconds: 0.5, ...options.alarm }
+      : null;
+    if (this.hopSize > this.windowSize) {
+      // Larger hops would leave samples between windows unmeasured
+      throw new Error('hopSize must not exceed windowSize');
+    }
+  }
+
+  get audioContext(): AudioContext | null {
+    return this.context;
+  }
+
+  get sampleRate(): number {
+    return this.context ? this.context.sampleRate : 0;
+  }
+
+  // Shared PCM ring written by the worklet (see SharedPcmRing.ts), or null
+  // when PCM is off or arrives as transferred chunks
+  get pcmRing(): SharedArrayBuffer | null {
+    return this.ring;
+  }
+
+  subscribe(listener: RmsListener): () => void {
+    this.listeners.add(listener);
+    return () => {
+      this.listeners.delete(listener);
+    };
+  }
+
+  subscribeSummary(listener: RmsSummaryListener): () => void {
+    this.summaryListeners.add(listener);
+    return () => {
+      this.summaryListeners.delete(listener);
+    };
+  }
+
+  subscribePcm(listener: PcmListener): () => void {
+    this.pcmListeners.add(listener);
+    return () => {
+      this.pcmListeners.delete(listener);
+    };
+  }
+
+  subscribeAlarm(listener: AlarmListener): () => void {
+    this.alarmListeners.add(listener);
+    return () => {
+      this.alarmListeners.delete(listener);
+    };
+  }
+
+  subscribeAnchor(listener: ClockAnchorListener): () => void {
+    this.anchorListeners.add(listener);
+    return () => {
+      this.anchorListeners.delete(listener);
+    };
+  }
+
+  // On-demand anchor (e.g. when a session starts, before the worklet's first
+  // one arrives) from the context's output timestamp, accurate to the output
+  // latency. Before the first render quantum the timestamp is empty and the
+  // current time stands in.
+  readAnchor(): ClockAnchor | null {
+    const context = this.context;
+    if (!context) return null;
+    const { contextTime, performanceTime } = context.getOutputTimestamp();
+    if (contextTime === undefined || performanceTime === undefined || performanceTime === 0) {
+      return { frame: Math.round(context.currentTime * context.sampleRate), epochSeconds: Date.now() / 1000 };
+    }
+    return {
+      frame: Math.round(contextTime * context.sampleRate),
+      epochSeconds: (performance.timeOrigin + performanceTime) / 1000
+    };
+  }
+
+  async start(): Promise<AudioContext> {
+    const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    this.stream = stream;
+
+    const AudioContextCtor = window.AudioContext || (window as Window & { webkitAudioContext?: typeof AudioContext }).webkitAudioContext;
+    const context = new AudioContextCtor();
+    this.context = context;
+    // Some browsers suspend or interrupt the context (e.g. Safari when the
+    // page is backgrounded); resume as soon as it is allowed to run again
+    context.onstatechange = this.resume;
+    document.addEventListener('visibilitychange', this.resume);
+
+    await context.audioWorklet.addModule(WORKLET_URL);
+
+    if (this.pcmChunkSize > 0 && isSharedPcmSupported()) {
+      this.ring = createPcmRing(Math.round(context.sampleRate * this.pcmRingSeconds));
+      this.ringReader = new SharedPcmReader(this.ring);
+      this.ringScratch = new Float32Array(this.pcmChunkSize);
+    }
+
+    this.source = context.createMediaStreamSource(stream);
+    // Without an alarm the node is a pure sink, rendered as long as its input
+    // is live; with one its single output carries the alarm tone
+    this.node = new AudioWorkletNode(context, PROCESSOR_NAME, {
+      numberOfInputs: 1,
+      numberOfOutputs: this.alarm ? 1 : 0,
+      outputChannelCount: this.alarm ? [1] : [],
+      channelCount: 1,
+      channelCountMode: 'explicit',
+      processorOptions: {
+        windowSize: this.windowSize,
+        hopSize: this.hopSize,
+        intervalSeconds: this.intervalSeconds,
+        pcmChunkSize: this.pcmChunkSize,
+        alarm: this.alarm,
+        pcmRing: this.ring,
+        anchorSeconds: this.anchorIntervalSeconds
+      }
+    });
+    this.node.port.onmessage = (event: MessageEvent<WorkletMessage>) => {
+      const message = event.data;
+      // Main-thread PCM listeners are fed from the ring as messages arrive
+      if (this.ringReader && this.pcmListeners.size > 0) this.drainRing();
+      if (message.type === 'frame') {
+        this.listeners.forEach(listener => listener(message));
+      } else if (message.type === 'interval') {
+        this.summaryListeners.forEach(listener => listener(message));
+      } else if (message.type === 'alarm') {
+        this.alarmListeners.forEach(listener => listener(message));
+      } else if (message.type === 'anchor') {
+        const anchor: ClockAnchor = { frame: message.frame, epochSeconds: message.epochSeconds };
+        this.anchorListeners.forEach(listener => listener(anchor));
+      } else {
+        this.pcmListeners.forEach(listener => listener(message));
+      }
+    };
+    this.source.connect(this.node);
+    if (this.alarm) this.node.connect(context.destination);
+    return context;
+  }
+
+  async stop(): Promise<void> {
+    if (this.node) {
+      this.node.port.onmessage = null;
+      this.node.disconnect();
+      this.node = null;
+    }
+    if (this.source) {
+      this.source.disconnect();
+      this.source = null;
+    }
+    if (this.stream) {
+      this.stream.getTracks().forEach(track => track.stop());
+      this.stream = null;
+    }
+    document.removeEventListener('visibilitychange', this.resume);
+    this.ring = null;
+    this.ringReader = null;
+    this.ringScratch = null;
+    if (this.context) {
+      const context = this.context;
+      this.context = null;
+      context.onstatechange = null;
+      await context.close();
+    }
+  }
+
+  private drainRing(): void {
+    const samples = this.ringScratch!;
+    let read;
+    while ((read = this.ringReader!.read(samples))) {
+      const chunk: PcmChunk = { samples: samples.subarray(0, read.length), frame: read.frame };
+      this.pcmListeners.forEach(listener => listener(chunk));
+    }
+  }
+
+  private readonly resume = () => {
+    const context = this.context;
+    // 'interrupted' (Safari) is not in the lib typings, hence the negative test
+    if (context && context.state !== 'running' && context.state !== 'closed') {
+      context.resume().catch(() => {
+        // Not allowed yet; retried on the next state or visibility change
+      });
+    }
+  };
+}
@@ -0,0 +1,282 @@
+// One microphone capture shared by every dashboard tab of this origin.
+//
+// The tab holding the `audio-alarm-capture` Web Lock is the leader: it runs
+// the only RmsEngine (getUserMedia, AudioContext, worklet) and rebroadcasts
+// its RMS blocks, summaries and clock anchors on a BroadcastChannel. Other tabs follow that
+// channel and queue for the lock, so if the leader's tab closes or crashes
+// the lock passes to a follower, which starts a fresh capture. A deliberate
+// stop in the leader stops every tab instead.
+//
+// Without Web Locks each tab captures on its own, as before.
+
+import type { ClockAnchor, RmsBlock, RmsEngine, RmsSummary } from './RmsEngine';
+
+const LOCK_NAME = 'audio-alarm-capture';
+const CHANNEL_NAME = 'audio-alarm-capture';
+// A follower granted the lock waits this long for a 'stopped' broadcast that
+// may have been sent just before the leader released it
+const HANDOVER_GRACE_MS = 200;
+
+export interface CaptureSession {
+  sessionId: string;
+  sampleRate: number;
+  clockOrigin: number; // wall-clock epoch seconds of capture frame 0, from the first anchor
+}
+
+export type CaptureState =
+  | { role: 'leader'; session: CaptureSession; engine: RmsEngine }
+  | { role: 'follower'; session: CaptureSession | null } // null until the leader answers
+  | { role: 'stopped' };
+
+type CaptureMessage =
+  | { type: 'session'; session: CaptureSession }
+  | { type: 'block'; block: RmsBlock }
+  | { type: 'summary'; summary: RmsSummary }
+  | { type: 'anchor'; anchor: ClockAnchor }
+  | { type: 'query' } // a new follower asks for the session
+  | { type: 'stopped' };
+
+export type CaptureStateListener = (state: CaptureState) => void;
+
+export class SharedCapture {
+  private readonly createEngine: () => RmsEngine;
+  private channel: BroadcastChannel | null = null;
+  private engine: RmsEngine | null = null;
+  private engineSubscriptions: (() => void)[] = [];
+  private releaseLock: (() => void) | null = null;
+  private abort: AbortController | null = null;
+  private blockListeners = new Set<(block: RmsBlock) => void>();
+  private summaryListeners = new Set<(summary: RmsSummary) => void>();
+  private anchorListeners = new Set<(anchor: ClockAnchor) => void>();
+  private latestAnchor: ClockAnchor | null = null;
+  private stateListeners = new Set<CaptureStateListener>();
+  private current: CaptureState = { role: 'stopped' };
+  private leaderStopped = false;
+  // Bumped by stop(), so a start() still waiting for the lock or the
+  // microphone knows it was cancelled
+  private generation = 0;
+
+  constructor(createEngine: () => RmsEngine) {
+    this.createEngine = createEngine;
+  }
+
+  get state(): CaptureState {
+    return this.current;
+  }
+
+  subscribe(listener: (block: RmsBlock) => void): () => void {
+    this.blockListeners.add(listener);
+    return () => {
+      this.blockListeners.delete(listener);
+    };
+  }
+
+  subscribeSummary(listener: (summary: RmsSummary) => void): () => void {
+    this.summaryListeners.add(listener);
+    return () => {
+      this.summaryListeners.delete(listener);
+    };
+  }
+
+  subscribeAnchor(listener: (anchor: ClockAnchor) => void): () => void {
+    this.anchorListeners.add(listener);
+    return () => {
+      this.anchorListeners.delete(listener);
+    };
+  }
+
+  subscribeState(listener: CaptureStateListener): () => void {
+    this.stateListeners.add(listener);
+    return () => {
+      this.stateListeners.delete(listener);
+    };
+  }
+
+  // Leads if no other tab is capturing, otherwise follows the one that is
+  async start(): Promise<void> {
+    if (this.current.role !== 'stopped' || this.channel) return; // running or starting
+    const generation = ++this.generation;
+    this.leaderStopped = false;
+    this.channel = new BroadcastChannel(CHANNEL_NAME);
+    this.channel.onmessage = (event: MessageEvent<CaptureMessage>) => this.handleMessage(event.data);
+
+    try {
+      if (typeof navigator.locks === 'undefined' || (await this.requestLock(true))) {
+        await this.lead(generation);
+        return;
+      }
+    } catch (error) {
+      this.channel?.close();
+      this.channel = null;
+      throw error;
+    }
+    if (generation !== this.generation) return; // stopped while asking for the lock
+
+    this.setState({ role: 'follower', session: null });
+    this.broadcast({ type: 'query' });
+    void this.requestLock(false).then(async granted => {
+      if (!granted) return;
+      await new Promise(resolve => setTimeout(resolve, HANDOVER_GRACE_MS));
+      if (this.leaderStopped || this.current.role !== 'follower' || generation !== this.generation) {
+        this.unlock();
+        return;
+      }
+      try {
+        await this.lead(generation);
+      } catch (error) {
+        console.error('Taking over the capture failed:', error);
+        this.stop();
+      }
+    });
+  }
+
+  stop(): void {
+    this.generation++;
+    if (this.current.role === 'stopped') {
+      // A start() in progress cleans up the engine itself once it resumes
+      this.unlock();
+      this.channel?.close();
+      this.channel = null;
+      return;
+    }
+    if (this.current.role === 'leader') this.broadcast({ type: 'stopped' });
+    this.abort?.abort();
+    this.abort = null;
+    this.engineSubscriptions.forEach(unsubscribe => unsubscribe());
+    this.engineSubscriptions = [];
+    this.latestAnchor = null;
+    if (this.engine) {
+      void this.engine.stop();
+      this.engine = null;
+    }
+    this.unlock();
+    this.channel?.close();
+    this.channel = null;
+    this.setState({ role: 'stopped' });
+  }
+
+  private async lead(generation: number): Promise<void> {
+    if (generation !== this.generation) {
+      this.unlock();
+      return;
+    }
+    const engine = this.createEngine();
+    let context: AudioContext;
+    try {
+      context = await engine.start();
+    } catch (error) {
+      await engine.stop();
+      this.unlock();
+      throw error;
+    }
+    if (generation !== this.generation) {
+      // Stopped while the permission prompt was open: give everything back
+      await engine.stop();
+      this.unlock();
+      return;
+    }
+    this.engine = engine;
+    const anchor = engine.readAnchor()!;
+    this.latestAnchor = anchor;
+    const session: CaptureSession = {
+      sessionId: `session-${new Date().toISOString().replace(/[:.]/g, '-')}`,
+      sampleRate: context.sampleRate,
+      // Fixed for the session so every upload maps a frame to the same time
+      clockOrigin: anchor.epochSeconds - anchor.frame / context.sampleRate
+    };
+    this.engineSubscriptions = [
+      engine.subscribe(block => {
+        this.blockListeners.forEach(listener => listener(block));
+        this.broadcast({ type: 'block', block });
+      }),
+      engine.subscribeSummary(summary => {
+        this.summaryListeners.forEach(listener => listener(summary));
+        this.broadcast({ type: 'summary', summary });
+      }),
+      engine.subscribeAnchor(anchor => this.publishAnchor(anchor))
+    ];
+    this.setState({ role: 'leader', session, engine });
+    this.broadcast({ type: 'session', session });
+    this.publishAnchor(anchor);
+  }
+
+  private publishAnchor(anchor: ClockAnchor): void {
+    this.latestAnchor = anchor;
+    this.anchorListeners.forEach(listener => listener(anchor));
+    this.broadcast({ type: 'anchor', anchor });
+  }
+
+  private handleMessage(message: CaptureMessage): void {
+    const state = this.current;
+    if (state.role === 'leader') {
+      if (message.type === 'query') {
+        this.broadcast({ type: 'session', session: state.session });
+        if (this.latestAnchor) this.broadcast({ type: 'anchor', anchor: this.latestAnchor });
+      }
+      return;
+    }
+    if (state.role !== 'follower') return;
+    switch (message.type) {
+      case 'session':
+        // Answers to other followers' queries repeat the session
+        if (state.session?.sessionId !== message.session.sessionId) {
+          this.setState({ role: 'follower', session: message.session });
+        }
+        break;
+      case 'block':
+        this.blockListeners.forEach(listener => listener(message.block));
+        break;
+      case 'summary':
+        this.summaryListeners.forEach(listener => listener(message.summary));
+        break;
+      case 'anchor':
+        this.anchorListeners.forEach(listener => listener(message.anchor));
+        break;
+      case 'stopped':
+        this.leaderStopped = true;
+        this.stop();
+        break;
+    }
+  }
+
+  // Resolves true once the lock is held (until unlock()), false if
+  // `ifAvailable` found it taken or the request was aborted
+  private requestLock(ifAvailable: boolean): Promise<boolean> {
+    let options: LockOptions = { ifAvailable: true };
+    if (!ifAvailable) {
+      this.abort = new AbortController();
+      options = { signal: this.abort.signal };
+    }
+    return new Promise((resolve, reject) => {
+      navigator.locks
+        .request(LOCK_NAME, options, lock => {
+          if (!lock) {
+            resolve(false);
+            return;
+          }
+          resolve(true);
+          return new Promise<void>(release => {
+            this.releaseLock = release;
+          });
+        })
+        .catch(error => {
+          if (error instanceof DOMException && error.name === 'AbortError') resolve(false);
+          else reject(error);
+        });
+    });
+  }
+
+  private unlock(): void {
+    this.releaseLock?.();
+    this.releaseLock = null;
+  }
+
+  private broadcast(message: CaptureMessage): void {
+    this.channel?.postMessage(message);
+  }
+
+  private setState(state: CaptureState): void {
+    this.current = state;
+    this.stateListeners.forEach(listener => listener(state));
+  }
+}
@@ -0,0 +1,86 @@
+// Lock-free single-producer/multi-consumer PCM ring in a SharedArrayBuffer.
+//
+// The AudioWorklet (public/worklets/rms-processor.js) is the only writer; any
+// number of readers, on any thread, each keep their own cursor, so adding a
+// consumer costs the producer nothing. The writer never waits: a reader that
+// falls more than `capacity` samples behind loses the oldest audio and
+// counts it in `dropped`.
+//
+// Layout (the worklet writes the same one):
+//   bytes 0..7    BigInt64 total samples ever written, published with
+//                 Atomics.store after the samples themselves
+//   bytes 8..15   Float64 capture-clock frame of sample 0, set before the
+//                 first publish
+//   bytes 16..    Float32 samples; sample n lives at index n % capacity
+//
+// Needs cross-origin isolation (COOP/COEP, see next.config.ts); without it
+// RmsEngine falls back to transferring PCM chunks through postMessage.
+
+const HEADER_BYTES = 16;
+// The writer fills up to one render quantum (128 frames today) before it
+// publishes, so the oldest slots may be mid-overwrite; readers keep clear
+const WRITE_MARGIN = 1024;
+
+export function isSharedPcmSupported(): boolean {
+  return typeof SharedArrayBuffer !== 'undefined' && globalThis.crossOriginIsolated === true;
+}
+
+export function createPcmRing(capacity: number): SharedArrayBuffer {
+  return new SharedArrayBuffer(HEADER_BYTES + capacity * Float32Array.BYTES_PER_ELEMENT);
+}
+
+export class SharedPcmReader {
+  private readonly written: BigInt64Array;
+  private readonly origin: Float64Array;
+  private readonly data: Float32Array;
+  private position: number;
+  dropped = 0;
+
+  // Starts at the newest sample, so only audio written from now on is read
+  constructor(buffer: SharedArrayBuffer) {
+    this.written = new BigInt64Array(buffer, 0, 1);
+    this.origin = new Float64Array(buffer, 8, 1);
+    this.data = new Float32Array(buffer, HEADER_BYTES);
+    this.position = this.writtenCount();
+  }
+
+  get capacity(): number {
+    return this.data.length;
+  }
+
+  // Copies the next unread samples (at most target.length) into `target`;
+  // returns how many and the capture frame of the first, or null if none
+  read(target: Float32Array): { frame: number; length: number } | null {
+    const capacity = this.data.length;
+    const safe = capacity - WRITE_MARGIN; // samples behind the writer that are stable
+    for (;;) {
+      const written = this.writtenCount();
+      if (written - this.position > safe) {
+        this.dropped += written - safe - this.position;
+        this.position = written - safe;
+      }
+      const length = Math.min(written - this.position, target.length);
+      if (length <= 0) return null;
+
+      const start = this.position % capacity;
+      const first = Math.min(length, capacity - start);
+      target.set(this.data.subarray(start, start + first));
+      if (first < length) target.set(this.data.subarray(0, length - first), first);
+
+      // The writer may have lapped the copied range meanwhile; then it is
+      // torn, so drop it and resynchronise
+      if (this.writtenCount() - safe > this.position) {
+        this.dropped += length;
+        this.position += length;
+        continue;
+      }
+      const frame = this.origin[0] + this.position;
+      this.position += length;
+      return { frame, length };
+    }
+  }
+
+  private writtenCount(): number {
+    return Number(Atomics.load(this.written, 0));
+  }
+}
@@ -0,0 +1,174 @@
+// Multi-resolution min/max/mean pyramid over the whole monitoring session.
+//
+// Level 0 holds one bucket per appended RMS summary; level k merges 2^k
+// consecutive level-0 buckets. Each append touches one bucket per level, so
+// cost is O(log n) and memory is about twice the level-0 size. Readers ask
+// for a time range and a point budget (typically the chart's pixel width)
+// and get a zero-copy view of the finest level that fits the budget. Min and
+// max survive every merge, so short spikes stay visible at any zoom.
+
+export interface LodView {
+  level: number;
+  length: number;
+  times: Float64Array; // time of the first entry in each bucket
+  mins: Float32Array;
+  maxs: Float32Array;
+  sums: Float64Array; // sum of frame RMS values; mean = sums[i] / counts[i]
+  counts: Uint32Array;
+}
+
+export type PyramidListener = () => void;
+
+const INITIAL_CAPACITY = 1024;
+
+class LodLevel {
+  length = 0;
+  times = new Float64Array(INITIAL_CAPACITY);
+  mins = new Float32Array(INITIAL_CAPACITY);
+  maxs = new Float32Array(INITIAL_CAPACITY);
+  sums = new Float64Array(INITIAL_CAPACITY);
+  counts = new Uint32Array(INITIAL_CAPACITY);
+
+  push(time: number, min: number, max: number, sum: number, count: number): void {
+    if (this.length === this.times.length) this.grow();
+    const i = this.length++;
+    this.times[i] = time;
+    this.mins[i] = min;
+    this.maxs[i] = max;
+    this.sums[i] = sum;
+    this.counts[i] = count;
+  }
+
+  mergeLast(min: number, max: number, sum: number, count: number): void {
+    const i = this.length - 1;
+    if (min < this.mins[i]) this.mins[i] = min;
+    if (max > this.maxs[i]) this.maxs[i] = max;
+    this.sums[i] += sum;
+    this.counts[i] += count;
+  }
+
+  // First bucket whose start time is >= time
+  lowerBound(time: number): number {
+    let lo = 0;
+    let hi = this.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      if (this.times[mid] < time) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo;
+  }
+
+  view(level: number, from: number, to: number): LodView {
+    return {
+      level,
+      length: to - from,
+      times: this.times.subarray(from, to),
+      mins: this.mins.subarray(from, to),
+      maxs: this.maxs.subarray(from, to),
+      sums: this.sums.subarray(from, to),
+      counts: this.counts.subarray(from, to)
+    };
+  }
+
+  private grow(): void {
+    const capacity = this.times.length * 2;
+    const times = new Float64Array(capacity);
+    times.set(this.times);
+    const mins = new Float32Array(capacity);
+    mins.set(this.mins);
+    const maxs = new Float32Array(capacity);
+    maxs.set(this.maxs);
+    const sums = new Float64Array(capacity);
+    sums.set(this.sums);
+    const counts = new Uint32Array(capacity);
+    counts.set(this.counts);
+    this.times = times;
+    this.mins = mins;
+    this.maxs = maxs;
+    this.sums = sums;
+    this.counts = counts;
+  }
+}
+
+export class LodPyramid {
+  private levels: LodLevel[] = [new LodLevel()];
+  private listeners = new Set<PyramidListener>();
+
+  // Number of level-0 buckets
+  get length(): number {
+    return this.levels[0].length;
+  }
+
+  // Times of the first and the last appended bucket, or null while empty
+  bounds(): { start: number; end: number } | null {
+    const base = this.levels[0];
+    if (base.length === 0) return null;
+    return { start: base.times[0], end: base.times[base.length - 1] };
+  }
+
+  subscribe(listener: PyramidListener): () => void {
+    this.listeners.add(listener);
+    return () => {
+      this.listeners.delete(listener);
+    };
+  }
+
+  append(time: number, min: number, max: number, mean: number, count: number = 1): void {
+    const index = this.levels[0].length;
+    const sum = mean * count;
+    this.levels[0].push(time, min, max, sum, count);
+
+    for (let k = 1; ; k++) {
+      const bucket = index >>> k;
+      if (k === this.levels.length) {
+        // A new top level appears once level k-1 has a second bucket
+        if (index >>> (k - 1) === 0) break;
+        this.levels.push(this.seedLevel(k));
+        continue;
+      }
+      const level = this.levels[k];
+      if (bucket === level.length) level.push(time, min, max, sum, count);
+      else level.mergeLast(min, max, sum, count);
+    }
+
+    this.notify();
+  }
+
+  clear(): void {
+    this.levels = [new LodLevel()];
+    this.notify();
+  }
+
+  // Finest level whose bucket count over [start, end] fits in maxPoints
+  select(start: number, end: number, maxPoints: number): LodView {
+    const base = this.levels[0];
+    const span = base.lowerBound(end + Number.EPSILON) - base.lowerBound(start);
+    let k = 0;
+    while (k < this.levels.length - 1 && Math.ceil(span / (1 << k)) > maxPoints) k++;
+
+    const level = this.levels[k];
+    // Include the bucket that straddles `start`
+    const from = Math.max(0, level.lowerBound(start) - 1);
+    const to = Math.min(level.length, level.lowerBound(end + Number.EPSILON) + 1);
+    return level.view(k, from, Math.max(from, to));
+  }
+
+  // Build level k from the level below when it first becomes non-trivial
+  private seedLevel(k: number): LodLevel {
+    const below = this.levels[k - 1];
+    const level = new LodLevel();
+    for (let i = 0; i < below.length; i++) {
+      if ((i & 1) === 0) {
+        level.push(below.times[i], below.mins[i], below.maxs[i], below.sums[i], below.counts[i]);
+      } else {
+        level.mergeLast(below.mins[i], below.maxs[i], below.sums[i], below.counts[i]);
+      }
+    }
+    return level;
+  }
+
+  private notify(): void {
+    this.listeners.forEach(listener => listener());
+  }
+}
@@ -0,0 +1,108 @@
+// Fixed-capacity RMS history backed by typed arrays.
+// Appends are O(1) and never allocate; once full, the oldest point is
+// overwritten. `version` increments on every mutation so readers can cheaply
+// tell whether anything changed since they last looked, and subscribers are
+// notified synchronously after each append or clear.
+
+export interface HistorySegments {
+  times: Float64Array;
+  values: Float32Array;
+  means: Float32Array;
+}
+
+export type HistoryListener = () => void;
+
+export class RmsHistory {
+  readonly capacity: number;
+  private readonly times: Float64Array;
+  private readonly values: Float32Array;
+  private readonly means: Float32Array;
+  private start = 0; // physical index of the oldest point
+  private count = 0;
+  private revision = 0;
+  private listeners = new Set<HistoryListener>();
+
+  constructor(capacity: number) {
+    this.capacity = capacity;
+    this.times = new Float64Array(capacity);
+    this.values = new Float32Array(capacity);
+    this.means = new Float32Array(capacity);
+  }
+
+  get length(): number {
+    return this.count;
+  }
+
+  get version(): number {
+    return this.revision;
+  }
+
+  subscribe(listener: HistoryListener): () => void {
+    this.listeners.add(listener);
+    return () => {
+      this.listeners.delete(listener);
+    };
+  }
+
+  append(time: number, value: number, mean: number = value): void {
+    let index: number;
+    if (this.count < this.capacity) {
+      index = this.physical(this.count);
+      this.count++;
+    } else {
+      index = this.start;
+      this.start = (this.start + 1) % this.capacity;
+    }
+    this.times[index] = time;
+    this.values[index] = value;
+    this.means[index] = mean;
+    this.revision++;
+    this.notify();
+  }
+
+  clear(): void {
+    this.start = 0;
+    this.count = 0;
+    this.revision++;
+    this.notify();
+  }
+
+  // Logical index 0 is the oldest point, length - 1 the newest
+  timeAt(i: number): number {
+    return this.times[this.physical(i)];
+  }
+
+  valueAt(i: number): number {
+    return this.values[this.physical(i)];
+  }
+
+  meanAt(i: number): number {
+    return this.means[this.physical(i)];
+  }
+
+  // Zero-copy chronological views: the ring as at most two contiguous runs
+  segments(): HistorySegments[] {
+    const end = this.start + this.count;
+    if (end <= this.capacity) {
+      return [this.slice(this.start, end)];
+    }
+    return [this.slice(this.start, this.capacity), this.slice(0, end - this.capacity)];
+  }
+
+  private notify(): void {
+    this.listeners.forEach(listener => listener());
+  }
+
+  private slice(from: number, to: number): HistorySegments {
+    return {
+      times: this.times.subarray(from, to),
+      values: this.values.subarray(from, to),
+      means: this.means.subarray(from, to)
+    };
+  }
+
+  private physical(i: number): number {
+    const index = this.start + i;
+    return index >= this.capacity ? index - this.capacity : index;
+  }
+}
@@ -0,0 +1,117 @@
+// IndexedDB outbox for upload.worker: items wait here, in arrival order,
+// until the server has acknowledged them, so a reload or a crash never
+// loses an upload. Keys are auto-incremented, so key order is queue order.
+
+import { requestToPromise, transactionDone } from '@/lib/idb';
+import type { UploadItem } from './uploadMessages';
+
+const DB_NAME = 'audio-alarm-uploads';
+const DB_VERSION = 1;
+const STORE = 'items';
+
+export interface OutboxEntry {
+  id: number;
+  bytes: number; // payload size, for batch and cap accounting
+  item: UploadItem;
+}
+
+export function itemBytes(item: UploadItem): number {
+  return item.kind === 'audio' ? item.data.byteLength : 16;
+}
+
+export class UploadOutbox {
+  private constructor(
+    private readonly db: IDBDatabase,
+    private count: number,
+    private bytes: number
+  ) {}
+
+  static async open(): Promise<UploadOutbox> {
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+    request.onupgradeneeded = () => {
+      request.result.createObjectStore(STORE, { keyPath: 'id', autoIncrement: true });
+    };
+    const db = await requestToPromise(request);
+
+    // Totals of whatever an earlier page left behind
+    let count = 0;
+    let bytes = 0;
+    const transaction = db.transaction(STORE, 'readonly');
+    transaction.objectStore(STORE).openCursor().onsuccess = event => {
+      const cursor = (event.target as IDBRequest<IDBCursorWithValue | null>).result;
+      if (!cursor) return;
+      count++;
+      bytes += (cursor.value as OutboxEntry).bytes;
+      cursor.continue();
+    };
+    await transactionDone(transaction);
+    return new UploadOutbox(db, count, bytes);
+  }
+
+  get size(): number {
+    return this.count;
+  }
+
+  get byteSize(): number {
+    return this.bytes;
+  }
+
+  async add(item: UploadItem): Promise<number> {
+    const bytes = itemBytes(item);
+    const transaction = this.db.transaction(STORE, 'readwrite');
+    const request = transaction.objectStore(STORE).add({ bytes, item });
+    await transactionDone(transaction);
+    this.count++;
+    this.bytes += bytes;
+    return request.result as number;
+  }
+
+  // Oldest entries, at most `limit` of them and about `maxBytes` in total
+  // (the first entry is always included)
+  async peek(limit: number, maxBytes: number): Promise<OutboxEntry[]> {
+    const entries: OutboxEntry[] = [];
+    let bytes = 0;
+    const transaction = this.db.transaction(STORE, 'readonly');
+    transaction.objectStore(STORE).openCursor().onsuccess = event => {
+      const cursor = (event.target as IDBRequest<IDBCursorWithValue | null>).result;
+      if (!cursor) return;
+      const entry = cursor.value as OutboxEntry;
+      if (entries.length > 0 && bytes + entry.bytes > maxBytes) return;
+      entries.push(entry);
+      bytes += entry.bytes;
+      if (entries.length < limit) cursor.continue();
+    };
+    await transactionDone(transaction);
+    return entries;
+  }
+
+  async remove(entries: OutboxEntry[]): Promise<void> {
+    if (entries.length === 0) return;
+    const transaction = this.db.transaction(STORE, 'readwrite');
+    const store = transaction.objectStore(STORE);
+    entries.forEach(entry => store.delete(entry.id));
+    await transactionDone(transaction);
+    this.count -= entries.length;
+    this.bytes -= entries.reduce((total, entry) => total + entry.bytes, 0);
+  }
+
+  // Drops the oldest entries until the outbox fits; returns how many went
+  async trim(maxCount: number, maxBytes: number): Promise<number> {
+    let dropped = 0;
+    let droppedBytes = 0;
+    const transaction = this.db.transaction(STORE, 'readwrite');
+    transaction.objectStore(STORE).openCursor().onsuccess = event => {
+      const cursor = (event.target as IDBRequest<IDBCursorWithValue | null>).result;
+      if (!cursor) return;
+      if (this.count - dropped <= maxCount && this.bytes - droppedBytes <= maxBytes) return;
+      dropped++;
+      droppedBytes += (cursor.value as OutboxEntry).bytes;
+      cursor.delete();
+      cursor.continue();
+    };
+    await transactionDone(transaction);
+    this.count -= dropped;
+    this.bytes -= droppedBytes;
+    return dropped;
+  }
+}
@@ -0,0 +1,109 @@
+// Main-thread handle for upload.worker, which batches, retries and persists
+// uploads. RMS samples are posted to the worker as they arrive; recorder
+// chunks travel straight from recorder.worker over a MessageChannel.
+//
+// Workers cannot call navigator.sendBeacon, and a page being unloaded may
+// kill the worker before its IndexedDB write lands. Samples are therefore
+// kept here until the worker reports them saved, and whatever is unsaved on
+// `pagehide` is beaconed as wire frames. Saved items go out from IndexedDB
+// the next time the page is opened.
+
+import type { SessionRecorder } from '@/lib/recording/SessionRecorder';
+import { RMS_ENDPOINT, type RmsUploadItem, type UploadRequest, type UploadResponse, type UploadStatus } from './uploadMessages';
+import { WIRE_CONTENT_TYPE, encodeRmsRuns, type RmsStreamInfo } from './wireFormat';
+
+export type UploadListener = (status: UploadStatus) => void;
+
+export class UploadQueue {
+  private readonly worker: Worker;
+  private readonly unsaved = new Map<number, RmsUploadItem>();
+  private listeners = new Set<UploadListener>();
+  private nextId = 0;
+  private beaconSequence = 0;
+
+  constructor() {
+    this.worker = new Worker(new URL('../../workers/upload.worker.ts', import.meta.url), { type: 'module' });
+    this.worker.onmessage = (event: MessageEvent<UploadResponse>) => this.handleResponse(event.data);
+    window.addEventListener('pagehide', this.handlePageHide);
+    document.addEventListener('visibilitychange', this.handleVisibilityChange);
+  }
+
+  subscribe(listener: UploadListener): () => void {
+    this.listeners.add(listener);
+    return () => {
+      this.listeners.delete(listener);
+    };
+  }
+
+  // `frame` is the capture-clock sample index the value belongs to
+  addRms(stream: RmsStreamInfo, frame: number, rms: number, mean: number): void {
+    const id = this.nextId++;
+    const item: RmsUploadItem = { kind: 'rms', stream, frame, rms, mean };
+    this.unsaved.set(id, item);
+    this.post({ type: 'rms', id, item });
+  }
+
+  // Uploads the recorder's chunks as they are sealed
+  connectRecorder(recorder: SessionRecorder): void {
+    const channel = new MessageChannel();
+    recorder.connectUpload(channel.port1);
+    this.post({ type: 'connect', port: channel.port2 }, [channel.port2]);
+  }
+
+  flush(): void {
+    this.post({ type: 'flush' });
+  }
+
+  dispose(): void {
+    window.removeEventListener('pagehide', this.handlePageHide);
+    document.removeEventListener('visibilitychange', this.handleVisibilityChange);
+    this.beacon();
+    this.worker.terminate();
+  }
+
+  private post(request: UploadRequest, transfer: Transferable[] = []): void {
+    this.worker.postMessage(request, transfer);
+  }
+
+  private handleResponse(response: UploadResponse): void {
+    if (response.type === 'saved') {
+      this.unsaved.delete(response.id);
+    } else if (response.type === 'status') {
+      this.listeners.forEach(listener => listener(response.status));
+    } else {
+      console.error('Upload queue failed:', response.message);
+    }
+  }
+
+  private readonly handlePageHide = () => {
+    this.beacon();
+  };
+
+  // Mobile browsers may discard a hidden page without a pagehide
+  private readonly handleVisibilityChange = () => {
+    if (document.visibilityState === 'hidden') this.flush();
+  };
+
+  private beacon(): void {
+    if (this.unsaved.size === 0 || typeof navigator.sendBeacon !== 'function') return;
+    const bySession = new Map<string, RmsUploadItem[]>();
+    for (const item of this.unsaved.values()) {
+      const items = bySession.get(item.stream.sessionId);
+      if (items) items.push(item);
+      else bySession.set(item.stream.sessionId, [item]);
+    }
+    for (const items of bySession.values()) {
+      const { bytes, frameCount } = encodeRmsRuns(
+        items[0].stream,
+        items.map(item => item.frame),
+        items.map(item => item.rms),
+        items.map(item => item.mean),
+        this.beaconSequence
+      );
+      this.beaconSequence += frameCount;
+      navigator.sendBeacon(RMS_ENDPOINT, new Blob([bytes], { type: WIRE_CONTENT_TYPE }));
+    }
+    // The worker may still save them; the server ignores the repeat
+    this.unsaved.clear();
+  }
+}
@@ -0,0 +1,41 @@
+// Read side of the SQLite store: session list and downsampled range queries.
+// The server picks the rollup resolution, so a request for `width` points
+// costs about the same for an hour as for a year of history.
+
+export interface StoredSession {
+  session_id: string;
+  created_at: number; // epoch seconds
+  sample_rate: number | null;
+  threshold: number | null;
+}
+
+export interface StoredRange {
+  resolution: number; // bucket width in seconds, 0 for raw samples
+  ts: number[]; // epoch seconds
+  min: number[];
+  max: number[];
+  mean: number[];
+  count: number[];
+  above: number[];
+}
+
+async function getJson<T>(url: string): Promise<T> {
+  const response = await fetch(url);
+  if (!response.ok) throw new Error(`GET ${url} failed with HTTP ${response.status}`);
+  return response.json() as Promise<T>;
+}
+
+export async function fetchSessions(): Promise<StoredSession[]> {
+  const { sessions } = await getJson<{ sessions: StoredSession[] }>('/api/sessions');
+  return sessions;
+}
+
+export function fetchRange(sessionId: string, start: number, end: number, width: number): Promise<StoredRange> {
+  const params = new URLSearchParams({
+    session_id: sessionId,
+    start: String(start),
+    end: String(end),
+    width: String(Math.max(1, Math.round(width)))
+  });
+  return getJson<StoredRange>(`/api/range?${params}`);
+}
@@ -0,0 +1,45 @@
+// Message protocol between UploadQueue (main thread) and upload.worker.
+
+import type { RmsStreamInfo } from './wireFormat';
+
+export const RMS_ENDPOINT = '/api/ingest';
+export const AUDIO_ENDPOINT = '/api/audio';
+
+export interface RmsUploadItem {
+  kind: 'rms';
+  stream: RmsStreamInfo;
+  frame: number; // capture-clock sample index of the value
+  rms: number;
+  mean: number;
+}
+
+// One sealed recorder chunk, written by the server at `byteOffset`
+export interface AudioUploadItem {
+  kind: 'audio';
+  sessionId: string;
+  format: string;
+  byteOffset: number;
+  data: ArrayBuffer;
+}
+
+export type UploadItem = RmsUploadItem | AudioUploadItem;
+
+export interface UploadStatus {
+  pending: number; // items waiting in the outbox
+  pendingBytes: number;
+  retryDelayMs: number; // 0 unless backing off after a failure
+  lastError: string | null;
+  dropped: number; // items discarded by the outbox cap or rejected by the server
+}
+
+export type UploadRequest =
+  // `id` is echoed back once the item is in IndexedDB
+  | { type: 'rms'; id: number; item: RmsUploadItem }
+  // The recorder worker posts AudioUploadItems to this port directly
+  | { type: 'connect'; port: MessagePort }
+  | { type: 'flush' };
+
+export type UploadResponse =
+  | { type: 'saved'; id: number }
+  | { type: 'status'; status: UploadStatus }
+  | { type: 'error'; message: string };
@@ -0,0 +1,95 @@
+// Golden frames shared with backend/tests/test_wire.py: both codecs must
+// produce and accept exactly these bytes. Run with `npm test`.
+
+import assert from 'node:assert/strict';
+import { readFileSync } from 'node:fs';
+import { join } from 'node:path';
+import { test } from 'node:test';
+import { decodeRmsFrame, decodeRmsFrames, encodeRmsFrame, type RmsWireFrame } from './wireFormat.ts';
+
+interface GoldenCase {
+  file: string;
+  quantised: boolean;
+  session_id: string;
+  sequence: number;
+  clock_origin: number;
+  base_frame: number;
+  sample_rate: number;
+  hop: number;
+  threshold: number | null;
+  rms: number[];
+  mean: number[] | null;
+}
+
+const GOLDEN = join(import.meta.dirname, '../../../../backend/tests/golden');
+const { cases } = JSON.parse(readFileSync(join(GOLDEN, 'wire_frames.json'), 'utf8')) as { cases: GoldenCase[] };
+
+const golden = (file: string) => new Uint8Array(readFileSync(join(GOLDEN, file)));
+
+function manifestFrame(c: GoldenCase): RmsWireFrame {
+  return {
+    sessionId: c.session_id,
+    sequence: c.sequence,
+    clockOrigin: c.clock_origin,
+    baseFrame: c.base_frame,
+    sampleRate: c.sample_rate,
+    hop: c.hop,
+    rms: c.rms,
+    mean: c.mean ?? undefined,
+    threshold: c.threshold ?? undefined
+  };
+}
+
+function assertClose(actual: ArrayLike<number>, expected: number[], relative: number) {
+  assert.equal(actual.length, expected.length);
+  for (let i = 0; i < expected.length; i++) {
+    assert.ok(Math.abs(actual[i] - expected[i]) <= relative * expected[i], `value ${i}: ${actual[i]} != ${expected[i]}`);
+  }
+}
+
+for (const c of cases) {
+  test(`golden frame ${c.file} round-trips`, () => {
+    const bytes = golden(c.file);
+    assert.deepEqual(encodeRmsFrame(manifestFrame(c), c.quantised), bytes);
+
+    const { frame, end } = decodeRmsFrame(bytes);
+    assert.equal(end, bytes.length);
+    assert.equal(frame.sessionId, c.session_id);
+    assert.equal(frame.sequence, c.sequence);
+    assert.equal(frame.clockOrigin, c.clock_origin);
+    assert.equal(frame.baseFrame, c.base_frame);
+    assert.equal(frame.sampleRate, c.sample_rate);
+    assert.equal(frame.hop, c.hop);
+    assert.equal(frame.threshold, c.threshold ?? undefined);
+    const relative = c.quantised ? 2.5e-4 : 0;
+    assertClose(frame.rms, c.rms, relative);
+    if (c.mean === null) assert.equal(frame.mean, undefined);
+    else assertClose(frame.mean!, c.mean, relative);
+    assert.deepEqual(encodeRmsFrame(frame, c.quantised), bytes);
+  });
+}
+
+test('back-to-back golden frames decode', () => {
+  const parts = cases.map(c => golden(c.file));
+  const bytes = new Uint8Array(parts.reduce((total, part) => total + part.length, 0));
+  let offset = 0;
+  for (const part of parts) {
+    bytes.set(part, offset);
+    offset += part.length;
+  }
+  assert.deepEqual(
+    decodeRmsFrames(bytes).map(frame => frame.sessionId),
+    cases.map(c => c.session_id)
+  );
+});
+
+for (const [field, offset] of [
+  ['sample rate', 24],
+  ['hop', 28]
+] as const) {
+  test(`a zero ${field} is rejected`, () => {
+    const bytes = golden(cases[0].file);
+    new DataView(bytes.buffer).setUint32(offset, 0, true);
+    assert.throws(() => decodeRmsFrame(bytes));
+  });
+}
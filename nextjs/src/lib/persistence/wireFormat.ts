@@ -0,0 +1,209 @@
+// Binary RMS wire format, version 1. Browser side of backend/audioalarm/wire.py;
+// the layout is documented there and both codecs must change together.
+//
+// A frame is a 40-byte header, the UTF-8 session id padded to 4 bytes, then
+// `count` RMS values and optionally `count` means, as float32 or as uint16
+// codes on a -120..0 dBFS scale.
+
+export const WIRE_CONTENT_TYPE = 'application/x-audioalarm-rms';
+export const WIRE_VERSION = 1;
+
+const MAGIC_0 = 0x52; // 'R'
+const MAGIC_1 = 0x41; // 'A'
+const FLAG_QUANTISED = 0x01;
+const FLAG_MEAN = 0x02;
+const HEADER_BYTES = 40;
+const QUANT_FLOOR_DB = -120;
+const QUANT_MAX = 65535;
+
+export interface RmsWireFrame {
+  sessionId: string;
+  sequence: number;
+  clockOrigin: number; // wall-clock epoch seconds of sample frame 0
+  baseFrame: number; // sample-clock index of the first value
+  sampleRate: number;
+  hop: number; // sample frames between consecutive values
+  rms: ArrayLike<number>;
+  mean?: ArrayLike<number>;
+  threshold?: number;
+}
+
+// Per-session constants of an RMS stream
+export interface RmsStreamInfo {
+  sessionId: string;
+  sampleRate: number;
+  threshold: number;
+  hopFrames: number; // sample frames between consecutive samples
+  clockOrigin: number; // wall-clock epoch seconds of sample frame 0
+}
+
+const MAX_FRAME_VALUES = 0xffff;
+
+const encoder = new TextEncoder();
+const decoder = new TextDecoder();
+
+function quantise(value: number): number {
+  if (!(value > 0)) return 0;
+  const db = 20 * Math.log10(Math.min(value, 1));
+  if (db <= QUANT_FLOOR_DB) return 0;
+  const code = Math.round((db - QUANT_FLOOR_DB) * (QUANT_MAX / -QUANT_FLOOR_DB));
+  return Math.min(QUANT_MAX, Math.max(1, code));
+}
+
+function dequantise(code: number): number {
+  if (code === 0) return 0;
+  return Math.pow(10, (code * (-QUANT_FLOOR_DB / QUANT_MAX) + QUANT_FLOOR_DB) / 20);
+}
+
+export function encodedFrameLength(sessionIdBytes: number, count: number, hasMean: boolean, quantised: boolean): number {
+  const columns = hasMean ? 2 : 1;
+  return HEADER_BYTES + sessionIdBytes + ((4 - (sessionIdBytes % 4)) % 4) + columns * count * (quantised ? 2 : 4);
+}
+
+export function encodeRmsFrame(frame: RmsWireFrame, quantised = false): Uint8Array {
+  const session = encoder.encode(frame.sessionId);
+  const count = frame.rms.length;
+  if (session.length > 255 || count > 0xffff) throw new Error('Session id or value run too long for one frame');
+  if (frame.mean && frame.mean.length !== count) throw new Error('rms and mean must have the same length');
+
+  const bytes = new Uint8Array(encodedFrameLength(session.length, count, !!frame.mean, quantised));
+  const view = new DataView(bytes.buffer);
+  bytes[0] = MAGIC_0;
+  bytes[1] = MAGIC_1;
+  bytes[2] = WIRE_VERSION;
+  bytes[3] = (quantised ? FLAG_QUANTISED : 0) | (frame.mean ? FLAG_MEAN : 0);
+  view.setUint32(4, frame.sequence >>> 0, true);
+  view.setFloat64(8, frame.clockOrigin, true);
+  view.setBigUint64(16, BigInt(Math.round(frame.baseFrame)), true);
+  view.setUint32(24, frame.sampleRate, true);
+  view.setUint32(28, frame.hop, true);
+  view.setUint16(32, count, true);
+  bytes[34] = session.length;
+  view.setFloat32(36, frame.threshold ?? NaN, true);
+  bytes.set(session, HEADER_BYTES);
+
+  let offset = HEADER_BYTES + session.length + ((4 - (session.length % 4)) % 4);
+  const columns = frame.mean ? [frame.rms, frame.mean] : [frame.rms];
+  for (const column of columns) {
+    for (let i = 0; i < count; i++) {
+      if (quantised) {
+        view.setUint16(offset, quantise(column[i]), true);
+        offset += 2;
+      } else {
+        view.setFloat32(offset, column[i], true);
+        offset += 4;
+      }
+    }
+  }
+  return bytes;
+}
+
+// Decodes the frame at `offset`; returns it and the offset just past it
+export function decodeRmsFrame(bytes: Uint8Array, offset = 0): { frame: RmsWireFrame; end: number } {
+  if (bytes.length - offset < HEADER_BYTES) throw new Error('Truncated frame header');
+  const view = new DataView(bytes.buffer, bytes.byteOffset + offset, bytes.length - offset);
+  if (view.getUint8(0) !== MAGIC_0 || view.getUint8(1) !== MAGIC_1) throw new Error('Not an RMS frame');
+  const version = view.getUint8(2);
+  if (version !== WIRE_VERSION) throw new Error(`Unsupported frame version ${version}`);
+  // Every value would get the same timestamp
+  if (view.getUint32(24, true) === 0 || view.getUint32(28, true) === 0) throw new Error('Sample rate and hop must be positive');
+
+  const flags = view.getUint8(3);
+  const count = view.getUint16(32, true);
+  const idLength = view.getUint8(34);
+  const threshold = view.getFloat32(36, true);
+  const sessionId = decoder.decode(bytes.subarray(offset + HEADER_BYTES, offset + HEADER_BYTES + idLength));
+  const quantised = (flags & FLAG_QUANTISED) !== 0;
+  const hasMean = (flags & FLAG_MEAN) !== 0;
+  const end = offset + encodedFrameLength(idLength, count, hasMean, quantised);
+  if (end > bytes.length) throw new Error('Truncated frame body');
+
+  let position = HEADER_BYTES + idLength + ((4 - (idLength % 4)) % 4);
+  const readColumn = () => {
+    const values = new Float32Array(count);
+    for (let i = 0; i < count; i++) {
+      if (quantised) {
+        values[i] = dequantise(view.getUint16(position, true));
+        position += 2;
+      } else {
+        values[i] = view.getFloat32(position, true);
+        position += 4;
+      }
+    }
+    return values;
+  };
+  const rms = readColumn();
+  const mean = hasMean ? readColumn() : undefined;
+
+  return {
+    frame: {
+      sessionId,
+      sequence: view.getUint32(4, true),
+      clockOrigin: view.getFloat64(8, true),
+      baseFrame: Number(view.getBigUint64(16, true)),
+      sampleRate: view.getUint32(24, true),
+      hop: view.getUint32(28, true),
+      rms,
+      mean,
+      // Undo the float32 round trip (0.05 comes back as 0.05000000074...)
+      threshold: Number.isNaN(threshold) ? undefined : Number(threshold.toPrecision(7))
+    },
+    end
+  };
+}
+
+export function decodeRmsFrames(bytes: Uint8Array): RmsWireFrame[] {
+  const frames: RmsWireFrame[] = [];
+  let offset = 0;
+  while (offset < bytes.length) {
+    const { frame, end } = decodeRmsFrame(bytes, offset);
+    frames.push(frame);
+    offset = end;
+  }
+  return frames;
+}
+
+// One wire frame per run of samples exactly `hopFrames` apart, concatenated.
+// Returns the bytes and how many sequence numbers were used.
+export function encodeRmsRuns(
+  stream: RmsStreamInfo,
+  frames: ArrayLike<number>,
+  rms: ArrayLike<number>,
+  mean: ArrayLike<number>,
+  firstSequence: number,
+  quantised = true
+): { bytes: Uint8Array; frameCount: number } {
+  const parts: Uint8Array[] = [];
+  let start = 0;
+  while (start < frames.length) {
+    let end = start + 1;
+    while (end < frames.length && end - start < MAX_FRAME_VALUES && frames[end] - frames[end - 1] === stream.hopFrames) {
+      end++;
+    }
+    parts.push(
+      encodeRmsFrame(
+        {
+          sessionId: stream.sessionId,
+          sequence: firstSequence + parts.length,
+          clockOrigin: stream.clockOrigin,
+          baseFrame: frames[start],
+          sampleRate: stream.sampleRate,
+          hop: stream.hopFrames,
+          rms: Array.prototype.slice.call(rms, start, end),
+          mean: Array.prototype.slice.call(mean, start, end),
+          threshold: stream.threshold
+        },
+        quantised
+      )
+    );
+    start = end;
+  }
+
+  const bytes = new Uint8Array(parts.reduce((total, part) => total + part.length, 0));
+  let offset = 0;
+  for (const part of parts) {
+    bytes.set(part, offset);
+    offset += part.length;
+  }
+  return { bytes, frameCount: parts.length };
+}
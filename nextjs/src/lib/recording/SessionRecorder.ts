@@ -0,0 +1,97 @@
+// Main-thread handle for recorder.worker: forwards PCM chunks (or hands over
+// the worklet's shared PCM ring, which the worker then reads by itself) and
+// reports progress. Encoding and all storage I/O happen in the worker.
+
+import type { PcmChunk } from '@/lib/audio/RmsEngine';
+import type { RecorderRequest, RecorderResponse, RecordingCodec } from './messages';
+
+export interface RecordingProgress {
+  sessionId: string;
+  backend: string;
+  format: string;
+  chunks: number;
+  totalBytes: number;
+  stopped: boolean;
+}
+
+export type RecordingListener = (progress: RecordingProgress) => void;
+
+export interface SessionRecorderOptions {
+  chunkSeconds?: number;
+  codec?: RecordingCodec; // 'opus' falls back to PCM without WebCodecs
+}
+
+export class SessionRecorder {
+  private readonly worker: Worker;
+  private readonly chunkSeconds: number;
+  private readonly codec: RecordingCodec;
+  private listeners = new Set<RecordingListener>();
+  private progress: RecordingProgress | null = null;
+
+  constructor(options: SessionRecorderOptions = {}) {
+    this.chunkSeconds = options.chunkSeconds ?? 1;
+    this.codec = options.codec ?? 'opus';
+    this.worker = new Worker(new URL('../../workers/recorder.worker.ts', import.meta.url), { type: 'module' });
+    this.worker.onmessage = (event: MessageEvent<RecorderResponse>) => this.handleResponse(event.data);
+  }
+
+  subscribe(listener: RecordingListener): () => void {
+    this.listeners.add(listener);
+    return () => {
+      this.listeners.delete(listener);
+    };
+  }
+
+  // With `ring` (RmsEngine.pcmRing) the worker reads the audio itself and
+  // write() is not needed
+  start(sessionId: string, sampleRate: number, ring?: SharedArrayBuffer): void {
+    this.progress = { sessionId, backend: '', format: '', chunks: 0, totalBytes: 0, stopped: false };
+    this.post({ type: 'start', sessionId, sampleRate, chunkSeconds: this.chunkSeconds, codec: this.codec, ring });
+  }
+
+  // The samples are structured-cloned, so the chunk's buffer may be reused
+  write(chunk: PcmChunk): void {
+    this.post({ type: 'pcm', samples: chunk.samples, frame: chunk.frame });
+  }
+
+  // Copies of the chunks written from now on go to `port` for upload
+  connectUpload(port: MessagePort): void {
+    this.post({ type: 'upload', port }, [port]);
+  }
+
+  stop(): void {
+    this.post({ type: 'stop' });
+  }
+
+  // Terminates after the worker has flushed the final chunk
+  dispose(): void {
+    const terminate = this.subscribe(progress => {
+      if (progress.stopped) {
+        terminate();
+        this.worker.terminate();
+      }
+    });
+    this.stop();
+  }
+
+  private post(request: RecorderRequest, transfer: Transferable[] = []): void {
+    this.worker.postMessage(request, transfer);
+  }
+
+  private handleResponse(response: RecorderResponse): void {
+    if (response.type === 'error') {
+      console.error('Session recording failed:', response.message);
+      return;
+    }
+    if (!this.progress) return;
+    if (response.type === 'started') {
+      this.progress = { ...this.progress, backend: response.backend, format: response.format };
+    } else if (response.type === 'chunk') {
+      this.progress = { ...this.progress, chunks: response.record.index + 1, totalBytes: response.totalBytes };
+    } else {
+      this.progress = { ...this.progress, chunks: response.chunks, totalBytes: response.totalBytes, stopped: true };
+    }
+    const progress = this.progress;
+    this.listeners.forEach(listener => listener(progress));
+  }
+}
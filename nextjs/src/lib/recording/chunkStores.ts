@@ -0,0 +1,143 @@
+// Persistent chunk stores used by recorder.worker.
+//
+// OPFS: recordings/<sessionId>/ holds session.json, one append-only data
+// file and an append-only NDJSON chunk index, written through synchronous
+// access handles (worker-only API, no main-thread I/O).
+// IndexedDB: one record per chunk keyed by [sessionId, index], used where
+// OPFS sync access handles are unavailable.
+
+import { requestToPromise, transactionDone } from '@/lib/idb';
+import type { ChunkRecord } from './messages';
+
+export interface SessionMeta {
+  sessionId: string;
+  sampleRate: number;
+  chunkSeconds: number;
+  format: string; // 'f32le' raw mono float PCM or 'ogg-opus'
+  createdAt: number;
+}
+
+export interface ChunkStore {
+  readonly backend: string;
+  open(meta: SessionMeta): Promise<void>;
+  writeChunk(record: ChunkRecord, data: Uint8Array): Promise<void>;
+  close(): Promise<void>;
+}
+
+// Minimal typings for the worker-only OPFS sync API
+interface SyncAccessHandle {
+  write(buffer: ArrayBufferView, options?: { at?: number }): number;
+  getSize(): number;
+  flush(): void;
+  close(): void;
+}
+
+type SyncFileHandle = FileSystemFileHandle & {
+  createSyncAccessHandle(): Promise<SyncAccessHandle>;
+};
+
+const RECORDINGS_DIR = 'recordings';
+const DATA_FILE = 'audio.bin';
+const INDEX_FILE = 'chunks.ndjson';
+const META_FILE = 'session.json';
+
+const encoder = new TextEncoder();
+
+export class OpfsChunkStore implements ChunkStore {
+  readonly backend = 'opfs';
+  private data: SyncAccessHandle | null = null;
+  private index: SyncAccessHandle | null = null;
+
+  static isSupported(): boolean {
+    if (typeof navigator === 'undefined' || !navigator.storage?.getDirectory) return false;
+    return typeof FileSystemFileHandle !== 'undefined' && 'createSyncAccessHandle' in FileSystemFileHandle.prototype;
+  }
+
+  async open(meta: SessionMeta): Promise<void> {
+    const root = await navigator.storage.getDirectory();
+    const recordings = await root.getDirectoryHandle(RECORDINGS_DIR, { create: true });
+    const session = await recordings.getDirectoryHandle(meta.sessionId, { create: true });
+
+    const metaHandle = await this.openHandle(session, META_FILE);
+    metaHandle.write(encoder.encode(JSON.stringify(meta)), { at: 0 });
+    metaHandle.flush();
+    metaHandle.close();
+
+    this.data = await this.openHandle(session, DATA_FILE);
+    this.index = await this.openHandle(session, INDEX_FILE);
+  }
+
+  async writeChunk(record: ChunkRecord, data: Uint8Array): Promise<void> {
+    if (!this.data || !this.index) throw new Error('OPFS store is not open');
+    this.data.write(data, { at: record.byteOffset });
+    this.index.write(encoder.encode(JSON.stringify(record) + '\n'), { at: this.index.getSize() });
+    this.data.flush();
+    this.index.flush();
+  }
+
+  async close(): Promise<void> {
+    this.data?.close();
+    this.index?.close();
+    this.data = null;
+    this.index = null;
+  }
+
+  private async openHandle(directory: FileSystemDirectoryHandle, name: string): Promise<SyncAccessHandle> {
+    const file = (await directory.getFileHandle(name, { create: true })) as SyncFileHandle;
+    return file.createSyncAccessHandle();
+  }
+}
+
+const DB_NAME = 'audio-alarm-recordings';
+const DB_VERSION = 1;
+
+export class IndexedDbChunkStore implements ChunkStore {
+  readonly backend = 'indexeddb';
+  private db: IDBDatabase | null = null;
+  private sessionId = '';
+
+  async open(meta: SessionMeta): Promise<void> {
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+    request.onupgradeneeded = () => {
+      const db = request.result;
+      db.createObjectStore('sessions', { keyPath: 'sessionId' });
+      db.createObjectStore('chunks', { keyPath: ['sessionId', 'index'] });
+    };
+    this.db = await requestToPromise(request);
+    this.sessionId = meta.sessionId;
+
+    const transaction = this.db.transaction('sessions', 'readwrite');
+    transaction.objectStore('sessions').put(meta);
+    await transactionDone(transaction);
+  }
+
+  async writeChunk(record: ChunkRecord, data: Uint8Array): Promise<void> {
+    if (!this.db) throw new Error('IndexedDB store is not open');
+    const transaction = this.db.transaction('chunks', 'readwrite');
+    // Copy out of the recorder's reusable buffer; the copy is released after commit
+    transaction.objectStore('chunks').put({ sessionId: this.sessionId, ...record, data: data.slice().buffer });
+    await transactionDone(transaction);
+  }
+
+  async close(): Promise<void> {
+    this.db?.close();
+    this.db = null;
+  }
+}
+
+export async function openChunkStore(meta: SessionMeta): Promise<ChunkStore> {
+  if (OpfsChunkStore.isSupported()) {
+    const store = new OpfsChunkStore();
+    try {
+      await store.open(meta);
+      return store;
+    } catch (error) {
+      // e.g. private browsing modes that expose but refuse OPFS
+      console.warn('OPFS unavailable, falling back to IndexedDB:', error);
+      await store.close();
+    }
+  }
+  const store = new IndexedDbChunkStore();
+  await store.open(meta);
+  return store;
+}
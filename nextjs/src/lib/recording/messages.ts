@@ -0,0 +1,27 @@
+// Message protocol between SessionRecorder (main thread) and recorder.worker.
+
+export interface ChunkRecord {
+  index: number;
+  startFrame: number; // capture-clock sample index of the first sample
+  frames: number;
+  byteOffset: number; // position in the session's logical byte stream
+  byteLength: number;
+  wallClock: number; // Date.now() when the chunk was sealed
+}
+
+export type RecordingCodec = 'opus' | 'pcm';
+
+export type RecorderRequest =
+  // With `ring` the worker reads PCM from the worklet's shared ring and no
+  // 'pcm' requests are sent
+  | { type: 'start'; sessionId: string; sampleRate: number; chunkSeconds: number; codec: RecordingCodec; ring?: SharedArrayBuffer }
+  | { type: 'pcm'; samples: Float32Array; frame: number }
+  | { type: 'stop' }
+  // Sealed chunks are also posted to this port as AudioUploadItems
+  | { type: 'upload'; port: MessagePort };
+
+export type RecorderResponse =
+  | { type: 'started'; sessionId: string; backend: string; format: string }
+  | { type: 'chunk'; record: ChunkRecord; totalBytes: number }
+  | { type: 'stopped'; sessionId: string; chunks: number; totalBytes: number }
+  | { type: 'error'; message: string };
@@ -0,0 +1,158 @@
+// Minimal Ogg Opus muxer (RFC 3533 pages, RFC 7845 Opus mapping).
+// Produces a byte stream that can be appended chunk by chunk and played
+// back as a regular .opus file once concatenated.
+
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let i = 0; i < 256; i++) {
+    let crc = i << 24;
+    for (let bit = 0; bit < 8; bit++) {
+      crc = crc & 0x80000000 ? (crc << 1) ^ 0x04c11db7 : crc << 1;
+    }
+    table[i] = crc >>> 0;
+  }
+  return table;
+})();
+
+function oggCrc(bytes: Uint8Array): number {
+  let crc = 0;
+  for (let i = 0; i < bytes.length; i++) {
+    crc = ((crc << 8) ^ CRC_TABLE[((crc >>> 24) ^ bytes[i]) & 0xff]) >>> 0;
+  }
+  return crc;
+}
+
+const OPUS_HEAD = 'OpusHead';
+const HEADER_TYPE_BOS = 0x02;
+const HEADER_TYPE_EOS = 0x04;
+const MAX_SEGMENTS = 255;
+
+function ascii(text: string): Uint8Array {
+  const bytes = new Uint8Array(text.length);
+  for (let i = 0; i < text.length; i++) bytes[i] = text.charCodeAt(i);
+  return bytes;
+}
+
+function concat(parts: Uint8Array[]): Uint8Array {
+  const out = new Uint8Array(parts.reduce((total, part) => total + part.length, 0));
+  let offset = 0;
+  for (const part of parts) {
+    out.set(part, offset);
+    offset += part.length;
+  }
+  return out;
+}
+
+// OpusHead identification header; `description` from the encoder is used
+// as-is when it already is one
+export function opusHead(channels: number, inputSampleRate: number, description?: Uint8Array): Uint8Array {
+  if (description && description.length >= 19 && String.fromCharCode(...description.subarray(0, 8)) === OPUS_HEAD) {
+    return description;
+  }
+  const head = new Uint8Array(19);
+  const view = new DataView(head.buffer);
+  head.set(ascii(OPUS_HEAD), 0);
+  head[8] = 1; // version
+  head[9] = channels;
+  view.setUint16(10, 312, true); // pre-skip: libopus default lookahead at 48 kHz
+  view.setUint32(12, inputSampleRate, true);
+  view.setInt16(16, 0, true); // output gain
+  head[18] = 0; // channel mapping family
+  return head;
+}
+
+// Pre-skip (48 kHz samples the decoder discards) from an OpusHead header;
+// the first audio granule position must already include it (RFC 7845 4.2)
+export function opusPreSkip(head: Uint8Array): number {
+  return new DataView(head.buffer, head.byteOffset, head.byteLength).getUint16(10, true);
+}
+
+function opusTags(vendor: string): Uint8Array {
+  const vendorBytes = ascii(vendor);
+  const tags = new Uint8Array(8 + 4 + vendorBytes.length + 4);
+  const view = new DataView(tags.buffer);
+  tags.set(ascii('OpusTags'), 0);
+  view.setUint32(8, vendorBytes.length, true);
+  tags.set(vendorBytes, 12);
+  view.setUint32(12 + vendorBytes.length, 0, true); // no user comments
+  return tags;
+}
+
+export class OggOpusMuxer {
+  private readonly serial: number;
+  private sequence = 0;
+
+  constructor(serial: number = (Math.random() * 0x100000000) >>> 0) {
+    this.serial = serial;
+  }
+
+  // Identification and comment header pages; must start the stream
+  headers(head: Uint8Array, vendor = 'AudioAlarm'): Uint8Array {
+    return concat([
+      this.page([head], 0, HEADER_TYPE_BOS),
+      this.page([opusTags(vendor)], 0, 0)
+    ]);
+  }
+
+  // Audio pages for whole packets; `granules[i]` is the 48 kHz granule
+  // position after packets[i]
+  pages(packets: Uint8Array[], granules: number[], last = false): Uint8Array {
+    const out: Uint8Array[] = [];
+    let first = 0;
+    while (first < packets.length) {
+      let segments = 0;
+      let end = first;
+      while (end < packets.length) {
+        const needed = Math.floor(packets[end].length / 255) + 1;
+        if (segments + needed > MAX_SEGMENTS) break;
+        segments += needed;
+        end++;
+      }
+      const final = last && end === packets.length;
+      out.push(this.page(packets.slice(first, end), granules[end - 1], final ? HEADER_TYPE_EOS : 0));
+      first = end;
+    }
+    return concat(out);
+  }
+
+  // Packet-less page that only carries the end-of-stream flag, for streams
+  // whose last audio page was already written without it
+  end(granule: number): Uint8Array {
+    return this.page([], granule, HEADER_TYPE_EOS);
+  }
+
+  private page(packets: Uint8Array[], granule: number, headerType: number): Uint8Array {
+    const lacing: number[] = [];
+    for (const packet of packets) {
+      let remaining = packet.length;
+      while (remaining >= 255) {
+        lacing.push(255);
+        remaining -= 255;
+      }
+      lacing.push(remaining);
+    }
+
+    const headerLength = 27 + lacing.length;
+    const bodyLength = packets.reduce((total, packet) => total + packet.length, 0);
+    const page = new Uint8Array(headerLength + bodyLength);
+    const view = new DataView(page.buffer);
+    page.set(ascii('OggS'), 0);
+    page[4] = 0; // stream structure version
+    page[5] = headerType;
+    view.setUint32(6, granule % 0x100000000, true);
+    view.setUint32(10, Math.floor(granule / 0x100000000), true);
+    view.setUint32(14, this.serial, true);
+    view.setUint32(18, this.sequence++, true);
+    view.setUint32(22, 0, true); // CRC, filled below
+    page[26] = lacing.length;
+    page.set(lacing, 27);
+
+    let offset = headerLength;
+    for (const packet of packets) {
+      page.set(packet, offset);
+      offset += packet.length;
+    }
+    view.setUint32(22, oggCrc(page), true);
+    return page;
+  }
+}
@@ -0,0 +1,36 @@
+// Redraw scheduling for charts on a page that may be hidden.
+//
+// Browsers do not paint hidden tabs, so drawing there only spends
+// main-thread time. Callers keep updating their data; while the page is
+// hidden `request()` only marks it stale, and a single draw catches up
+// when the page becomes visible again.
+
+export interface VisibleRedraw {
+  request(): void;
+  dispose(): void;
+}
+
+export function visibleRedraw(draw: () => void): VisibleRedraw {
+  let stale = false;
+
+  const handleVisibilityChange = () => {
+    if (stale && !document.hidden) {
+      stale = false;
+      draw();
+    }
+  };
+  document.addEventListener('visibilitychange', handleVisibilityChange);
+
+  return {
+    request() {
+      if (document.hidden) {
+        stale = true;
+      } else {
+        draw();
+      }
+    },
+    dispose() {
+      document.removeEventListener('visibilitychange', handleVisibilityChange);
+    }
+  };
+}
@@ -0,0 +1,320 @@
+// Dedicated worker that persists the microphone stream in fixed-size chunks.
+//
+// With WebCodecs available the audio is Opus-encoded here and stored as an
+// Ogg Opus stream (one set of pages per chunk); otherwise raw float PCM is
+// stored. PCM is staged in one preallocated buffer that is reused for every
+// chunk, so memory stays flat however long the session runs. When the
+// worklet shares its PCM ring, the worker polls it directly instead of
+// receiving copies through the main thread.
+
+import { openChunkStore, type ChunkStore } from '@/lib/recording/chunkStores';
+import type { AudioUploadItem } from '@/lib/persistence/uploadMessages';
+import type { ChunkRecord, RecorderRequest, RecorderResponse } from '@/lib/recording/messages';
+import { OggOpusMuxer, opusHead, opusPreSkip } from '@/lib/recording/ogg';
+import { SharedPcmReader } from '@/lib/audio/SharedPcmRing';
+
+interface WorkerScope {
+  onmessage: ((event: MessageEvent<RecorderRequest>) => void) | null;
+  postMessage(message: RecorderResponse): void;
+}
+
+const scope = self as unknown as WorkerScope;
+
+const OPUS_BITRATE = 32000;
+const RING_POLL_MS = 100;
+
+type StartRequest = Extract<RecorderRequest, { type: 'start' }>;
+
+// Turns the PCM stream into storable chunks
+interface ChunkSink {
+  readonly format: string;
+  write(samples: Float32Array, frame: number): Promise<void>;
+  finish(): Promise<void>;
+}
+
+let store: ChunkStore | null = null;
+let sink: ChunkSink | null = null;
+let sessionId = '';
+let chunkIndex = 0;
+let totalBytes = 0;
+let uploadPort: MessagePort | null = null;
+let ringReader: SharedPcmReader | null = null;
+let ringSamples = new Float32Array(0);
+let ringTimer: ReturnType<typeof setTimeout> | null = null;
+
+async function persistChunk(startFrame: number, frames: number, data: Uint8Array) {
+  if (!store) return;
+  const record: ChunkRecord = {
+    index: chunkIndex++,
+    startFrame,
+    frames,
+    byteOffset: totalBytes,
+    byteLength: data.byteLength,
+    wallClock: Date.now()
+  };
+  await store.writeChunk(record, data);
+  totalBytes += data.byteLength;
+  if (uploadPort && sink && data.byteLength > 0) {
+    // Copied out of the sink's reusable buffer and handed over
+    const copy = data.slice().buffer;
+    const item: AudioUploadItem = {
+      kind: 'audio',
+      sessionId,
+      format: sink.format,
+      byteOffset: record.byteOffset,
+      data: copy
+    };
+    uploadPort.postMessage(item, [copy]);
+  }
+  scope.postMessage({ type: 'chunk', record, totalBytes });
+}
+
+// Raw little-endian float32 PCM
+class PcmSink implements ChunkSink {
+  readonly format = 'f32le';
+  private readonly buffer: Float32Array;
+  private fill = 0;
+  private startFrame = 0;
+
+  constructor(chunkFrames: number) {
+    this.buffer = new Float32Array(chunkFrames);
+  }
+
+  async write(samples: Float32Array, frame: number): Promise<void> {
+    // A gap in the capture clock starts a new chunk so offsets stay exact
+    if (this.fill > 0 && frame !== this.startFrame + this.fill) await this.seal();
+
+    let offset = 0;
+    while (offset < samples.length) {
+      if (this.fill === 0) this.startFrame = frame + offset;
+      const count = Math.min(samples.length - offset, this.buffer.length - this.fill);
+      this.buffer.set(samples.subarray(offset, offset + count), this.fill);
+      this.fill += count;
+      offset += count;
+      if (this.fill === this.buffer.length) await this.seal();
+    }
+  }
+
+  async finish(): Promise<void> {
+    await this.seal();
+  }
+
+  private async seal() {
+    if (this.fill === 0) return;
+    const data = new Uint8Array(this.buffer.buffer, 0, this.fill * Float32Array.BYTES_PER_ELEMENT);
+    const frames = this.fill;
+    this.fill = 0;
+    await persistChunk(this.startFrame, frames, data);
+  }
+}
+
+// WebCodecs Opus packets muxed into Ogg pages
+class OpusSink implements ChunkSink {
+  readonly format = 'ogg-opus';
+  private readonly encoder: AudioEncoder;
+  private readonly muxer = new OggOpusMuxer();
+  private readonly sampleRate: number;
+  private readonly chunkFrames: number;
+  private headerWritten = false;
+  private packets: Uint8Array[] = [];
+  private granules: number[] = [];
+  private granule = 0; // pre-skip plus 48 kHz samples emitted so far
+  private startFrame = -1;
+  private frames = 0;
+  private writes: Promise<void> = Promise.resolve();
+  private failure: unknown = null;
+
+  static async isSupported(sampleRate: number): Promise<boolean> {
+    if (typeof AudioEncoder === 'undefined') return false;
+    const { supported } = await AudioEncoder.isConfigSupported(OpusSink.config(sampleRate));
+    return supported === true;
+  }
+
+  private static config(sampleRate: number): AudioEncoderConfig {
+    return { codec: 'opus', sampleRate, numberOfChannels: 1, bitrate: OPUS_BITRATE };
+  }
+
+  constructor(sampleRate: number, chunkFrames: number) {
+    this.sampleRate = sampleRate;
+    this.chunkFrames = chunkFrames;
+    this.encoder = new AudioEncoder({
+      output: (chunk, metadata) => this.handlePacket(chunk, metadata),
+      error: error => {
+        this.failure = error;
+      }
+    });
+    this.encoder.configure(OpusSink.config(sampleRate));
+  }
+
+  async write(samples: Float32Array, frame: number): Promise<void> {
+    if (this.failure) throw this.failure;
+    const audioData = new AudioData({
+      format: 'f32',
+      sampleRate: this.sampleRate,
+      numberOfFrames: samples.length,
+      numberOfChannels: 1,
+      timestamp: Math.round((frame / this.sampleRate) * 1e6),
+      data: samples
+    });
+    this.encoder.encode(audioData);
+    audioData.close();
+    await this.writes;
+  }
+
+  async finish(): Promise<void> {
+    await this.encoder.flush();
+    this.encoder.close();
+    this.seal(true);
+    await this.writes;
+    if (this.failure) throw this.failure;
+  }
+
+  private handlePacket(chunk: EncodedAudioChunk, metadata?: EncodedAudioChunkMetadata) {
+    if (!this.headerWritten) {
+      const description = metadata?.decoderConfig?.description;
+      const head = opusHead(1, this.sampleRate, description ? toBytes(description) : undefined);
+      // Ogg header pages are stored as a zero-length chunk ahead of the audio
+      this.enqueue(() => persistChunk(0, 0, this.muxer.headers(head)));
+      this.granule = opusPreSkip(head);
+      this.headerWritten = true;
+    }
+
+    const packet = new Uint8Array(chunk.byteLength);
+    chunk.copyTo(packet);
+    const duration = chunk.duration ?? 20000;
+    if (this.startFrame < 0) this.startFrame = Math.round((chunk.timestamp / 1e6) * this.sampleRate);
+    this.granule += Math.round((duration * 48000) / 1e6);
+    this.packets.push(packet);
+    this.granules.push(this.granule);
+    this.frames += Math.round((duration * this.sampleRate) / 1e6);
+
+    if (this.frames >= this.chunkFrames) this.seal(false);
+  }
+
+  private seal(last: boolean) {
+    if (this.packets.length === 0) {
+      // Everything was already sealed: the stream still needs its EOS page,
+      // stored as a zero-length chunk like the headers
+      if (last && this.headerWritten) this.enqueue(() => persistChunk(0, 0, this.muxer.end(this.granule)));
+      return;
+    }
+    const data = this.muxer.pages(this.packets, this.granules, last);
+    const startFrame = this.startFrame;
+    const frames = this.frames;
+    this.packets = [];
+    this.granules = [];
+    this.startFrame = -1;
+    this.frames = 0;
+    this.enqueue(() => persistChunk(startFrame, frames, data));
+  }
+
+  // Encoder callbacks are synchronous; storage writes are chained in order
+  private enqueue(write: () => Promise<void>) {
+    this.writes = this.writes.then(write).catch(error => {
+      this.failure = error;
+    });
+  }
+}
+
+function toBytes(source: AllowSharedBufferSource): Uint8Array {
+  if (ArrayBuffer.isView(source)) return new Uint8Array(source.buffer, source.byteOffset, source.byteLength);
+  return new Uint8Array(source);
+}
+
+// Everything the worklet has published since the last poll goes to the sink
+async function drainRing() {
+  let read;
+  while (ringReader && sink && (read = ringReader.read(ringSamples))) {
+    await sink.write(ringSamples.subarray(0, read.length), read.frame);
+  }
+}
+
+function scheduleRingPoll() {
+  ringTimer = setTimeout(() => {
+    ringTimer = null;
+    run(async () => {
+      await drainRing();
+      if (ringReader) scheduleRingPoll();
+    });
+  }, RING_POLL_MS);
+}
+
+async function handleStart(request: StartRequest) {
+  // Reading starts at the newest sample, so attach before any await
+  if (request.ring) {
+    ringReader = new SharedPcmReader(request.ring);
+    ringSamples = new Float32Array(Math.ceil((request.sampleRate * RING_POLL_MS) / 1000) * 2);
+  }
+  sessionId = request.sessionId;
+  chunkIndex = 0;
+  totalBytes = 0;
+  const chunkFrames = Math.round(request.sampleRate * request.chunkSeconds);
+  const useOpus = request.codec === 'opus' && (await OpusSink.isSupported(request.sampleRate));
+  sink = useOpus ? new OpusSink(request.sampleRate, chunkFrames) : new PcmSink(chunkFrames);
+  store = await openChunkStore({
+    sessionId,
+    sampleRate: request.sampleRate,
+    chunkSeconds: request.chunkSeconds,
+    format: sink.format,
+    createdAt: Date.now()
+  });
+  scope.postMessage({ type: 'started', sessionId, backend: store.backend, format: sink.format });
+  if (ringReader) scheduleRingPoll();
+}
+
+// Always ends with 'stopped' (after an 'error' if anything failed), so the
+// owner can terminate the worker whatever happened to the last chunks
+async function handleStop() {
+  if (ringTimer !== null) clearTimeout(ringTimer);
+  ringTimer = null;
+  let failure: unknown = null;
+  try {
+    await drainRing();
+    if (ringReader && ringReader.dropped > 0) {
+      console.warn(`Recorder fell behind the PCM ring; ${ringReader.dropped} samples lost`);
+    }
+    await sink?.finish();
+  } catch (error) {
+    failure = error;
+  } finally {
+    ringReader = null;
+    try {
+      await store?.close();
+    } catch (error) {
+      failure ??= error;
+    }
+    if (failure !== null) postError(failure);
+    scope.postMessage({ type: 'stopped', sessionId, chunks: chunkIndex, totalBytes });
+    store = null;
+    sink = null;
+  }
+}
+
+// Requests and ring polls are handled strictly in order; storage calls are
+// async
+let queue: Promise<void> = Promise.resolve();
+
+function postError(error: unknown) {
+  scope.postMessage({ type: 'error', message: error instanceof Error ? error.message : String(error) });
+}
+
+function run(task: () => Promise<void> | void) {
+  queue = queue.then(task).catch(postError);
+}
+
+scope.onmessage = (event: MessageEvent<RecorderRequest>) => {
+  const request = event.data;
+  run(() => {
+    switch (request.type) {
+      case 'start':
+        return handleStart(request);
+      case 'pcm':
+        return sink?.write(request.samples, request.frame);
+      case 'stop':
+        return handleStop();
+      case 'upload':
+        uploadPort = request.port;
+        return;
+    }
+  });
+};
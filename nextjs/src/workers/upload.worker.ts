@@ -0,0 +1,226 @@
+// Dedicated worker that uploads RMS samples and recorder chunks.
+//
+// Every item is written to an IndexedDB outbox before it is acknowledged, and
+// removed only after the server has accepted it, so nothing is lost across
+// reloads or dropped connections (the server skips samples it already has
+// and writes audio at fixed offsets, so a repeated upload is harmless).
+// The outbox is flushed once it holds a full batch or its oldest item has
+// waited `MAX_DELAY_MS`; a flush sends one request per session and kind.
+// Failed requests back off exponentially with jitter, and going back online
+// retries at once. A flush is single-flight: while one is running or backing
+// off, new items only accumulate, so a flaky link never multiplies requests.
+
+import { UploadOutbox, type OutboxEntry } from '@/lib/persistence/UploadOutbox';
+import {
+  AUDIO_ENDPOINT,
+  RMS_ENDPOINT,
+  type AudioUploadItem,
+  type RmsUploadItem,
+  type UploadItem,
+  type UploadRequest,
+  type UploadResponse
+} from '@/lib/persistence/uploadMessages';
+import { WIRE_CONTENT_TYPE, encodeRmsRuns } from '@/lib/persistence/wireFormat';
+
+interface WorkerScope {
+  onmessage: ((event: MessageEvent<UploadRequest>) => void) | null;
+  postMessage(message: UploadResponse): void;
+  addEventListener(type: 'online', listener: () => void): void;
+}
+
+const scope = self as unknown as WorkerScope;
+
+const BATCH_ITEMS = 50;
+const BATCH_BYTES = 1 << 20;
+const MAX_DELAY_MS = 5000;
+const BACKOFF_BASE_MS = 1000;
+const BACKOFF_MAX_MS = 5 * 60 * 1000;
+// About 3 days of 1 s RMS samples, or several minutes of PCM
+const MAX_OUTBOX_ITEMS = 250000;
+const MAX_OUTBOX_BYTES = 256 * 1024 * 1024;
+
+class HttpError extends Error {
+  constructor(readonly status: number) {
+    super(`Upload failed with HTTP ${status}`);
+  }
+}
+
+const outboxReady = UploadOutbox.open();
+let timer: ReturnType<typeof setTimeout> | null = null;
+let timerAt = 0;
+let flushing = false;
+let attempt = 0;
+let retryDelayMs = 0;
+let lastError: string | null = null;
+let dropped = 0;
+let sequence = 0;
+
+async function postStatus() {
+  const outbox = await outboxReady;
+  scope.postMessage({
+    type: 'status',
+    status: { pending: outbox.size, pendingBytes: outbox.byteSize, retryDelayMs, lastError, dropped }
+  });
+}
+
+function schedule(delayMs: number) {
+  const at = Date.now() + delayMs;
+  // Keep an earlier deadline
+  if (timer !== null && timerAt <= at) return;
+  if (timer !== null) clearTimeout(timer);
+  timerAt = at;
+  timer = setTimeout(() => {
+    timer = null;
+    void flush(true);
+  }, delayMs);
+}
+
+async function enqueue(item: UploadItem): Promise<void> {
+  const outbox = await outboxReady;
+  await outbox.add(item);
+  if (outbox.size > MAX_OUTBOX_ITEMS || outbox.byteSize > MAX_OUTBOX_BYTES) {
+    dropped += await outbox.trim(MAX_OUTBOX_ITEMS, MAX_OUTBOX_BYTES);
+  }
+  void postStatus();
+  if (retryDelayMs > 0) return; // the retry timer owns the next flush
+  if (outbox.size >= BATCH_ITEMS || outbox.byteSize >= BATCH_BYTES) {
+    void flush(false);
+  } else {
+    schedule(MAX_DELAY_MS);
+  }
+}
+
+// Sends batches while a full one is waiting, or everything with `drain`
+// (timer, explicit flush, recovery); a partial batch otherwise waits for
+// the timer so it can fill up
+async function flush(drain: boolean): Promise<void> {
+  if (flushing) return;
+  flushing = true;
+  if (timer !== null) {
+    clearTimeout(timer);
+    timer = null;
+  }
+  const outbox = await outboxReady;
+  try {
+    while (outbox.size > 0 && (drain || outbox.size >= BATCH_ITEMS || outbox.byteSize >= BATCH_BYTES)) {
+      await sendBatch(outbox, await outbox.peek(BATCH_ITEMS, BATCH_BYTES));
+      drain = drain || attempt > 0; // empty the backlog after recovering
+      attempt = 0;
+      retryDelayMs = 0;
+      lastError = null;
+    }
+    if (outbox.size > 0) schedule(MAX_DELAY_MS);
+  } catch (error) {
+    lastError = error instanceof Error ? error.message : String(error);
+    retryDelayMs = Math.min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** attempt) * (0.5 + Math.random() / 2);
+    attempt++;
+    schedule(retryDelayMs);
+  } finally {
+    flushing = false;
+    void postStatus();
+  }
+}
+
+async function sendBatch(outbox: UploadOutbox, entries: OutboxEntry[]): Promise<void> {
+  // One request per kind and session; order within each group is kept
+  const groups = new Map<string, OutboxEntry[]>();
+  for (const entry of entries) {
+    const { item } = entry;
+    const key = `${item.kind}:${item.kind === 'rms' ? item.stream.sessionId : item.sessionId}`;
+    const group = groups.get(key);
+    if (group) group.push(entry);
+    else groups.set(key, [entry]);
+  }
+
+  for (const group of groups.values()) {
+    try {
+      if (group[0].item.kind === 'rms') await sendRms(group.map(entry => entry.item as RmsUploadItem));
+      else await sendAudio(group.map(entry => entry.item as AudioUploadItem));
+    } catch (error) {
+      // The server refused the data itself; retrying would never succeed
+      if (!(error instanceof HttpError) || !isPermanent(error.status)) throw error;
+      console.error('Dropping rejected upload:', error.message);
+      dropped += group.length;
+    }
+    await outbox.remove(group);
+  }
+}
+
+function isPermanent(status: number): boolean {
+  return status >= 400 && status < 500 && status !== 408 && status !== 429;
+}
+
+async function post(url: string, contentType: string, body: Uint8Array): Promise<void> {
+  const response = await fetch(url, { method: 'POST', headers: { 'Content-Type': contentType }, body });
+  if (!response.ok) throw new HttpError(response.status);
+}
+
+async function sendRms(items: RmsUploadItem[]): Promise<void> {
+  const { bytes, frameCount } = encodeRmsRuns(
+    items[0].stream,
+    items.map(item => item.frame),
+    items.map(item => item.rms),
+    items.map(item => item.mean),
+    sequence
+  );
+  sequence += frameCount;
+  await post(RMS_ENDPOINT, WIRE_CONTENT_TYPE, bytes);
+}
+
+// Contiguous chunks are concatenated into one write
+async function sendAudio(items: AudioUploadItem[]): Promise<void> {
+  let start = 0;
+  while (start < items.length) {
+    let end = start + 1;
+    let length = items[start].data.byteLength;
+    while (end < items.length && items[end].byteOffset === items[start].byteOffset + length) {
+      length += items[end].data.byteLength;
+      end++;
+    }
+    const body = new Uint8Array(length);
+    let offset = 0;
+    for (const item of items.slice(start, end)) {
+      body.set(new Uint8Array(item.data), offset);
+      offset += item.data.byteLength;
+    }
+    const { sessionId, format, byteOffset } = items[start];
+    const query = new URLSearchParams({ session_id: sessionId, format, offset: String(byteOffset) });
+    await post(`${AUDIO_ENDPOINT}?${query}`, 'application/octet-stream', body);
+    start = end;
+  }
+}
+
+function report(error: unknown) {
+  scope.postMessage({ type: 'error', message: error instanceof Error ? error.message : String(error) });
+}
+
+// The connection coming back is the best moment to retry
+scope.addEventListener('online', () => {
+  attempt = 0;
+  retryDelayMs = 0;
+  void flush(true);
+});
+
+// Whatever an earlier page left in the outbox goes out first
+void outboxReady.then(outbox => {
+  void postStatus();
+  if (outbox.size > 0) void flush(true);
+}, report);
+
+scope.onmessage = (event: MessageEvent<UploadRequest>) => {
+  const request = event.data;
+  switch (request.type) {
+    case 'rms':
+      enqueue(request.item).then(() => scope.postMessage({ type: 'saved', id: request.id }), report);
+      break;
+    case 'connect':
+      request.port.onmessage = (message: MessageEvent<AudioUploadItem>) => {
+        enqueue(message.data).catch(report);
+      };
+      break;
+    case 'flush':
+      // A backoff in progress keeps its schedule
+      if (retryDelayMs === 0) void flush(true);
+      break;
+  }
+};